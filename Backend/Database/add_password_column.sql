@@ -1,2 +0,0 @@
--- Add password_hash column to users table
-ALTER TABLE users ADD COLUMN IF NOT EXISTS password_hash VARCHAR(255); 
\ No newline at end of file
@@ -1,37 +1,267 @@
+"""
+Connection pools: one primary plus zero or more read replicas.
+
+get_connection() always uses the primary and is what every write (and any
+read that must see the latest data) goes through. get_read_connection()
+serves read-only queries from a replica when one is fresh enough:
+
+- Replica lag is measured every DB_REPLICA_LAG_CHECK_SECONDS; a replica
+  that lags more than DB_REPLICA_MAX_LAG_SECONDS, or whose check fails,
+  gets no reads until it catches up.
+- Read-your-writes: after record_write(conn, key) (a user id or chat
+  session id), reads passing the same key stay on the primary until every
+  replica that may serve them has replayed the write. Reads only consult
+  an in-process copy of the markers, so routing a read never costs a
+  primary round trip: a process's own writes are added to it immediately,
+  and the lag monitor syncs it with the read_your_writes table on the
+  primary (migration 0008) on every check, so writes handled by other API
+  processes are honoured within DB_REPLICA_LAG_CHECK_SECONDS.
+
+Without DB_REPLICA_HOSTS every read goes to the primary.
+"""
 import asyncpg
 import asyncio
-from typing import Optional
+import itertools
+import logging
+import time
+from typing import Optional, Dict, Any, List
 from contextlib import asynccontextmanager
 from config import settings
+from Database.metrics import PoolMetrics
+from Database.json_codecs import register_json_codecs
+
+logger = logging.getLogger(__name__)
+
+# Replication delay of a standby; 0 on a server that is not in recovery
+# (e.g. a second local Postgres standing in for a replica)
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+RECORD_WRITE_QUERY = """
+    INSERT INTO read_your_writes (key, written_until)
+    SELECT key, now() + make_interval(secs => $2) FROM unnest($1::text[]) AS key
+    ON CONFLICT (key) DO UPDATE
+    SET written_until = GREATEST(read_your_writes.written_until, EXCLUDED.written_until)
+"""
+
+# Unexpired markers with the seconds they have left, after pruning expired ones
+WRITE_MARKERS_QUERY = """
+    WITH pruned AS (DELETE FROM read_your_writes WHERE written_until <= now())
+    SELECT key, EXTRACT(EPOCH FROM written_until - now())::float8 AS remaining
+    FROM read_your_writes
+    WHERE written_until > now()
+"""
+
+class Replica:
+    """A read replica's pool and its last measured lag"""
+    def __init__(self, host: str, port: int, pool: asyncpg.Pool):
+        self.host = host
+        self.port = port
+        self.pool = pool
+        self.lag_seconds: Optional[float] = None  # None until a check succeeds
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        """Lag within bounds, measured recently"""
+        return (
+            self.lag_seconds is not None
+            and self.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            and time.monotonic() - self.checked_at <= 3 * settings.DB_REPLICA_LAG_CHECK_SECONDS
+        )
+
+    def status(self) -> Dict[str, Any]:
+        size, idle = self.pool.get_size(), self.pool.get_idle_size()
+        return {
+            "host": f"{self.host}:{self.port}",
+            "available": self.available,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+        }
+
+def read_your_writes_window() -> float:
+    """Seconds a write keeps its key's reads on the primary"""
+    # At least as long as a replica that is still eligible for reads may lag behind
+    return max(settings.DB_READ_YOUR_WRITES_SECONDS,
+               settings.DB_REPLICA_MAX_LAG_SECONDS + settings.DB_REPLICA_LAG_CHECK_SECONDS)
+
+def pick_read_replica(replicas: List[Replica], recently_written: bool, turn: int) -> Optional[Replica]:
+    """
+    The replica to serve a read (round robin over the available ones, by
+    turn), or None for the primary: when there is none, or when the read's
+    keys were written within the read-your-writes window.
+    """
+    if recently_written:
+        return None
+    available = [replica for replica in replicas if replica.available]
+    if not available:
+        return None
+    return available[turn % len(available)]
 
 class Database:
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
-    
+        self.replicas: List[Replica] = []
+        self.metrics = PoolMetrics()
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self._replica_cycle = itertools.count()
+        self._lag_monitor: Optional[asyncio.Task] = None
+        self._write_markers: Dict[str, float] = {}  # key -> monotonic time until which reads stay on the primary
+
+    async def _open_pool(self, host: str, port: int) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            host=host,
+            port=port,
+            user=settings.PGUSER,
+            password=settings.PGPASSWORD,
+            database=settings.PGDATABASE,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            max_queries=settings.DB_POOL_MAX_QUERIES,  # Replace a connection after this many queries
+            max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_SECONDS,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            command_timeout=settings.DB_COMMAND_TIMEOUT_SECONDS,
+            init=self._init_connection,
+        )
+
     async def create_pool(self):
-        """Create connection pool with proper configuration"""
+        """Create the primary and replica pools, sized and timed out from config.Settings"""
         if not self.pool:
-            self.pool = await asyncpg.create_pool(
-                host=settings.PGHOST,
-                port=settings.PGPORT,
-                user=settings.PGUSER,
-                password=settings.PGPASSWORD,
-                database=settings.PGDATABASE,
-                min_size=2,  # Reduced from 5
-                max_size=10,  # Reduced from 20
-                max_queries=50000,  # Limit queries per connection
-                max_inactive_connection_lifetime=300,  # 5 minutes
-                command_timeout=30,  # 30 second timeout for commands
-            )
-            print(f"✅ Database pool created with {self.pool.get_size()} connections")
-    
+            self.pool = await self._open_pool(settings.PGHOST, settings.PGPORT)
+            print(f"✅ Database pool created with {self.pool.get_size()} connections "
+                  f"(min {settings.DB_POOL_MIN_SIZE}, max {settings.DB_POOL_MAX_SIZE})")
+
+            for host, port in settings.replica_hosts:
+                try:
+                    pool = await self._open_pool(host, port)
+                except Exception as e:
+                    # Reads fall back to the primary; the replica is retried on the next restart
+                    print(f"⚠️ Could not connect to read replica {host}:{port}: {e}")
+                    continue
+                self.replicas.append(Replica(host, port, pool))
+                print(f"✅ Read replica pool created for {host}:{port}")
+
+            if self.replicas:
+                await self._check_replica_lag()
+                await self._sync_write_markers()
+                self._lag_monitor = asyncio.create_task(self._monitor_replica_lag())
+
+    async def _init_connection(self, connection: asyncpg.Connection):
+        """Runs once for every new pooled connection"""
+        await register_json_codecs(connection)
+        connection.add_query_logger(self._record_query)
+
+    def _record_query(self, record):
+        """Query logger: duration histogram, error count and slow-query log with the SQL text"""
+        elapsed_ms = record.elapsed * 1000
+        self.metrics.query_duration.observe(elapsed_ms)
+        if record.exception is not None:
+            self.metrics.query_errors += 1
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+            self.metrics.slow_queries += 1
+            sql = " ".join(record.query.split())
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, sql[:2000])
+
+    async def _check_replica_lag(self):
+        for replica in self.replicas:
+            try:
+                async with replica.pool.acquire(timeout=settings.DB_ACQUIRE_TIMEOUT_SECONDS) as conn:
+                    lag = await conn.fetchval(REPLICA_LAG_QUERY, timeout=settings.DB_REPLICA_LAG_CHECK_SECONDS)
+                replica.lag_seconds = float(lag)
+                replica.checked_at = time.monotonic()
+                replica.last_error = None
+            except Exception as e:
+                replica.lag_seconds = None
+                replica.last_error = str(e)
+                logger.warning("Lag check of read replica %s:%d failed: %s", replica.host, replica.port, e)
+
+    async def _monitor_replica_lag(self):
+        while True:
+            await asyncio.sleep(settings.DB_REPLICA_LAG_CHECK_SECONDS)
+            await self._check_replica_lag()
+            await self._sync_write_markers()
+
+    async def _sync_write_markers(self):
+        """Replace the in-process markers with the shared ones (keeping newer local ones)"""
+        try:
+            async with self._acquire(self.pool) as conn:
+                rows = await conn.fetch(WRITE_MARKERS_QUERY)
+        except Exception as e:
+            logger.warning("Syncing read-your-writes markers failed: %s", e)
+            return
+        now = time.monotonic()
+        markers = {row['key']: now + row['remaining'] for row in rows}
+        for key, until in self._write_markers.items():
+            if until > max(now, markers.get(key, 0)):
+                markers[key] = until
+        self._write_markers = markers
+
+    async def record_write(self, conn: asyncpg.Connection, *keys: Optional[str]):
+        """
+        Note that the user / chat session identified by each key just wrote,
+        so that their reads stay on the primary until replicas have caught up.
+        Pass the primary connection the write went through.
+        """
+        keys = list(dict.fromkeys(key for key in keys if key))
+        if not settings.replica_hosts or not keys:
+            return
+        window = read_your_writes_window()
+        until = time.monotonic() + window
+        for key in keys:
+            self._write_markers[key] = until
+        await conn.execute(RECORD_WRITE_QUERY, keys, window)
+
+    def _recently_written(self, consistency_keys) -> bool:
+        """Whether any key has a read-your-writes marker that has not expired yet"""
+        now = time.monotonic()
+        return any(self._write_markers.get(key, 0) > now for key in consistency_keys if key)
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        """
+        Primary pool gauges (size / in use / idle), acquisition and query
+        metrics across all pools, and the state of each read replica
+        """
+        gauges = {"size": 0, "in_use": 0, "idle": 0}
+        if self.pool:
+            size, idle = self.pool.get_size(), self.pool.get_idle_size()
+            gauges = {"size": size, "in_use": size - idle, "idle": idle}
+        return {
+            "min_size": settings.DB_POOL_MIN_SIZE,
+            "max_size": settings.DB_POOL_MAX_SIZE,
+            **gauges,
+            **self.metrics.snapshot(),
+            "reads": {"primary": self.primary_reads, "replica": self.replica_reads},
+            "replicas": [replica.status() for replica in self.replicas],
+        }
+
     async def close_pool(self):
-        """Close connection pool with timeout"""
+        """Close the replica pools, then the primary pool, with timeouts"""
+        if self._lag_monitor:
+            self._lag_monitor.cancel()
+            self._lag_monitor = None
+        for replica in self.replicas:
+            try:
+                await asyncio.wait_for(replica.pool.close(), timeout=10.0)
+            except Exception as e:
+                print(f"⚠️ Error closing read replica pool {replica.host}:{replica.port}: {e}")
+                replica.pool.terminate()
+        self.replicas = []
+
         if self.pool:
             try:
                 # Check pool status before closing
                 self.check_pool_status()
-                
+
                 # Set a timeout for pool closure to prevent hanging
                 await asyncio.wait_for(self.pool.close(), timeout=10.0)
                 print("✅ Database pool closed successfully")
@@ -46,7 +276,7 @@ class Database:
                 print(f"⚠️ Error closing database pool: {e}")
             finally:
                 self.pool = None
-    
+
     def check_pool_status(self):
         """Check and log pool status for debugging"""
         if self.pool:
@@ -54,34 +284,74 @@ class Database:
                 size = self.pool.get_size()
                 idle = self.pool.get_idle_size()
                 print(f"📊 Pool status - Total: {size}, Idle: {idle}, Active: {size - idle}")
-                
+
                 if size - idle > 0:
                     print(f"⚠️ Warning: {size - idle} connections still active during shutdown")
             except Exception as e:
                 print(f"⚠️ Error checking pool status: {e}")
-    
+
     @asynccontextmanager
     async def get_connection(self):
-        """Get connection from pool as async context manager"""
+        """Get a primary connection from the pool as async context manager"""
         if not self.pool:
             await self.create_pool()
-        
-        connection = None
-        try:
-            connection = await asyncio.wait_for(self.pool.acquire(), timeout=10.0)
+
+        async with self._acquire(self.pool) as connection:
             yield connection
+
+    @asynccontextmanager
+    async def get_read_connection(self, *consistency_keys: Optional[str]):
+        """
+        Get a connection for read-only queries: a fresh replica when one is
+        available, otherwise the primary. Pass the user id / chat session id
+        the read is for, so that a client's own recent writes stay visible.
+        """
+        if not self.pool:
+            await self.create_pool()
+
+        recently_written = self._recently_written(consistency_keys)
+        replica = pick_read_replica(self.replicas, recently_written, next(self._replica_cycle))
+        if replica is None:
+            self.primary_reads += 1
+            pool = self.pool
+        else:
+            self.replica_reads += 1
+            pool = replica.pool
+
+        async with self._acquire(pool) as connection:
+            yield connection
+
+    @asynccontextmanager
+    async def _acquire(self, pool: asyncpg.Pool):
+        # Only the acquisition itself is timed and translated; errors raised
+        # while the caller uses the connection propagate unchanged
+        started = time.perf_counter()
+        self.metrics.waiting += 1
+        try:
+            try:
+                connection = await pool.acquire(timeout=settings.DB_ACQUIRE_TIMEOUT_SECONDS)
+            finally:
+                self.metrics.waiting -= 1
+                self.metrics.acquire_wait.observe((time.perf_counter() - started) * 1000)
         except asyncio.TimeoutError:
-            print("⚠️ Database connection acquisition timed out")
+            self.metrics.acquire_timeouts += 1
+            logger.warning(
+                "Database connection acquisition timed out after %.1fs (pool %d/%d in use, %d waiting)",
+                settings.DB_ACQUIRE_TIMEOUT_SECONDS, pool.get_size() - pool.get_idle_size(),
+                settings.DB_POOL_MAX_SIZE, self.metrics.waiting
+            )
             raise Exception("Database connection timeout")
         except Exception as e:
             print(f"⚠️ Database connection error: {e}")
             raise
+
+        try:
+            yield connection
         finally:
-            if connection:
-                try:
-                    await self.pool.release(connection)
-                except Exception as e:
-                    print(f"⚠️ Error releasing connection: {e}")
+            try:
+                await pool.release(connection)
+            except Exception as e:
+                print(f"⚠️ Error releasing connection: {e}")
 
 # Global database instance
-db = Database() 
\ No newline at end of file
+db = Database()
@@ -1,18 +0,0 @@
--- Create sessions table for storing chat sessions
-DROP TABLE IF EXISTS sessions;
-
-CREATE TABLE sessions (
-    id SERIAL PRIMARY KEY,
-    session_id VARCHAR(255) NOT NULL UNIQUE,
-    user_id VARCHAR(255) NOT NULL,
-    topic VARCHAR(255) DEFAULT 'New chat',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    is_active BOOLEAN DEFAULT TRUE,
-    FOREIGN KEY (user_id) REFERENCES users(user_id)
-);
-
--- Create indexes for better performance
-CREATE INDEX idx_sessions_user_id ON sessions(user_id);
-CREATE INDEX idx_sessions_session_id ON sessions(session_id);
-CREATE INDEX idx_sessions_created_at ON sessions(created_at DESC);
-CREATE INDEX idx_sessions_is_active ON sessions(is_active); 
\ No newline at end of file
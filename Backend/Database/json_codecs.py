@@ -0,0 +1,35 @@
+"""
+JSON / JSONB type codecs for asyncpg, backed by orjson.
+
+Registered on every pooled connection from the pool's init hook, so JSON
+columns arrive as Python objects and Python objects can be passed straight
+as query arguments: no json.dumps / json.loads in the routes. Both types use
+the binary wire format (jsonb is the JSON text behind a version byte).
+"""
+import orjson
+
+_JSONB_VERSION = b"\x01"
+# Accept non-string dict keys (json.dumps converts them to strings too)
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _encode_json(value) -> bytes:
+    return orjson.dumps(value, option=_DUMPS_OPTIONS)
+
+def _decode_json(data: bytes):
+    return orjson.loads(data)
+
+def _encode_jsonb(value) -> bytes:
+    return _JSONB_VERSION + orjson.dumps(value, option=_DUMPS_OPTIONS)
+
+def _decode_jsonb(data: bytes):
+    if data[:1] != _JSONB_VERSION:
+        raise ValueError(f"Unsupported jsonb format version: {data[:1]!r}")
+    return orjson.loads(memoryview(data)[1:])
+
+async def register_json_codecs(connection):
+    await connection.set_type_codec(
+        "json", schema="pg_catalog", encoder=_encode_json, decoder=_decode_json, format="binary"
+    )
+    await connection.set_type_codec(
+        "jsonb", schema="pg_catalog", encoder=_encode_jsonb, decoder=_decode_jsonb, format="binary"
+    )
@@ -0,0 +1,79 @@
+"""
+In-process metrics for the database pool: fixed-bucket latency histograms
+and counters, read through Database.pool_metrics() (served at /health/database).
+"""
+import threading
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus style), safe to update from any thread"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms):
+        with self._lock:
+            self.count += 1
+            self.total += value_ms
+            for index, bound in enumerate(self.buckets):
+                if value_ms <= bound:
+                    self.counts[index] += 1
+                    break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None when empty)"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return self.buckets[-1]
+
+    def snapshot(self):
+        p50, p95, p99 = self.quantile(0.5), self.quantile(0.95), self.quantile(0.99)
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {
+                "count": self.count,
+                "sum_ms": round(self.total, 3),
+                "avg_ms": round(self.total / self.count, 3) if self.count else None,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "buckets_ms": buckets,
+            }
+
+class PoolMetrics:
+    """Acquisition-wait and query-duration histograms plus counters for one pool"""
+
+    def __init__(self):
+        self.acquire_wait = Histogram()
+        self.query_duration = Histogram()
+        self.waiting = 0  # Callers currently waiting for a connection
+        self.acquire_timeouts = 0
+        self.query_errors = 0
+        self.slow_queries = 0
+
+    def snapshot(self):
+        return {
+            "waiting": self.waiting,
+            "acquire_timeouts": self.acquire_timeouts,
+            "query_errors": self.query_errors,
+            "slow_queries": self.slow_queries,
+            "acquire_wait": self.acquire_wait.snapshot(),
+            "query_duration": self.query_duration.snapshot(),
+        }
@@ -0,0 +1,199 @@
+"""
+Versioned schema migrations.
+
+Migrations are the numbered files in Database/migrations (NNNN_description.sql).
+Each pending one runs in its own transaction and is recorded in the
+schema_migrations table together with a checksum, so an edited migration
+that was already applied is reported instead of silently diverging.
+
+Run from the Backend directory:
+    python -m Database.migrate            # apply pending migrations
+    python -m Database.migrate --status   # list applied / pending migrations
+    python -m Database.migrate --check    # EXPLAIN the hot queries, fail on sequential scans
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from Database.connection import db
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+_MIGRATION_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_ADVISORY_LOCK_ID = 72_023_401  # Serializes concurrent migration runs
+
+# Queries on request paths that must be served by an index.
+# (name, SQL, sample arguments) - the arguments only need the right types.
+HOT_QUERIES = [
+    ("recent messages of a session",
+     "SELECT role, content, timestamp FROM messages WHERE session_id = $1 ORDER BY timestamp DESC LIMIT 10",
+     ("explain-check",)),
+    ("page of messages of a session",
+     "SELECT id, role, content, timestamp FROM messages WHERE session_id = $1 AND (timestamp, id) < ($2, $3) "
+     "ORDER BY timestamp DESC, id DESC LIMIT 51",
+     ("explain-check", datetime(2030, 1, 1), 1)),
+    ("page of active chat sessions of a user",
+     "SELECT id, session_id, user_id, title, topic, created_at, is_active FROM sessions "
+     "WHERE user_id = $1 AND is_active = true AND (created_at, id) < ($2, $3) ORDER BY created_at DESC, id DESC LIMIT 51",
+     ("explain-check", datetime(2030, 1, 1), 1)),
+    ("page of active study sessions of a user by type",
+     "SELECT id, name, created_at FROM study_sessions "
+     "WHERE user_id = $1 AND type = $2 AND is_active = true AND (created_at, id) < ($3, $4) "
+     "ORDER BY created_at DESC, id DESC LIMIT 51",
+     ("explain-check", "quiz", datetime(2030, 1, 1), 1)),
+    ("page of active study sessions of a user",
+     "SELECT id, name, created_at FROM study_sessions "
+     "WHERE user_id = $1 AND is_active = true AND (created_at, id) < ($2, $3) ORDER BY created_at DESC, id DESC LIMIT 51",
+     ("explain-check", datetime(2030, 1, 1), 1)),
+    ("results of a study session",
+     "SELECT * FROM session_results WHERE user_id = $1 AND study_session_id = $2 ORDER BY completed_at DESC LIMIT 5",
+     ("explain-check", 1)),
+    ("page of result history of a user by type",
+     "SELECT * FROM session_results WHERE user_id = $1 AND session_type = $2 AND (completed_at, id) < ($3, $4) "
+     "ORDER BY completed_at DESC, id DESC LIMIT 11",
+     ("explain-check", "quiz", datetime(2030, 1, 1), 1)),
+    ("recent results of a user",
+     "SELECT accuracy_percentage, completed_at, session_type FROM session_results "
+     "WHERE user_id = $1 ORDER BY completed_at DESC LIMIT 10",
+     ("explain-check",)),
+    ("profile stats of a user",
+     "SELECT * FROM user_stats WHERE user_id = $1",
+     ("explain-check",)),
+    ("earned achievements of a user",
+     "SELECT a.id, a.name, ua.earned_at FROM user_achievements ua JOIN achievements a ON a.id = ua.achievement_id "
+     "WHERE ua.user_id = $1",
+     ("explain-check",)),
+    ("user by email",
+     "SELECT user_id, email, username, created_at, is_active FROM users WHERE email = $1 AND is_active = true",
+     ("explain-check",)),
+]
+
+def discover_migrations():
+    """Return [(version, name, sql, checksum)] sorted by version"""
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = _MIGRATION_RE.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file name must look like NNNN_description.sql: {path.name}")
+        sql = path.read_text(encoding="utf-8")
+        migrations.append((int(match.group(1)), match.group(2), sql, hashlib.sha256(sql.encode()).hexdigest()))
+
+    versions = [version for version, _, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version numbers")
+    return migrations
+
+async def ensure_migrations_table(conn):
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+async def applied_migrations(conn):
+    rows = await conn.fetch("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row['version']: dict(row) for row in rows}
+
+async def migrate():
+    """Apply all pending migrations in version order. Returns the versions applied."""
+    migrations = discover_migrations()
+    applied_now = []
+
+    async with db.get_connection() as conn:
+        await conn.execute("SELECT pg_advisory_lock($1)", _ADVISORY_LOCK_ID)
+        try:
+            await ensure_migrations_table(conn)
+            applied = await applied_migrations(conn)
+
+            for version, name, sql, checksum in migrations:
+                if version in applied:
+                    if applied[version]['checksum'] != checksum:
+                        print(f"⚠️ Migration {version:04d}_{name} was changed after it was applied")
+                    continue
+
+                print(f"⏫ Applying migration {version:04d}_{name}")
+                async with conn.transaction():
+                    await conn.execute(sql)
+                    await conn.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                        version, name, checksum
+                    )
+                applied_now.append(version)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", _ADVISORY_LOCK_ID)
+
+    print(f"✅ Schema up to date ({len(applied_now)} migration(s) applied)")
+    return applied_now
+
+async def status():
+    """Print applied and pending migrations"""
+    async with db.get_connection() as conn:
+        await ensure_migrations_table(conn)
+        applied = await applied_migrations(conn)
+
+    for version, name, _, checksum in discover_migrations():
+        entry = applied.get(version)
+        if not entry:
+            state = "pending"
+        elif entry['checksum'] != checksum:
+            state = f"applied {entry['applied_at']:%Y-%m-%d %H:%M} (changed since!)"
+        else:
+            state = f"applied {entry['applied_at']:%Y-%m-%d %H:%M}"
+        print(f"{version:04d}_{name}: {state}")
+
+def _sequential_scans(plan):
+    """Relations read by Seq Scan nodes anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    scans = []
+    if plan.get("Node Type") == "Seq Scan":
+        scans.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        scans.extend(_sequential_scans(child))
+    return scans
+
+async def check_hot_queries():
+    """
+    EXPLAIN every hot query and return the ones that would scan a table
+    sequentially. Sequential scans are disabled for the check so that small
+    development tables still show whether a usable index exists.
+    """
+    failures = []
+    async with db.get_connection() as conn:
+        async with conn.transaction():
+            await conn.execute("SET LOCAL enable_seqscan = off")
+            for name, sql, args in HOT_QUERIES:
+                explained = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *args)
+                plan = (json.loads(explained) if isinstance(explained, str) else explained)[0]["Plan"]
+                scans = _sequential_scans(plan)
+                if scans:
+                    failures.append((name, scans))
+                    print(f"❌ {name}: sequential scan on {', '.join(scans)}")
+                else:
+                    print(f"✅ {name}")
+    return failures
+
+async def main(args):
+    await db.create_pool()
+    try:
+        if args.status:
+            await status()
+            return 0
+        if args.check:
+            return 1 if await check_hot_queries() else 0
+        await migrate()
+        return 0
+    finally:
+        await db.close_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--check", action="store_true", help="Fail if a hot query uses a sequential scan")
+    sys.exit(asyncio.run(main(parser.parse_args())))
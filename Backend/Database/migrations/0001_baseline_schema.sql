@@ -0,0 +1,147 @@
+-- Baseline schema: every table the backend uses, including users and messages,
+-- which previously had no DDL in the repository.
+-- Written with IF NOT EXISTS so it also applies cleanly to databases that were
+-- created from the old ad-hoc scripts.
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto; -- gen_random_uuid() before PostgreSQL 13
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id VARCHAR(255) PRIMARY KEY DEFAULT gen_random_uuid()::text,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    username VARCHAR(255) NOT NULL,
+    password_hash VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE
+);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS password_hash VARCHAR(255);
+
+-- Chat sessions
+CREATE TABLE IF NOT EXISTS sessions (
+    id SERIAL PRIMARY KEY,
+    session_id VARCHAR(255) NOT NULL UNIQUE,
+    user_id VARCHAR(255) NOT NULL REFERENCES users(user_id),
+    title VARCHAR(255),
+    topic VARCHAR(255) DEFAULT 'New chat',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE
+);
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS title VARCHAR(255);
+
+-- Chat messages of a session
+CREATE TABLE IF NOT EXISTS messages (
+    id BIGSERIAL PRIMARY KEY,
+    session_id VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Quiz and flashcard study sessions
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id SERIAL PRIMARY KEY,
+    session_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    type VARCHAR(20) NOT NULL CHECK (type IN ('quiz', 'flashnotes')),
+    name VARCHAR(255) NOT NULL,
+    content JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- Quiz and flashcard session results
+CREATE TABLE IF NOT EXISTS session_results (
+    id SERIAL PRIMARY KEY,
+    study_session_id INTEGER NOT NULL REFERENCES study_sessions(id),
+    user_id VARCHAR(255) NOT NULL,
+    session_type VARCHAR(20) NOT NULL CHECK (session_type IN ('quiz', 'flashnotes')),
+    session_name VARCHAR(255) NOT NULL,
+    total_questions INTEGER NOT NULL,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    incorrect_answers INTEGER NOT NULL DEFAULT 0,
+    skipped_answers INTEGER NOT NULL DEFAULT 0,
+    accuracy_percentage DECIMAL(5,2) NOT NULL DEFAULT 0.00,
+    time_spent_seconds INTEGER NOT NULL DEFAULT 0,
+    difficulty_breakdown JSONB, -- Store breakdown by difficulty level
+    detailed_results JSONB, -- Store individual question/card results
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Durable queue for PDF / YouTube ingestion
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    job_type VARCHAR(20) NOT NULL CHECK (job_type IN ('pdf', 'youtube')),
+    user_id VARCHAR(255) NOT NULL,
+    session_id VARCHAR(255) NOT NULL,
+    source_name VARCHAR(255),
+    source_url TEXT,
+    payload BYTEA, -- Raw upload bytes for PDF jobs
+    status VARCHAR(20) NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'running', 'succeeded', 'failed')),
+    stage VARCHAR(20) NOT NULL DEFAULT 'queued', -- queued / extract / embed / done
+    progress REAL NOT NULL DEFAULT 0.0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    last_error TEXT,
+    result JSONB,
+    run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(255),
+    heartbeat_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+-- Workers claim the oldest runnable job; keep that scan on a small partial index
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_claimable ON ingestion_jobs(run_after, id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_running ON ingestion_jobs(heartbeat_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_user_id ON ingestion_jobs(user_id, created_at DESC);
+
+-- One row per distinct ingested document / video
+-- Vectors for registered content live in the shared Pinecone namespace "__content_cache__"
+-- under ids "<content_key>#<chunk_id>" and are copied into each new user's namespace.
+CREATE TABLE IF NOT EXISTS content_registry (
+    content_key VARCHAR(100) PRIMARY KEY, -- 'sha256:<hex>' for uploads, 'youtube:<video_id>' for videos
+    source VARCHAR(20) NOT NULL CHECK (source IN ('pdf', 'youtube')),
+    source_name VARCHAR(255),
+    chunker_version VARCHAR(50) NOT NULL,
+    num_chunks INTEGER NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Index of extracted text files in the parsed-content store.
+-- Files live at parsed_files/<user_id>/<session_id>/<document_id>.txt
+CREATE TABLE IF NOT EXISTS parsed_documents (
+    id UUID PRIMARY KEY,
+    user_id VARCHAR(255) NOT NULL,
+    session_id VARCHAR(255) NOT NULL,
+    source VARCHAR(20) NOT NULL CHECK (source IN ('pdf', 'youtube')),
+    source_name VARCHAR(255),
+    source_url TEXT,
+    file_path TEXT NOT NULL,
+    content_hash VARCHAR(100) NOT NULL, -- 'sha256:<hex>' of the parsed file
+    size_bytes BIGINT NOT NULL,
+    state VARCHAR(20) NOT NULL DEFAULT 'pending'
+        CHECK (state IN ('pending', 'embedded', 'failed')),
+    num_chunks INTEGER,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    embedded_at TIMESTAMP
+);
+-- The same content is stored once per user session
+CREATE UNIQUE INDEX IF NOT EXISTS idx_parsed_documents_content ON parsed_documents(user_id, session_id, content_hash);
+-- /content_to_embeddings/ reads one session's documents (and their chunk manifests)
+CREATE INDEX IF NOT EXISTS idx_parsed_documents_session ON parsed_documents(user_id, session_id, created_at);
+
+-- What each parsed document was last chunked into.
+-- A document is re-chunked only when its content hash or the chunker key
+-- (chunker version + chunk_size/char_limit/overlap) changes.
+CREATE TABLE IF NOT EXISTS chunk_manifests (
+    document_id UUID PRIMARY KEY REFERENCES parsed_documents(id) ON DELETE CASCADE,
+    content_hash VARCHAR(100) NOT NULL,
+    chunker_key VARCHAR(100) NOT NULL,
+    vector_ids TEXT[] NOT NULL, -- Pinecone ids '<document_id>#<chunk_id>' in the user's namespace
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
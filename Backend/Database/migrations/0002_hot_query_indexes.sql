@@ -0,0 +1,39 @@
+-- Composite and partial indexes matching the hot queries (see Database/migrate.py HOT_QUERIES).
+-- The single-column indexes they replace are dropped: each is a prefix of a new
+-- index, duplicates a UNIQUE constraint, or (is_active) is too unselective to use.
+
+-- messages: WHERE session_id = $1 ORDER BY timestamp [DESC] LIMIT n
+CREATE INDEX IF NOT EXISTS idx_messages_session_timestamp ON messages(session_id, timestamp DESC);
+
+-- sessions: WHERE user_id = $1 AND is_active ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_sessions_user_active_created ON sessions(user_id, created_at DESC) WHERE is_active;
+DROP INDEX IF EXISTS idx_sessions_user_id;
+DROP INDEX IF EXISTS idx_sessions_session_id; -- Covered by the UNIQUE constraint on session_id
+DROP INDEX IF EXISTS idx_sessions_created_at;
+DROP INDEX IF EXISTS idx_sessions_is_active;
+
+-- study_sessions: WHERE user_id = $1 AND type = $2 AND is_active ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_type_active_created
+    ON study_sessions(user_id, type, created_at DESC) WHERE is_active;
+-- study_sessions: WHERE user_id = $1 AND is_active ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_active_created
+    ON study_sessions(user_id, created_at DESC) WHERE is_active;
+DROP INDEX IF EXISTS idx_study_sessions_user_id;
+DROP INDEX IF EXISTS idx_study_sessions_type;
+DROP INDEX IF EXISTS idx_study_sessions_created_at;
+
+-- session_results: WHERE user_id = $1 AND study_session_id = $2 ORDER BY completed_at DESC
+CREATE INDEX IF NOT EXISTS idx_session_results_user_study_completed
+    ON session_results(user_id, study_session_id, completed_at DESC);
+-- session_results: WHERE user_id = $1 AND session_type = $2 ORDER BY completed_at DESC
+CREATE INDEX IF NOT EXISTS idx_session_results_user_type_completed
+    ON session_results(user_id, session_type, completed_at DESC);
+-- session_results: WHERE user_id = $1 ORDER BY completed_at DESC (recent activity, stats)
+CREATE INDEX IF NOT EXISTS idx_session_results_user_completed
+    ON session_results(user_id, completed_at DESC);
+-- Foreign key lookups from study_sessions
+CREATE INDEX IF NOT EXISTS idx_session_results_study_session_id ON session_results(study_session_id);
+DROP INDEX IF EXISTS idx_session_results_user_id;
+DROP INDEX IF EXISTS idx_session_results_session_type;
+DROP INDEX IF EXISTS idx_session_results_completed_at;
+DROP INDEX IF EXISTS idx_session_results_accuracy;
@@ -0,0 +1,22 @@
+-- Keyset pagination orders list endpoints by (timestamp, id); add id as the
+-- tiebreaker column so each page is a single ordered index range scan.
+
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS id BIGSERIAL;
+
+CREATE INDEX IF NOT EXISTS idx_messages_session_timestamp_id ON messages(session_id, timestamp DESC, id DESC);
+DROP INDEX IF EXISTS idx_messages_session_timestamp;
+
+CREATE INDEX IF NOT EXISTS idx_sessions_user_active_created_id
+    ON sessions(user_id, created_at DESC, id DESC) WHERE is_active;
+DROP INDEX IF EXISTS idx_sessions_user_active_created;
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_type_active_created_id
+    ON study_sessions(user_id, type, created_at DESC, id DESC) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_active_created_id
+    ON study_sessions(user_id, created_at DESC, id DESC) WHERE is_active;
+DROP INDEX IF EXISTS idx_study_sessions_user_type_active_created;
+DROP INDEX IF EXISTS idx_study_sessions_user_active_created;
+
+CREATE INDEX IF NOT EXISTS idx_session_results_user_type_completed_id
+    ON session_results(user_id, session_type, completed_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_session_results_user_type_completed;
@@ -0,0 +1,242 @@
+-- Per-user statistics for the profile page, kept up to date by triggers in the
+-- same transaction as the write that changes them, so reading a profile is a
+-- primary-key lookup instead of aggregates over the user's whole history.
+--
+-- chats_started  - active chat sessions
+-- quiz_sessions  - distinct chat sessions with an active quiz
+-- study_sessions - distinct chat sessions with any active study session
+-- results_*      - sums / counts over session_results (avg = accuracy_sum / results_count)
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id VARCHAR(255) PRIMARY KEY,
+    chats_started INTEGER NOT NULL DEFAULT 0,
+    quiz_sessions INTEGER NOT NULL DEFAULT 0,
+    study_sessions INTEGER NOT NULL DEFAULT 0,
+    results_count INTEGER NOT NULL DEFAULT 0,
+    quiz_results INTEGER NOT NULL DEFAULT 0,
+    flashnote_results INTEGER NOT NULL DEFAULT 0,
+    excellent_results INTEGER NOT NULL DEFAULT 0, -- accuracy_percentage >= 90
+    accuracy_sum NUMERIC NOT NULL DEFAULT 0,
+    best_accuracy DECIMAL(5,2),
+    total_time_seconds BIGINT NOT NULL DEFAULT 0,
+    total_questions BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Distinct-session checks in the study_sessions trigger
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_session_active
+    ON study_sessions(user_id, session_id, type) WHERE is_active;
+
+-- Create the user's stats row if needed and lock it. Writes for the same user
+-- are serialized here, so the distinct-session checks that follow see every
+-- committed row.
+CREATE OR REPLACE FUNCTION user_stats_lock(p_user_id VARCHAR) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO user_stats (user_id) VALUES (p_user_id) ON CONFLICT (user_id) DO NOTHING;
+    PERFORM 1 FROM user_stats WHERE user_id = p_user_id FOR UPDATE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute the session_results part of a user's stats (updates and deletes of
+-- results are rare; inserts are applied incrementally)
+CREATE OR REPLACE FUNCTION user_stats_recompute_results(p_user_id VARCHAR) RETURNS VOID AS $$
+BEGIN
+    PERFORM user_stats_lock(p_user_id);
+    UPDATE user_stats s SET
+        results_count = r.results_count,
+        quiz_results = r.quiz_results,
+        flashnote_results = r.flashnote_results,
+        excellent_results = r.excellent_results,
+        accuracy_sum = r.accuracy_sum,
+        best_accuracy = r.best_accuracy,
+        total_time_seconds = r.total_time_seconds,
+        total_questions = r.total_questions,
+        updated_at = CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            COUNT(*) AS results_count,
+            COUNT(*) FILTER (WHERE session_type = 'quiz') AS quiz_results,
+            COUNT(*) FILTER (WHERE session_type = 'flashnotes') AS flashnote_results,
+            COUNT(*) FILTER (WHERE accuracy_percentage >= 90) AS excellent_results,
+            COALESCE(SUM(accuracy_percentage), 0) AS accuracy_sum,
+            MAX(accuracy_percentage) AS best_accuracy,
+            COALESCE(SUM(time_spent_seconds), 0) AS total_time_seconds,
+            COALESCE(SUM(total_questions), 0) AS total_questions
+        FROM session_results
+        WHERE user_id = p_user_id
+    ) r
+    WHERE s.user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_stats_on_session_result() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM user_stats_lock(NEW.user_id);
+        UPDATE user_stats SET
+            results_count = results_count + 1,
+            quiz_results = quiz_results + (NEW.session_type = 'quiz')::int,
+            flashnote_results = flashnote_results + (NEW.session_type = 'flashnotes')::int,
+            excellent_results = excellent_results + (NEW.accuracy_percentage >= 90)::int,
+            accuracy_sum = accuracy_sum + NEW.accuracy_percentage,
+            best_accuracy = GREATEST(best_accuracy, NEW.accuracy_percentage),
+            total_time_seconds = total_time_seconds + NEW.time_spent_seconds,
+            total_questions = total_questions + NEW.total_questions,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = NEW.user_id;
+        RETURN NULL;
+    END IF;
+
+    PERFORM user_stats_recompute_results(OLD.user_id);
+    IF TG_OP = 'UPDATE' AND NEW.user_id <> OLD.user_id THEN
+        PERFORM user_stats_recompute_results(NEW.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Chat sessions: count active rows (session_id is unique)
+CREATE OR REPLACE FUNCTION user_stats_on_session() RETURNS TRIGGER AS $$
+DECLARE
+    old_active INTEGER := 0;
+    new_active INTEGER := 0;
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.is_active THEN
+        old_active := 1;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.is_active THEN
+        new_active := 1;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.user_id <> OLD.user_id THEN
+        PERFORM user_stats_lock(OLD.user_id);
+        UPDATE user_stats SET chats_started = chats_started - old_active, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = OLD.user_id;
+        old_active := 0;
+    END IF;
+
+    IF new_active <> old_active THEN
+        PERFORM user_stats_lock(COALESCE(NEW.user_id, OLD.user_id));
+        UPDATE user_stats SET chats_started = chats_started + new_active - old_active, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = COALESCE(NEW.user_id, OLD.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply one study session entering (+1) or leaving (-1) the active set.
+-- The counters are per distinct chat session, so they only move when the
+-- row was the first / last active one of its group. Runs AFTER the write.
+CREATE OR REPLACE FUNCTION user_stats_apply_study_session(
+    p_id INTEGER, p_user_id VARCHAR, p_session_id VARCHAR, p_type VARCHAR, p_delta INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    quiz_delta INTEGER := 0;
+    study_delta INTEGER := 0;
+BEGIN
+    PERFORM user_stats_lock(p_user_id);
+
+    IF NOT EXISTS (
+        SELECT 1 FROM study_sessions
+        WHERE user_id = p_user_id AND session_id = p_session_id AND is_active AND id <> p_id
+    ) THEN
+        study_delta := p_delta;
+    END IF;
+
+    IF p_type = 'quiz' AND NOT EXISTS (
+        SELECT 1 FROM study_sessions
+        WHERE user_id = p_user_id AND session_id = p_session_id AND type = 'quiz' AND is_active AND id <> p_id
+    ) THEN
+        quiz_delta := p_delta;
+    END IF;
+
+    IF quiz_delta <> 0 OR study_delta <> 0 THEN
+        UPDATE user_stats SET
+            quiz_sessions = quiz_sessions + quiz_delta,
+            study_sessions = study_sessions + study_delta,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = p_user_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_stats_on_study_session() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.is_active IS NOT DISTINCT FROM OLD.is_active
+       AND NEW.user_id = OLD.user_id AND NEW.session_id = OLD.session_id AND NEW.type = OLD.type THEN
+        RETURN NULL; -- Content / name edits do not change the stats
+    END IF;
+
+    IF TG_OP <> 'INSERT' AND OLD.is_active THEN
+        PERFORM user_stats_apply_study_session(OLD.id, OLD.user_id, OLD.session_id, OLD.type, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.is_active THEN
+        PERFORM user_stats_apply_study_session(NEW.id, NEW.user_id, NEW.session_id, NEW.type, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_user_stats_session_results ON session_results;
+CREATE TRIGGER trg_user_stats_session_results
+    AFTER INSERT OR UPDATE OR DELETE ON session_results
+    FOR EACH ROW EXECUTE FUNCTION user_stats_on_session_result();
+
+DROP TRIGGER IF EXISTS trg_user_stats_sessions ON sessions;
+CREATE TRIGGER trg_user_stats_sessions
+    AFTER INSERT OR UPDATE OF is_active, user_id OR DELETE ON sessions
+    FOR EACH ROW EXECUTE FUNCTION user_stats_on_session();
+
+DROP TRIGGER IF EXISTS trg_user_stats_study_sessions ON study_sessions;
+CREATE TRIGGER trg_user_stats_study_sessions
+    AFTER INSERT OR UPDATE OF is_active, user_id, session_id, type OR DELETE ON study_sessions
+    FOR EACH ROW EXECUTE FUNCTION user_stats_on_study_session();
+
+-- Backfill from existing history (the migration runs in one transaction with the triggers)
+INSERT INTO user_stats (
+    user_id, chats_started, quiz_sessions, study_sessions,
+    results_count, quiz_results, flashnote_results, excellent_results,
+    accuracy_sum, best_accuracy, total_time_seconds, total_questions
+)
+SELECT
+    u.user_id,
+    COALESCE(c.chats_started, 0),
+    COALESCE(ss.quiz_sessions, 0),
+    COALESCE(ss.study_sessions, 0),
+    COALESCE(r.results_count, 0),
+    COALESCE(r.quiz_results, 0),
+    COALESCE(r.flashnote_results, 0),
+    COALESCE(r.excellent_results, 0),
+    COALESCE(r.accuracy_sum, 0),
+    r.best_accuracy,
+    COALESCE(r.total_time_seconds, 0),
+    COALESCE(r.total_questions, 0)
+FROM (
+    SELECT user_id FROM sessions
+    UNION SELECT user_id FROM study_sessions
+    UNION SELECT user_id FROM session_results
+) u
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS chats_started
+    FROM sessions WHERE is_active GROUP BY user_id
+) c ON c.user_id = u.user_id
+LEFT JOIN (
+    SELECT user_id,
+           COUNT(DISTINCT session_id) FILTER (WHERE type = 'quiz') AS quiz_sessions,
+           COUNT(DISTINCT session_id) AS study_sessions
+    FROM study_sessions WHERE is_active GROUP BY user_id
+) ss ON ss.user_id = u.user_id
+LEFT JOIN (
+    SELECT user_id,
+           COUNT(*) AS results_count,
+           COUNT(*) FILTER (WHERE session_type = 'quiz') AS quiz_results,
+           COUNT(*) FILTER (WHERE session_type = 'flashnotes') AS flashnote_results,
+           COUNT(*) FILTER (WHERE accuracy_percentage >= 90) AS excellent_results,
+           SUM(accuracy_percentage) AS accuracy_sum,
+           MAX(accuracy_percentage) AS best_accuracy,
+           SUM(time_spent_seconds) AS total_time_seconds,
+           SUM(total_questions) AS total_questions
+    FROM session_results GROUP BY user_id
+) r ON r.user_id = u.user_id
+ON CONFLICT (user_id) DO NOTHING;
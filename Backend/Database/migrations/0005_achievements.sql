@@ -0,0 +1,107 @@
+-- Achievements as declarative rules, earned incrementally and persisted.
+--
+-- A rule is a row in `achievements`: it is earned once the user_stats column
+-- `stat` reaches `threshold`. Whenever a user_stats row changes (see
+-- 0004_user_stats_rollup.sql), only the rules on the columns that changed are
+-- evaluated, and newly earned ones are stored in user_achievements with the
+-- time of the write that earned them. Achievements are never revoked.
+
+CREATE TABLE IF NOT EXISTS achievements (
+    id VARCHAR(50) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    icon VARCHAR(50) NOT NULL,
+    color VARCHAR(50) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    stat VARCHAR(50) NOT NULL, -- user_stats column the rule watches
+    threshold INTEGER NOT NULL,
+    sort_order INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_achievements_stat ON achievements(stat);
+
+CREATE TABLE IF NOT EXISTS user_achievements (
+    user_id VARCHAR(255) NOT NULL,
+    achievement_id VARCHAR(50) NOT NULL REFERENCES achievements(id),
+    earned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, achievement_id)
+);
+
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS achievements_count INTEGER NOT NULL DEFAULT 0;
+
+INSERT INTO achievements (id, name, description, icon, color, category, stat, threshold, sort_order) VALUES
+    ('first_quiz', 'First Quiz Master', 'Completed your first quiz', 'Target', 'text-green-500', 'quiz', 'quiz_results', 1, 1),
+    ('chat_enthusiast', 'Chat Enthusiast', 'Started 5 chat sessions', 'Zap', 'text-blue-500', 'chat', 'chats_started', 5, 2),
+    ('study_streak', 'Study Streak', 'Completed 3 study sessions', 'BookOpen', 'text-purple-500', 'study', 'results_count', 3, 3),
+    ('perfectionist', 'Perfectionist', 'Achieved 90%+ accuracy', 'Award', 'text-yellow-500', 'performance', 'excellent_results', 1, 4),
+    ('flashcard_master', 'Flashcard Master', 'Completed flashcard session', 'Brain', 'text-pink-500', 'flashcards', 'flashnote_results', 1, 5)
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name, description = EXCLUDED.description, icon = EXCLUDED.icon, color = EXCLUDED.color,
+    category = EXCLUDED.category, stat = EXCLUDED.stat, threshold = EXCLUDED.threshold, sort_order = EXCLUDED.sort_order;
+
+CREATE OR REPLACE FUNCTION user_stats_award_achievements() RETURNS TRIGGER AS $$
+DECLARE
+    new_stats JSONB := to_jsonb(NEW);
+    old_stats JSONB := to_jsonb(OLD);
+    changed TEXT[];
+    awarded INTEGER;
+BEGIN
+    SELECT array_agg(key) INTO changed
+    FROM jsonb_each(new_stats)
+    WHERE value IS DISTINCT FROM old_stats -> key;
+
+    IF changed IS NULL THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO user_achievements (user_id, achievement_id, earned_at)
+    SELECT NEW.user_id, a.id, CURRENT_TIMESTAMP
+    FROM achievements a
+    WHERE a.stat = ANY(changed)
+      AND (new_stats ->> a.stat)::NUMERIC >= a.threshold
+    ON CONFLICT (user_id, achievement_id) DO NOTHING;
+
+    GET DIAGNOSTICS awarded = ROW_COUNT;
+    NEW.achievements_count := NEW.achievements_count + awarded;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_user_stats_achievements ON user_stats;
+CREATE TRIGGER trg_user_stats_achievements
+    BEFORE UPDATE ON user_stats
+    FOR EACH ROW EXECUTE FUNCTION user_stats_award_achievements();
+
+-- Backfill: a counter rule was earned when its threshold-th counted event
+-- happened, e.g. the completed_at of a user's 3rd result for study_streak.
+WITH stat_events AS (
+    SELECT user_id, 'results_count' AS stat, completed_at AS occurred_at FROM session_results
+    UNION ALL
+    SELECT user_id, 'quiz_results', completed_at FROM session_results WHERE session_type = 'quiz'
+    UNION ALL
+    SELECT user_id, 'flashnote_results', completed_at FROM session_results WHERE session_type = 'flashnotes'
+    UNION ALL
+    SELECT user_id, 'excellent_results', completed_at FROM session_results WHERE accuracy_percentage >= 90
+    UNION ALL
+    SELECT user_id, 'chats_started', created_at FROM sessions WHERE is_active
+),
+numbered AS (
+    SELECT user_id, stat, occurred_at,
+           ROW_NUMBER() OVER (PARTITION BY user_id, stat ORDER BY occurred_at) AS n
+    FROM stat_events
+)
+INSERT INTO user_achievements (user_id, achievement_id, earned_at)
+SELECT numbered.user_id, a.id, COALESCE(numbered.occurred_at, CURRENT_TIMESTAMP)
+FROM achievements a
+JOIN numbered ON numbered.stat = a.stat AND numbered.n = a.threshold
+ON CONFLICT (user_id, achievement_id) DO NOTHING;
+
+-- Rules on other stats that are already met are stamped with the migration time
+INSERT INTO user_achievements (user_id, achievement_id)
+SELECT s.user_id, a.id
+FROM user_stats s
+JOIN achievements a ON (to_jsonb(s) ->> a.stat)::NUMERIC >= a.threshold
+ON CONFLICT (user_id, achievement_id) DO NOTHING;
+
+UPDATE user_stats s SET achievements_count = e.earned
+FROM (SELECT user_id, COUNT(*) AS earned FROM user_achievements GROUP BY user_id) e
+WHERE s.user_id = e.user_id;
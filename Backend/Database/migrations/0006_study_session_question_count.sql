@@ -0,0 +1,17 @@
+-- Number of questions / cards in a study session, computed on write so that
+-- list endpoints can show it without reading the content JSONB.
+-- Quiz content is an array of questions; flashnotes content is an array or an
+-- object holding a "flashcards" (or legacy "notes" / "questions") array.
+
+ALTER TABLE study_sessions ADD COLUMN IF NOT EXISTS question_count INTEGER GENERATED ALWAYS AS (
+    CASE jsonb_typeof(content)
+        WHEN 'array' THEN jsonb_array_length(content)
+        WHEN 'object' THEN COALESCE(
+            CASE WHEN jsonb_typeof(content -> 'flashcards') = 'array' THEN jsonb_array_length(content -> 'flashcards') END,
+            CASE WHEN jsonb_typeof(content -> 'notes') = 'array' THEN jsonb_array_length(content -> 'notes') END,
+            CASE WHEN jsonb_typeof(content -> 'questions') = 'array' THEN jsonb_array_length(content -> 'questions') END,
+            0
+        )
+        ELSE 0
+    END
+) STORED;
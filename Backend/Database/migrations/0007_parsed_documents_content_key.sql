@@ -0,0 +1,17 @@
+-- Content registry lookups for the synchronous ingestion path.
+--
+-- /process_pdf/ and /process_youtube_video/ record the registry key of what
+-- they parsed ('sha256:<hex>' of the uploaded bytes, 'youtube:<video_id>'), so
+-- /content_to_embeddings/ can copy cached vectors for content that was already
+-- embedded instead of embedding it again. Documents parsed before this
+-- migration have no key and are always embedded.
+
+ALTER TABLE parsed_documents ADD COLUMN IF NOT EXISTS content_key VARCHAR(100);
+
+-- Registry entries are now keyed by the full chunker key (version plus
+-- chunk_size / char_limit / overlap) that both ingestion paths share.
+-- Existing entries were all produced by the worker with the default settings.
+ALTER TABLE content_registry ALTER COLUMN chunker_version TYPE VARCHAR(100);
+UPDATE content_registry
+SET chunker_version = chunker_version || ':400:2000:40'
+WHERE chunker_version NOT LIKE '%:%';
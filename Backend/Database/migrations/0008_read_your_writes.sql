@@ -0,0 +1,10 @@
+-- Read-your-writes markers shared by every API process (see Database/connection.py).
+-- A row means reads for `key` (a user id or chat session id) stay on the
+-- primary until written_until. Only ever read and written on the primary;
+-- UNLOGGED because losing the markers in a crash merely sends a few reads to
+-- a replica early. Expired rows are pruned by the replica lag monitor.
+
+CREATE UNLOGGED TABLE IF NOT EXISTS read_your_writes (
+    key VARCHAR(255) PRIMARY KEY,
+    written_until TIMESTAMPTZ NOT NULL
+);
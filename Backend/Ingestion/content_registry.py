@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+from typing import Optional, Dict, Any, Callable
+from Database.connection import db
+from Processing.store_embeddings import copy_cached_embeddings
+
+def content_key_for_bytes(data: bytes) -> str:
+    """Registry key for an uploaded file: SHA-256 of its bytes"""
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+def content_key_for_video(video_id: str) -> str:
+    """Registry key for a YouTube video"""
+    return f"youtube:{video_id}"
+
+class ContentRegistryDB:
+    """
+    Registry of content that has already been extracted, chunked and embedded.
+    Lets ingestion reuse vectors for duplicate uploads instead of recomputing them.
+    """
+
+    @staticmethod
+    async def get(content_key: str, chunker_version: str) -> Optional[Dict[str, Any]]:
+        """Get a registry entry, only if it was produced by the current chunker"""
+        async with db.get_connection() as conn:
+            entry = await conn.fetchrow(
+                """
+                SELECT content_key, source, source_name, chunker_version, num_chunks, use_count, created_at
+                FROM content_registry
+                WHERE content_key = $1 AND chunker_version = $2
+                """,
+                content_key, chunker_version
+            )
+        return dict(entry) if entry else None
+
+    @staticmethod
+    async def register(content_key: str, source: str, source_name: Optional[str], chunker_version: str, num_chunks: int):
+        """Record (or refresh) processed content after its vectors were cached"""
+        async with db.get_connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO content_registry (content_key, source, source_name, chunker_version, num_chunks)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (content_key) DO UPDATE
+                SET chunker_version = EXCLUDED.chunker_version, num_chunks = EXCLUDED.num_chunks,
+                    last_used_at = NOW()
+                """,
+                content_key, source, source_name, chunker_version, num_chunks
+            )
+
+    @staticmethod
+    async def touch(content_key: str):
+        """Record a reuse of registered content"""
+        async with db.get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE content_registry
+                SET use_count = use_count + 1, last_used_at = NOW()
+                WHERE content_key = $1
+                """,
+                content_key
+            )
+
+async def reuse_registered_content(content_key: Optional[str], chunker_version: str, user_id: str, session_id: str,
+                                   metadata_overrides: Optional[Dict[str, Any]] = None,
+                                   vector_id: Optional[Callable[[int], str]] = None) -> Optional[int]:
+    """
+    Shared by every ingestion path (worker jobs and /content_to_embeddings/):
+    if the content was already chunked with the same chunker settings and its
+    vectors are cached, copy them into the user's session instead of
+    extracting and embedding it again.
+
+    Returns the number of chunks copied, or None when the content has to be
+    ingested (not registered, or its cache is incomplete). Content ingested
+    afterwards should be recorded with ContentRegistryDB.register.
+    """
+    if not content_key:
+        return None
+    cached = await ContentRegistryDB.get(content_key, chunker_version)
+    if not cached:
+        return None
+
+    copied = await asyncio.to_thread(
+        copy_cached_embeddings, content_key, cached['num_chunks'], user_id, session_id, metadata_overrides,
+        vector_id=vector_id
+    )
+    if copied != cached['num_chunks']:
+        print(f"⚠️ Content cache incomplete for {content_key} ({copied}/{cached['num_chunks']}), re-ingesting")
+        return None
+    await ContentRegistryDB.touch(content_key)
+    return copied
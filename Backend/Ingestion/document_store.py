@@ -0,0 +1,164 @@
+"""
+Parsed-content store.
+
+Extracted text is written to parsed_files/<user_id>/<session_id>/<document_id>.txt
+(same '### KEY: value' header format as before) and indexed in the
+parsed_documents table with its source, content hash, size and ingestion
+state. Embedding reads only one session's documents instead of scanning
+every parsed file in the deployment, and the chunk_manifests table records
+what each document was chunked into so unchanged documents are skipped.
+"""
+import hashlib
+import os
+import re
+import uuid
+from typing import Optional, Dict, Any, List
+from Database.connection import db
+
+PARSED_FILES_ROOT = "parsed_files"
+
+# Partition for content ingested without an owner (legacy callers)
+ANONYMOUS_USER = "anonymous"
+DEFAULT_SESSION = "default"
+
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+def _partition_name(value: Optional[str], default: str) -> str:
+    """Make a user/session id safe to use as a directory name"""
+    name = _UNSAFE_PATH_CHARS.sub("_", value or default).strip(".")
+    return name or default
+
+def new_document_path(user_id: Optional[str], session_id: Optional[str]):
+    """Allocate a document id and its file path in the user's session partition"""
+    document_id = str(uuid.uuid4())
+    directory = os.path.join(
+        PARSED_FILES_ROOT, _partition_name(user_id, ANONYMOUS_USER), _partition_name(session_id, DEFAULT_SESSION)
+    )
+    os.makedirs(directory, exist_ok=True)
+    return document_id, os.path.join(directory, f"{document_id}.txt")
+
+def file_digest(file_path: str, block_size: int = 1024 * 1024):
+    """Return (size_bytes, 'sha256:<hex>') of a file, read in blocks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+            size += len(block)
+    return size, f"sha256:{digest.hexdigest()}"
+
+DOCUMENT_COLUMNS = """
+    id, user_id, session_id, source, source_name, source_url, file_path, content_hash,
+    content_key, size_bytes, state, num_chunks, last_error, created_at, updated_at, embedded_at
+"""
+
+class ParsedDocumentDB:
+    """Index of parsed documents and their ingestion state"""
+
+    @staticmethod
+    async def register(document_id: str, user_id: Optional[str], session_id: Optional[str], source: str, file_path: str,
+                       source_name: Optional[str] = None, source_url: Optional[str] = None,
+                       content_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Index a freshly written parsed file as pending.
+        content_key is the content registry key of the source it was parsed from.
+        If the session already holds identical content, the existing entry is
+        returned and the new file is removed, so it is not embedded twice.
+        """
+        user_id, session_id = user_id or ANONYMOUS_USER, session_id or DEFAULT_SESSION
+        size_bytes, content_hash = file_digest(file_path)
+        async with db.get_connection() as conn:
+            document = await conn.fetchrow(
+                f"""
+                INSERT INTO parsed_documents
+                    (id, user_id, session_id, source, source_name, source_url, file_path, content_hash, size_bytes,
+                     content_key)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                ON CONFLICT (user_id, session_id, content_hash) DO NOTHING
+                RETURNING {DOCUMENT_COLUMNS}
+                """,
+                uuid.UUID(document_id), user_id, session_id, source, source_name, source_url,
+                file_path, content_hash, size_bytes, content_key
+            )
+            if document is None:
+                document = await conn.fetchrow(
+                    f"""
+                    SELECT {DOCUMENT_COLUMNS} FROM parsed_documents
+                    WHERE user_id = $1 AND session_id = $2 AND content_hash = $3
+                    """,
+                    user_id, session_id, content_hash
+                )
+
+        if str(document['id']) != document_id:
+            print(f"ℹ️ Duplicate content in session {session_id}, keeping document {document['id']}")
+            os.remove(file_path)
+        return dict(document)
+
+    @staticmethod
+    async def list_for_chunking(user_id: str, session_id: str, chunker_key: str) -> List[Dict[str, Any]]:
+        """
+        All usable documents of one user session, oldest first, each with
+        needs_chunking (no manifest for its current content hash and chunker
+        key) and the previous_vector_ids recorded in its manifest.
+        """
+        columns = ", ".join(f"d.{column.strip()}" for column in DOCUMENT_COLUMNS.split(","))
+        async with db.get_connection() as conn:
+            documents = await conn.fetch(
+                f"""
+                SELECT {columns},
+                       m.document_id IS NULL OR m.content_hash <> d.content_hash OR m.chunker_key <> $3
+                           AS needs_chunking,
+                       COALESCE(m.vector_ids, ARRAY[]::TEXT[]) AS previous_vector_ids
+                FROM parsed_documents d
+                LEFT JOIN chunk_manifests m ON m.document_id = d.id
+                WHERE d.user_id = $1 AND d.session_id = $2 AND d.state <> 'failed'
+                ORDER BY d.created_at
+                """,
+                user_id, session_id, chunker_key
+            )
+        return [dict(document) for document in documents]
+
+    @staticmethod
+    async def mark_embedded(documents: List[Dict[str, Any]], chunker_key: str, vector_ids: Dict[Any, List[str]]):
+        """
+        Mark documents embedded and record their chunk manifests, in one transaction.
+        vector_ids maps document id -> vector ids of the chunks that were stored.
+        """
+        if not documents:
+            return
+        async with db.get_connection() as conn:
+            async with conn.transaction():
+                await conn.executemany(
+                    """
+                    UPDATE parsed_documents
+                    SET state = 'embedded', num_chunks = $2, last_error = NULL,
+                        embedded_at = NOW(), updated_at = NOW()
+                    WHERE id = $1
+                    """,
+                    [(document['id'], len(vector_ids.get(document['id'], []))) for document in documents]
+                )
+                await conn.executemany(
+                    """
+                    INSERT INTO chunk_manifests (document_id, content_hash, chunker_key, vector_ids)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (document_id) DO UPDATE
+                    SET content_hash = EXCLUDED.content_hash, chunker_key = EXCLUDED.chunker_key,
+                        vector_ids = EXCLUDED.vector_ids, updated_at = NOW()
+                    """,
+                    [
+                        (document['id'], document['content_hash'], chunker_key, vector_ids.get(document['id'], []))
+                        for document in documents
+                    ]
+                )
+
+    @staticmethod
+    async def mark_failed(document_id, error: str):
+        async with db.get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE parsed_documents
+                SET state = 'failed', last_error = $2, updated_at = NOW()
+                WHERE id = $1
+                """,
+                document_id, error
+            )
@@ -0,0 +1,153 @@
+from typing import Optional, Dict, Any
+from Database.connection import db
+from config import settings
+
+# Columns returned to API callers (never the raw upload payload)
+JOB_COLUMNS = """
+    id, job_type, user_id, session_id, source_name, source_url, status, stage,
+    progress, attempts, max_attempts, last_error, result, run_after,
+    created_at, updated_at, finished_at
+"""
+
+class IngestionJobDB:
+    """
+    Durable ingestion queue backed by the ingestion_jobs table.
+    Workers claim jobs with FOR UPDATE SKIP LOCKED so any number of
+    worker processes can pull from the same table without double-processing.
+    """
+
+    @staticmethod
+    async def enqueue(job_type: str, user_id: str, session_id: str, source_name: Optional[str] = None,
+                      source_url: Optional[str] = None, payload: Optional[bytes] = None) -> int:
+        """Insert a new pending job and return its id"""
+        async with db.get_connection() as conn:
+            return await conn.fetchval(
+                """
+                INSERT INTO ingestion_jobs (job_type, user_id, session_id, source_name, source_url, payload, max_attempts)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                RETURNING id
+                """,
+                job_type, user_id, session_id, source_name, source_url, payload, settings.INGESTION_MAX_ATTEMPTS
+            )
+
+    @staticmethod
+    async def claim_next(worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest runnable job.
+        Also reclaims 'running' jobs whose worker stopped heartbeating (crashed worker)
+        while they have attempts left; those that have none are marked 'failed'.
+        """
+        async with db.get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET status = 'failed', locked_by = NULL, updated_at = NOW(), finished_at = NOW(),
+                    last_error = 'Worker stopped heartbeating on the last attempt'
+                    || COALESCE(' (previous error: ' || last_error || ')', '')
+                WHERE status = 'running' AND attempts >= max_attempts
+                  AND heartbeat_at < NOW() - make_interval(secs => $1)
+                """,
+                settings.INGESTION_LEASE_SECONDS
+            )
+            job = await conn.fetchrow(
+                """
+                UPDATE ingestion_jobs
+                SET status = 'running', stage = 'extract', attempts = attempts + 1,
+                    locked_by = $1, heartbeat_at = NOW(), updated_at = NOW()
+                WHERE id = (
+                    SELECT id FROM ingestion_jobs
+                    WHERE (status = 'pending' AND run_after <= NOW())
+                       OR (status = 'running' AND attempts < max_attempts
+                           AND heartbeat_at < NOW() - make_interval(secs => $2))
+                    ORDER BY run_after, id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, job_type, user_id, session_id, source_name, source_url, payload,
+                          attempts, max_attempts, locked_by
+                """,
+                worker_id, settings.INGESTION_LEASE_SECONDS
+            )
+        return dict(job) if job else None
+
+    @staticmethod
+    async def heartbeat(job_id: int, worker_id: str) -> bool:
+        """Extend the worker's lease on a running job; False if the lease was lost"""
+        async with db.get_connection() as conn:
+            renewed = await conn.fetchval(
+                """
+                UPDATE ingestion_jobs
+                SET heartbeat_at = NOW()
+                WHERE id = $1 AND locked_by = $2 AND status = 'running'
+                RETURNING id
+                """,
+                job_id, worker_id
+            )
+        return renewed is not None
+
+    @staticmethod
+    async def update_progress(job_id: int, worker_id: str, stage: str, progress: float):
+        """Record stage/progress and refresh the worker's heartbeat"""
+        async with db.get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET stage = $2, progress = $3, heartbeat_at = NOW(), updated_at = NOW()
+                WHERE id = $1 AND locked_by = $4 AND status = 'running'
+                """,
+                job_id, stage, min(max(progress, 0.0), 1.0), worker_id
+            )
+
+    @staticmethod
+    async def mark_succeeded(job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Finish a job; the upload payload is dropped since it is no longer needed.
+        Returns False (and changes nothing) if the worker no longer holds the job.
+        """
+        async with db.get_connection() as conn:
+            finished = await conn.fetchval(
+                """
+                UPDATE ingestion_jobs
+                SET status = 'succeeded', stage = 'done', progress = 1.0, result = $2,
+                    payload = NULL, last_error = NULL, locked_by = NULL,
+                    updated_at = NOW(), finished_at = NOW()
+                WHERE id = $1 AND locked_by = $3 AND status = 'running'
+                RETURNING id
+                """,
+                job_id, result, worker_id
+            )
+        return finished is not None
+
+    @staticmethod
+    async def mark_failed(job_id: int, worker_id: str, error: str, retryable: bool = True) -> bool:
+        """
+        Record a failure. The job goes back to 'pending' with exponential backoff
+        until max_attempts is reached, after which it is marked 'failed'.
+        Returns False (and changes nothing) if the worker no longer holds the job.
+        """
+        async with db.get_connection() as conn:
+            recorded = await conn.fetchval(
+                """
+                UPDATE ingestion_jobs
+                SET status = CASE WHEN $3 AND attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+                    run_after = NOW() + make_interval(secs => $4 * power(2, attempts - 1)),
+                    finished_at = CASE WHEN $3 AND attempts < max_attempts THEN NULL ELSE NOW() END,
+                    last_error = $2, locked_by = NULL, updated_at = NOW()
+                WHERE id = $1 AND locked_by = $5 AND status = 'running'
+                RETURNING id
+                """,
+                job_id, error, retryable, settings.INGESTION_RETRY_BACKOFF_SECONDS, worker_id
+            )
+        return recorded is not None
+
+    @staticmethod
+    async def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+        """Get job status (without payload)"""
+        async with db.get_connection() as conn:
+            job = await conn.fetchrow(
+                f"SELECT {JOB_COLUMNS} FROM ingestion_jobs WHERE id = $1",
+                job_id
+            )
+        if not job:
+            return None
+        return dict(job)
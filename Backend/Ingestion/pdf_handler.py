@@ -1,55 +1,125 @@
+import io
 import os
 import PyPDF2
 import fitz  # PyMuPDF - better for complex PDFs
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from config import settings
 
-def validate_pdf_file(pdf_path):
+# Shared process pool for page-range sharding (created lazily on first large PDF)
+_page_pool = None
+
+def _get_page_pool():
+    global _page_pool
+    if _page_pool is None:
+        _page_pool = ProcessPoolExecutor(max_workers=settings.PDF_EXTRACTION_PROCESSES)
+    return _page_pool
+
+def _page_ranges(page_count, shards):
+    """Split [0, page_count) into at most `shards` contiguous, ordered ranges"""
+    shards = max(1, min(shards, page_count))
+    step, extra = divmod(page_count, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        end = start + step + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def _extract_page_range(pdf_bytes, start, end):
+    """Worker: open the document independently from memory and extract pages [start, end)"""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [doc.load_page(page_num).get_text() for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+def open_pdf(pdf_bytes):
     """
-    Validate if the file is actually a valid PDF by checking magic bytes
-    and basic structure.
+    Validate PDF bytes (magic bytes, structure, page count) and open the
+    document from memory. The returned document is reused for extraction,
+    so an upload is parsed once. Caller is responsible for closing it.
     """
     try:
         # Check file size
-        if os.path.getsize(pdf_path) == 0:
+        if not pdf_bytes:
             raise ValueError("PDF file is empty")
         
         # Check PDF magic bytes
-        with open(pdf_path, 'rb') as f:
-            header = f.read(4)
-            if not header.startswith(b'%PDF'):
-                raise ValueError("File is not a valid PDF (missing PDF header)")
+        if not pdf_bytes.startswith(b'%PDF'):
+            raise ValueError("File is not a valid PDF (missing PDF header)")
         
-        # Try to open with PyMuPDF for quick validation
-        doc = fitz.open(pdf_path)
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         if len(doc) == 0:
             doc.close()
             raise ValueError("PDF has no pages")
-        doc.close()
         
-        return True
+        return doc
     except Exception as e:
         raise ValueError(f"PDF validation failed: {str(e)}")
 
-def extract_text_from_pdf(pdf_path):
+def validate_pdf_bytes(pdf_bytes):
     """
-    Extract text from PDF using PyMuPDF (fitz) as primary method,
-    with PyPDF2 as fallback.
+    Validate if the bytes are actually a valid PDF. Returns the page count.
+    """
+    doc = open_pdf(pdf_bytes)
+    page_count = len(doc)
+    doc.close()
+    return page_count
+
+def validate_pdf_file(pdf_path):
+    """
+    Validate if the file is actually a valid PDF by checking magic bytes
+    and basic structure. Returns the page count.
     """
-    # First validate the PDF
-    validate_pdf_file(pdf_path)
+    with open(pdf_path, 'rb') as f:
+        return validate_pdf_bytes(f.read())
+
+def iter_pdf_pages(doc, pdf_bytes):
+    """
+    Yield per-page text with PyMuPDF, in page order, as pages become available.
+    Small documents are read from the already-open `doc`; large ones are
+    sharded by page range across the process pool (each shard is yielded as
+    soon as it and all earlier shards are done).
+    """
+    page_count = len(doc)
+    if page_count < settings.PDF_PARALLEL_PAGE_THRESHOLD or settings.PDF_EXTRACTION_PROCESSES <= 1:
+        for page_num in range(page_count):
+            yield doc.load_page(page_num).get_text()
+        return
+
+    pool = _get_page_pool()
+    futures = [
+        pool.submit(_extract_page_range, pdf_bytes, start, end)
+        for start, end in _page_ranges(page_count, settings.PDF_EXTRACTION_PROCESSES)
+    ]
+    try:
+        # Ordered merge: futures are in page-range order
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def extract_text_from_pdf_bytes(pdf_bytes, doc=None):
+    """
+    Extract text from in-memory PDF bytes using PyMuPDF (fitz) as primary
+    method, with PyPDF2 as fallback. Pass an already-open `doc` (from
+    open_pdf) to avoid parsing the document again.
+    """
+    owns_doc = doc is None
+    if owns_doc:
+        # First validate the PDF
+        doc = open_pdf(pdf_bytes)
     
     text = ""
     
     try:
         # Try PyMuPDF first (better for complex layouts)
-        print("Attempting text extraction with PyMuPDF...")
-        doc = fitz.open(pdf_path)
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            page_text = page.get_text()
-            if page_text.strip():  # Only add non-empty text
-                text += page_text + "\n"
-        doc.close()
+        print(f"Attempting text extraction with PyMuPDF ({len(doc)} pages)...")
+        # Collect non-empty pages and join once
+        text = "\n".join(page_text for page_text in iter_pdf_pages(doc, pdf_bytes) if page_text.strip())
         
         if text.strip():
             print(f"✅ PyMuPDF extracted {len(text)} characters")
@@ -58,22 +128,25 @@ def extract_text_from_pdf(pdf_path):
             print("⚠️  PyMuPDF found no text content")
     except Exception as e:
         print(f"❌ PyMuPDF failed: {e}")
+    finally:
+        if owns_doc:
+            doc.close()
     
     try:
         # Fallback to PyPDF2
         print("Attempting text extraction with PyPDF2...")
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            # Check if PDF is encrypted
-            if pdf_reader.is_encrypted:
-                raise ValueError("PDF is password-protected")
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                if page_text.strip():
-                    text += page_text + "\n"
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        
+        # Check if PDF is encrypted
+        if pdf_reader.is_encrypted:
+            raise ValueError("PDF is password-protected")
+        
+        pages = []
+        for page in pdf_reader.pages:
+            page_text = page.extract_text()
+            if page_text.strip():
+                pages.append(page_text)
+        text = "\n".join(pages)
         
         if text.strip():
             print(f"✅ PyPDF2 extracted {len(text)} characters")
@@ -93,48 +166,69 @@ def extract_text_from_pdf(pdf_path):
     
     return text.strip()
 
-def process_pdf_file(pdf_path, source_name=None,user_id=None):
+def extract_text_from_pdf(pdf_path):
     """
-    Process a PDF file and save the extracted text to parsed_files directory
-    with metadata header.
+    Extract text from a PDF on disk (reads it into memory once).
+    """
+    with open(pdf_path, 'rb') as f:
+        return extract_text_from_pdf_bytes(f.read())
+
+def process_pdf_bytes(pdf_bytes, output_path, source_name=None, user_id=None, original_path=""):
+    """
+    Process in-memory PDF bytes and save the extracted text with a metadata
+    header to output_path (see Ingestion.document_store for the store layout).
     
     Args:
-        pdf_path: Path to the PDF file
-        source_name: Optional custom name for the source (defaults to filename)
+        pdf_bytes: Raw PDF content
+        output_path: Path of the parsed .txt file to write
+        source_name: Optional custom name for the source (defaults to the output file stem)
+        user_id: Owner of the document
+        original_path: Where the PDF came from (path or upload filename)
     
     Returns:
         Extracted text content
     """
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-    
     try:
         # Extract text from PDF with improved error handling
-        text = extract_text_from_pdf(pdf_path)
-        
-        # Get filename without extension for saving
-        pdf_filename = Path(pdf_path).stem
-        source_name = source_name or pdf_filename
+        text = extract_text_from_pdf_bytes(pdf_bytes)
+        source_name = source_name or Path(output_path).stem
         
-        # Create parsed_files directory if it doesn't exist
-        os.makedirs("parsed_files", exist_ok=True)
+        # Create the output directory if it doesn't exist
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
         
-        # Save with metadata header
-        output_filename = os.path.join("parsed_files", f"{pdf_filename}.txt")
-        
-        with open(output_filename, "w", encoding="utf-8") as f:
+        with open(output_path, "w", encoding="utf-8") as f:
             f.write(f"### SOURCE: pdf\n")
             f.write(f"### FILENAME: {source_name}\n")
-            f.write(f"### ORIGINAL_PATH: {pdf_path}\n\n")
+            f.write(f"### ORIGINAL_PATH: {original_path}\n\n")
             f.write(f"### USER_ID: {user_id}\n\n")
             f.write(text)
         
-        print(f"✅ PDF text extracted and saved to {output_filename}")
+        print(f"✅ PDF text extracted and saved to {output_path}")
         return text
         
     except Exception as e:
         # Re-raise with more context
-        raise ValueError(f"Failed to process PDF '{pdf_path}': {str(e)}")
+        raise ValueError(f"Failed to process PDF '{original_path or output_path}': {str(e)}")
+
+def process_pdf_file(pdf_path, source_name=None,user_id=None):
+    """
+    Process a PDF file and save the extracted text to parsed_files directory
+    with metadata header.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        source_name: Optional custom name for the source (defaults to filename)
+    
+    Returns:
+        Extracted text content
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    
+    with open(pdf_path, 'rb') as f:
+        pdf_bytes = f.read()
+    output_path = os.path.join("parsed_files", f"{Path(pdf_path).stem}.txt")
+    return process_pdf_bytes(pdf_bytes, output_path, source_name, user_id, original_path=pdf_path)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""
+Streaming, timestamp-aware transcript parsing.
+
+WebVTT auto-captions repeat each line as the next one rolls in. The parser
+walks the cues once, keeps every cue's start/end time, and drops rolling
+repeats with a sliding window of recent n-grams (deque for eviction order +
+counts for O(1) membership), so the whole pass is linear in the number of
+words. The output is a list of time-aligned segments:
+
+    [{"start": 12.3, "end": 15.0, "text": "..."}, ...]
+"""
+import re
+from collections import deque
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TIMING_RE = re.compile(r"^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})")
+
+def parse_timestamp(value):
+    """Convert 'HH:MM:SS.mmm' or 'MM:SS.mmm' to seconds"""
+    seconds = 0.0
+    for part in value.replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def iter_vtt_cues(lines):
+    """
+    Yield (start, end, line_text) for every caption text line, with markup
+    stripped and consecutive duplicate lines removed.
+    """
+    start = end = None
+    last_line = ""
+
+    for line in lines:
+        timing = _TIMING_RE.match(line)
+        if timing:
+            start, end = parse_timestamp(timing.group(1)), parse_timestamp(timing.group(2))
+            continue
+        if start is None or line.strip().isdigit() or line.startswith("WEBVTT"):
+            continue
+        text = _TAG_RE.sub("", line).strip()
+        if text and text != last_line:
+            yield start, end, text
+            last_line = text  # Prevent consecutive duplicates
+
+def iter_timed_words(cues):
+    """Flatten cues into (word, start, end) triples"""
+    for start, end, text in cues:
+        for word in text.split():
+            yield word, start, end
+
+def dedupe_rolling_words(timed_words, ngram=5, window=50):
+    """
+    Drop rolling-caption repeats: whenever the n-gram starting at the current
+    word was emitted within the last `window` n-grams, skip those n words.
+    Uses an n-word lookahead buffer, so input is consumed as a stream.
+    """
+    lookahead = deque()
+    recent = deque()
+    recent_counts = {}
+    source = iter(timed_words)
+
+    def fill():
+        while len(lookahead) < ngram:
+            try:
+                lookahead.append(next(source))
+            except StopIteration:
+                return
+
+    fill()
+    while lookahead:
+        phrase = tuple(word for word, _, _ in lookahead)
+        if recent_counts.get(phrase):
+            for _ in range(len(lookahead)):
+                lookahead.popleft()
+            fill()
+            continue
+
+        yield lookahead.popleft()
+
+        recent.append(phrase)
+        recent_counts[phrase] = recent_counts.get(phrase, 0) + 1
+        if len(recent) > window:
+            oldest = recent.popleft()
+            recent_counts[oldest] -= 1
+            if not recent_counts[oldest]:
+                del recent_counts[oldest]
+        fill()
+
+def group_segments(timed_words):
+    """Re-assemble surviving words into one segment per source cue"""
+    segment_words = []
+    segment_start = segment_end = None
+
+    for word, start, end in timed_words:
+        if segment_words and start != segment_start:
+            yield {"start": segment_start, "end": segment_end, "text": " ".join(segment_words)}
+            segment_words = []
+        segment_start, segment_end = start, end
+        segment_words.append(word)
+
+    if segment_words:
+        yield {"start": segment_start, "end": segment_end, "text": " ".join(segment_words)}
+
+def parse_vtt(lines):
+    """
+    Parse WebVTT captions into deduplicated, time-aligned segments.
+    `lines` is any iterable of lines (e.g. a streamed HTTP response).
+    """
+    cues = iter_vtt_cues(lines)
+    return list(group_segments(dedupe_rolling_words(iter_timed_words(cues))))
+
+def segments_from_transcript_api(entries):
+    """Convert youtube_transcript_api entries ({text, start, duration}) to segments"""
+    segments = []
+    for entry in entries:
+        text = " ".join(entry["text"].split())
+        if text:
+            start = float(entry["start"])
+            segments.append({"start": start, "end": start + float(entry.get("duration", 0)), "text": text})
+    return segments
+
+def segments_to_text(segments):
+    return " ".join(segment["text"] for segment in segments)
+
+# Parsed transcript files store one segment per line as "[t=<start seconds>] text"
+_SEGMENT_LINE_RE = re.compile(r"^\[t=(\d+(?:\.\d+)?)\]\s?(.*)$", re.DOTALL)
+
+def format_segment_line(segment):
+    return f"[t={segment['start']:.2f}] {segment['text']}"
+
+def parse_segment_line(line):
+    """Inverse of format_segment_line; returns {start, text} (start is None for plain lines)"""
+    match = _SEGMENT_LINE_RE.match(line)
+    if match:
+        return {"start": float(match.group(1)), "text": match.group(2)}
+    return {"start": None, "text": line}
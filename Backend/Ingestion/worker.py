@@ -0,0 +1,237 @@
+"""
+Ingestion worker: claims jobs from the ingestion_jobs table and runs
+extract -> chunk -> embed -> store end to end as a streaming pipeline:
+pages are chunked as they are extracted and each embedding batch is
+upserted as soon as it fills.
+
+Run from the Backend directory:
+    python -m Ingestion.worker --processes 4
+
+Content that was already ingested (same PDF bytes or YouTube video id) is
+served from the content registry: its cached vectors are copied into the
+new user's namespace without re-extracting or re-embedding.
+
+Throughput scales by adding processes (on this host or any other host
+pointed at the same database).
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import traceback
+from Database.connection import db
+from Ingestion.job_queue import IngestionJobDB
+from Ingestion.pdf_handler import open_pdf, iter_pdf_pages, extract_text_from_pdf_bytes
+from Ingestion.yt_handler import fetch_transcript_segments, fetch_video_id, TranscriptFetchTimeout
+from Ingestion.content_registry import (
+    ContentRegistryDB, content_key_for_bytes, content_key_for_video, reuse_registered_content
+)
+from Processing.read_and_chunk import iter_document_chunks, chunk_document, chunker_key
+from Processing.ingest_pipeline import embed_and_store_chunks
+from Processing.chunker import count_tokens
+from Processing.store_embeddings import content_vector_id
+from config import settings
+
+def with_content_vector_ids(chunks, job, content_key):
+    """
+    Give a job's chunks deterministic ids (the ids a cached copy of the same
+    content would get), so a retried job overwrites what it already stored
+    """
+    for chunk in chunks:
+        chunk.vector_id = content_vector_id(content_key, chunk.chunk_id, job['user_id'], job['session_id'])
+        yield chunk
+
+def run_pdf_pipeline(job, metadata, report_progress, content_key):
+    """
+    Stream a queued PDF through pages -> chunks -> embed/store batches.
+    The payload is opened once, from memory. Progress is the fraction of
+    pages extracted so far.
+    """
+    pdf_bytes = job['payload']
+    doc = open_pdf(pdf_bytes)
+    try:
+        page_count = len(doc)
+        pages_done = 0
+
+        def pages():
+            nonlocal pages_done
+            for page_text in iter_pdf_pages(doc, pdf_bytes):
+                pages_done += 1
+                yield page_text
+
+        summary = embed_and_store_chunks(
+            with_content_vector_ids(iter_document_chunks(pages(), metadata), job, content_key),
+            job['user_id'], job['session_id'],
+            progress_callback=lambda _: report_progress(pages_done / page_count),
+            content_key=content_key
+        )
+
+        if not summary["num_chunks"]:
+            # No text layer according to PyMuPDF; fall back to the full extractor (PyPDF2)
+            text = extract_text_from_pdf_bytes(pdf_bytes, doc)
+            summary = embed_and_store_chunks(
+                with_content_vector_ids(chunk_document(text, metadata), job, content_key),
+                job['user_id'], job['session_id'], content_key=content_key
+            )
+
+        summary["pages"] = page_count
+        return summary
+    finally:
+        doc.close()
+
+def run_youtube_pipeline(job, metadata, report_progress, content_key):
+    """
+    Fetch a transcript and stream its chunks through embed/store batches.
+    Progress is estimated from the transcript's token count.
+    """
+    _, segments = fetch_transcript_segments(job['source_url'])
+    if not segments:
+        raise ValueError("No transcript or auto-captions available for this video")
+
+    # Segments keep their timestamps, so every chunk carries start_seconds
+    estimated_chunks = max(1, sum(count_tokens(segment["text"]) for segment in segments) // 360)
+    return embed_and_store_chunks(
+        with_content_vector_ids(iter_document_chunks(segments, metadata), job, content_key),
+        job['user_id'], job['session_id'],
+        progress_callback=lambda num_chunks: report_progress(num_chunks / estimated_chunks),
+        content_key=content_key
+    )
+
+async def keep_lease(job_id, worker_id):
+    """Heartbeat a claimed job until cancelled, so other workers do not reclaim it"""
+    interval = max(1.0, settings.INGESTION_LEASE_SECONDS / 3)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await IngestionJobDB.heartbeat(job_id, worker_id):
+                print(f"⚠️ Worker {worker_id} lost its lease on job {job_id}")
+                return
+        except Exception as e:
+            # A missed beat is fine as long as a later one lands within the lease
+            print(f"⚠️ Heartbeat for job {job_id} failed: {e}")
+
+async def run_job(job):
+    """Run one claimed job through the full ingestion pipeline, heartbeating throughout"""
+    heartbeat = asyncio.create_task(keep_lease(job['id'], job['locked_by']))
+    try:
+        return await ingest_job(job)
+    finally:
+        heartbeat.cancel()
+
+async def ingest_job(job):
+    """Extract, chunk, embed and store one job's content (or copy it from the content cache)"""
+    job_id, worker_id = job['id'], job['locked_by']
+    loop = asyncio.get_running_loop()
+
+    def report_progress(fraction):
+        # Called from the pipeline thread after every stored batch
+        asyncio.run_coroutine_threadsafe(
+            IngestionJobDB.update_progress(job_id, worker_id, "embed", min(fraction, 0.99)), loop
+        )
+
+    metadata = {"source": job['job_type'], "user_id": job['user_id']}
+    if job['job_type'] == 'pdf':
+        source_name = job['source_name'] or f"job_{job_id}.pdf"
+        metadata.update(filename=source_name, original_filename=source_name, original_path="")
+        content_key = content_key_for_bytes(job['payload'])
+        pipeline = run_pdf_pipeline
+    else:
+        video_id = fetch_video_id(job['source_url'])
+        metadata.update(filename=f"{video_id}.txt", url=job['source_url'])
+        content_key = content_key_for_video(video_id)
+        pipeline = run_youtube_pipeline
+
+    # Duplicate content: copy its cached vectors instead of extracting and embedding again
+    overrides = {k: v for k, v in metadata.items() if k in ("filename", "original_filename", "url")}
+    copied = await reuse_registered_content(
+        content_key, chunker_key(), job['user_id'], job['session_id'], overrides
+    )
+    if copied is not None:
+        return {
+            "source": metadata["source"],
+            "filename": metadata["filename"],
+            "num_chunks": copied,
+            "deduplicated": True,
+        }
+
+    await IngestionJobDB.update_progress(job_id, worker_id, "extract", 0.0)
+    summary = await asyncio.to_thread(pipeline, job, metadata, report_progress, content_key)
+    await ContentRegistryDB.register(
+        content_key, metadata["source"], job['source_name'], chunker_key(), summary["num_chunks"]
+    )
+
+    return {
+        "source": metadata["source"],
+        "filename": metadata["filename"],
+        "deduplicated": False,
+        **summary,
+    }
+
+async def worker_loop(worker_id, stop_event):
+    """Claim and run jobs until asked to stop"""
+    await db.create_pool()
+    print(f"👷 Ingestion worker {worker_id} started")
+    try:
+        while not stop_event.is_set():
+            job = await IngestionJobDB.claim_next(worker_id)
+            if not job:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=settings.INGESTION_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            print(f"📥 Worker {worker_id} claimed job {job['id']} ({job['job_type']}, attempt {job['attempts']}/{job['max_attempts']})")
+            try:
+                result = await run_job(job)
+                if await IngestionJobDB.mark_succeeded(job['id'], worker_id, result):
+                    print(f"✅ Job {job['id']} succeeded: {result['num_chunks']} chunks")
+                else:
+                    print(f"⚠️ Job {job['id']} finished but was reclaimed by another worker; result not recorded")
+            except TranscriptFetchTimeout as te:
+                # YouTube was slow to answer - try again after the backoff
+                print(f"⚠️ Job {job['id']} failed (attempt {job['attempts']}): {te}")
+                if not await IngestionJobDB.mark_failed(job['id'], worker_id, str(te), retryable=True):
+                    print(f"⚠️ Job {job['id']} was reclaimed by another worker; failure not recorded")
+            except ValueError as ve:
+                # Bad input (invalid PDF, no transcript) - retrying will not help
+                print(f"❌ Job {job['id']} failed permanently: {ve}")
+                if not await IngestionJobDB.mark_failed(job['id'], worker_id, str(ve), retryable=False):
+                    print(f"⚠️ Job {job['id']} was reclaimed by another worker; failure not recorded")
+            except Exception as e:
+                print(f"⚠️ Job {job['id']} failed (attempt {job['attempts']}): {e}")
+                traceback.print_exc()
+                if not await IngestionJobDB.mark_failed(job['id'], worker_id, str(e), retryable=True):
+                    print(f"⚠️ Job {job['id']} was reclaimed by another worker; failure not recorded")
+    finally:
+        await db.close_pool()
+        print(f"👋 Ingestion worker {worker_id} stopped")
+
+def run_worker_process(index):
+    """Entry point for one worker process"""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+    async def main():
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+        await worker_loop(worker_id, stop_event)
+
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ingestion worker processes")
+    parser.add_argument("--processes", type=int, default=settings.INGESTION_WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(target=run_worker_process, args=(i,))
+        for i in range(max(1, args.processes))
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
@@ -1,105 +1,304 @@
 import yt_dlp
 import requests
-import re
 import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urlparse, parse_qs
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
 from xml.etree.ElementTree import ParseError  # Needed to catch XML parsing errors
+from config import settings
+from Ingestion.transcript_parser import (
+    parse_vtt, segments_from_transcript_api, segments_to_text, format_segment_line
+)
+
+# Threads used to race the transcript API against the auto-caption fallback:
+# one pool per source, each with room for YOUTUBE_BULK_CONCURRENCY videos plus
+# as many losing calls still running out their socket timeouts, so that
+# stragglers never queue new videos behind them
+_api_pool = ThreadPoolExecutor(max_workers=2 * settings.YOUTUBE_BULK_CONCURRENCY, thread_name_prefix="yt-api")
+_caption_pool = ThreadPoolExecutor(max_workers=2 * settings.YOUTUBE_BULK_CONCURRENCY, thread_name_prefix="yt-captions")
+
+# How often race_transcript_sources checks whether a queued source has started
+_QUEUED_SOURCE_POLL_SECONDS = 0.25
+
+class TranscriptFetchTimeout(Exception):
+    """
+    No transcript source answered before the deadline. Unlike a video without
+    captions (an empty result), this is transient and worth retrying.
+    """
+
+class TranscriptCache:
+    """
+    Transcript store keyed by (video_id, language) with a TTL.
+    Values are lists of time-aligned {start, end, text} segments.
+    Entries live in memory and are persisted as JSON files so they survive restarts
+    and are shared by every process running on the same disk.
+    """
+
+    def __init__(self, directory, ttl_seconds):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, video_id, lang):
+        return os.path.join(self.directory, f"{video_id}.{lang}.json")
+
+    def _is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def get(self, video_id, lang):
+        key = (video_id, lang)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            try:
+                with open(self._path(video_id, lang), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+        if "segments" not in entry or not self._is_fresh(entry):
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            self._entries[key] = entry
+        return entry["segments"]
+
+    def set(self, video_id, lang, segments):
+        entry = {"fetched_at": time.time(), "segments": segments}
+        with self._lock:
+            self._entries[(video_id, lang)] = entry
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write atomically so concurrent readers never see a partial file
+            path = self._path(video_id, lang)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not persist transcript for {video_id}: {e}")
+
+transcript_cache = TranscriptCache(settings.TRANSCRIPT_CACHE_DIR, settings.TRANSCRIPT_CACHE_TTL_SECONDS)
+
+# Hosts whose path carries the video id (youtu.be/<id>, /shorts/<id>, /embed/<id>, /live/<id>)
+_PATH_ID_PREFIXES = ("shorts", "embed", "live", "v")
 
 def fetch_video_id(url):
-    query = parse_qs(urlparse(url).query)
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
     video_id = query.get("v")
     if video_id:
         return video_id[0]
+
+    parts = [part for part in parsed.path.split("/") if part]
+    if parsed.netloc.endswith("youtu.be") and parts:
+        return parts[0]
+    if len(parts) >= 2 and parts[0] in _PATH_ID_PREFIXES:
+        return parts[1]
     raise ValueError("Invalid YouTube URL")
 
-def get_transcript_api(video_id):
+def fetch_playlist_id(url):
+    """Return the playlist id of a playlist URL, or None for plain video URLs"""
+    parsed = urlparse(url)
+    playlist_id = parse_qs(parsed.query).get("list")
+    if playlist_id and (parsed.path.rstrip("/") == "/playlist" or "v" not in parse_qs(parsed.query)):
+        return playlist_id[0]
+    return None
+
+def resolve_playlist(playlist_id):
+    """List the video URLs of a playlist without fetching each video's page"""
+    ydl_opts = {
+        'quiet': True,
+        'extract_flat': 'in_playlist',
+        'skip_download': True,
+        'socket_timeout': settings.TRANSCRIPT_SOCKET_TIMEOUT_SECONDS,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(f"https://www.youtube.com/playlist?list={playlist_id}", download=False)
+    return [
+        f"https://www.youtube.com/watch?v={entry['id']}"
+        for entry in info.get('entries') or []
+        if entry and entry.get('id')
+    ]
+
+def resolve_video_urls(urls):
+    """
+    Expand playlist URLs and drop duplicate videos.
+    Returns a list of (video_id, url) in first-seen order; invalid URLs raise ValueError.
+    """
+    resolved = []
+    seen = set()
+    for url in urls:
+        playlist_id = fetch_playlist_id(url)
+        video_urls = resolve_playlist(playlist_id) if playlist_id else [url]
+        for video_url in video_urls:
+            video_id = fetch_video_id(video_url)
+            if video_id not in seen:
+                seen.add(video_id)
+                resolved.append((video_id, video_url))
+    return resolved
+
+class _TimeoutSession(requests.Session):
+    """requests session whose requests time out unless the caller sets a timeout"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+# Per fetch thread: one YoutubeDL instance and one transcript API client, reused across videos
+_fetch_local = threading.local()
+
+def _get_transcript_api():
+    api = getattr(_fetch_local, "transcript_api", None)
+    if api is None:
+        api = YouTubeTranscriptApi(http_client=_TimeoutSession(settings.TRANSCRIPT_SOCKET_TIMEOUT_SECONDS))
+        _fetch_local.transcript_api = api
+    return api
+
+def get_transcript_api(video_id, lang='en'):
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-        return " ".join([entry['text'] for entry in transcript_list])
+        transcript = _get_transcript_api().fetch(video_id, languages=[lang])
+        return segments_from_transcript_api(transcript.to_raw_data())
     except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, ParseError) as e:
         print(f"Transcript API fallback triggered: {e}")
         return None
 
+def _get_ydl():
+    ydl = getattr(_fetch_local, "ydl", None)
+    if ydl is None:
+        ydl_opts = {
+            'skip_download': True,
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitlesformat': 'vtt',
+            'quiet': True,
+            'socket_timeout': settings.TRANSCRIPT_SOCKET_TIMEOUT_SECONDS,
+        }
+        ydl = yt_dlp.YoutubeDL(ydl_opts)
+        _fetch_local.ydl = ydl
+    return ydl
+
 def get_auto_caption_url(video_url, lang='en'):
-    ydl_opts = {
-        'skip_download': True,
-        'writesubtitles': True,
-        'writeautomaticsub': True,
-        'subtitleslangs': [lang],
-        'subtitlesformat': 'vtt',
-        'quiet': True,
+    info = _get_ydl().extract_info(video_url, download=False)
+    subs = info.get('automatic_captions', {})
+    if lang in subs:
+        for entry in subs[lang]:
+            if entry['ext'] == 'vtt':
+                return entry['url']
+    return None
+
+def get_vtt_segments(vtt_url):
+    """Stream a VTT file and parse it into deduplicated, time-aligned segments"""
+    with requests.get(vtt_url, timeout=settings.TRANSCRIPT_SOCKET_TIMEOUT_SECONDS, stream=True) as response:
+        response.raise_for_status()
+        response.encoding = response.encoding or "utf-8"
+        return parse_vtt(response.iter_lines(decode_unicode=True))
+
+def get_caption_segments(url, lang='en'):
+    """Fallback: locate the auto-caption VTT with yt_dlp and parse it"""
+    vtt_url = get_auto_caption_url(url, lang)
+    if not vtt_url:
+        print("No auto-captions found.")
+        return None
+    return get_vtt_segments(vtt_url)
+
+def _run_source(started, index, source, *args):
+    started[index] = time.monotonic()
+    return source(*args)
+
+def race_transcript_sources(video_id, url, lang='en', timeout=None):
+    """
+    Run the transcript API and the auto-caption fallback concurrently and
+    return the first non-empty list of segments, or [] if both finish without
+    one. Each source gets `timeout` seconds from when it starts running (time
+    queued for a pool thread does not count); raises TranscriptFetchTimeout
+    once every source has used its time up.
+    """
+    timeout = timeout if timeout is not None else settings.TRANSCRIPT_FETCH_TIMEOUT_SECONDS
+    started = {}  # Source index -> monotonic start time, set by the pool thread
+    sources = {
+        _api_pool.submit(_run_source, started, 0, get_transcript_api, video_id, lang): 0,
+        _caption_pool.submit(_run_source, started, 1, get_caption_segments, url, lang): 1,
     }
+    pending = set(sources)
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(video_url, download=False)
-        subs = info.get('automatic_captions', {})
-        if lang in subs:
-            for entry in subs[lang]:
-                if entry['ext'] == 'vtt':
-                    return entry['url']
-    return None
+    while pending:
+        now = time.monotonic()
+        deadlines = [started[sources[future]] + timeout for future in pending if sources[future] in started]
+        if len(deadlines) < len(pending):
+            wake_at = now + _QUEUED_SOURCE_POLL_SECONDS
+        elif max(deadlines) > now:
+            wake_at = max(deadlines)
+        else:
+            for other in pending:
+                other.cancel()
+            raise TranscriptFetchTimeout(f"Transcript fetch for {video_id} timed out after {timeout}s")
+        done, pending = wait(pending, timeout=wake_at - now, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                segments = future.result()
+            except Exception as e:
+                print(f"⚠️ Transcript source failed for {video_id}: {e}")
+                continue
+            if segments:
+                # Losing source keeps running in the background; its result is ignored
+                for other in pending:
+                    other.cancel()
+                return segments
 
-def clean_vtt(url):
-    vtt = requests.get(url).text
-    lines = vtt.splitlines()
-    filtered = []
-    last_line = ""
-
-    for line in lines:
-        if '-->' in line or line.strip().isdigit() or line.startswith("WEBVTT"):
-            continue
-        line = re.sub(r"<[^>]+>", "", line).strip()
-        if line and line != last_line:
-            filtered.append(line)
-            last_line = line  # Prevent consecutive duplicates
-
-    text = ' '.join(filtered)
-
-    # Optional: Remove repeated trigrams or short phrase loops
-    words = text.split()
-    result = []
-    window = set()
-    i = 0
-
-    while i < len(words):
-        phrase = ' '.join(words[i:i+5])  # check up to 5-word repeats
-        if phrase in window:
-            i += 5
-            continue
-        result.append(words[i])
-        window.add(phrase)
-        if len(window) > 50:
-            window.pop()
-        i += 1
-
-    return ' '.join(result)
-
-def process_youtube_video(url):
+    return []
+
+def fetch_transcript_segments(url, lang='en'):
+    """
+    Fetch time-aligned transcript segments for a YouTube URL without writing
+    anything to disk (other than the transcript cache).
+    Returns (video_id, segments) where segments are {start, end, text} dicts;
+    raises TranscriptFetchTimeout when no source answers in time.
+    """
     video_id = fetch_video_id(url)
 
-    # Step 1: Try transcript API
-    transcript = get_transcript_api(video_id)
+    # Step 1: Serve repeat ingestions from the transcript cache
+    segments = transcript_cache.get(video_id, lang)
+    if segments is not None:
+        print(f"⚡ Transcript cache hit for {video_id} ({lang})")
+        return video_id, segments
 
-    # Step 2: Fallback to auto-caption
-    if not transcript:
-        vtt_url = get_auto_caption_url(url)
-        if vtt_url:
-            transcript = clean_vtt(vtt_url)
-        else:
-            print("No auto-captions found.")
-            transcript = ""
+    # Step 2: Race transcript API against the auto-caption fallback
+    segments = race_transcript_sources(video_id, url, lang)
+    if segments:
+        transcript_cache.set(video_id, lang, segments)
+
+    return video_id, segments
+
+def fetch_transcript(url, lang='en'):
+    """
+    Fetch the plain transcript text for a YouTube URL. Returns (video_id, transcript).
+    """
+    video_id, segments = fetch_transcript_segments(url, lang)
+    return video_id, segments_to_text(segments)
+
+def process_youtube_video(url, output_path=None):
+    video_id, segments = fetch_transcript_segments(url)
 
-    # Step 3: Store in file with metadata at top
-    os.makedirs("parsed_files", exist_ok=True)
-    filename = os.path.join("parsed_files", f"{video_id}.txt")
+    # Step 3: Store in file with metadata at top, one timestamped segment per line
+    filename = output_path or os.path.join("parsed_files", f"{video_id}.txt")
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
 
     with open(filename, "w", encoding="utf-8") as f:
         f.write(f"### SOURCE: youtube\n### URL: {url}\n\n")
-        f.write(transcript)
+        for segment in segments:
+            f.write(f"{format_segment_line(segment)}\n")
 
     print(f"Transcript saved to {filename}")
-    return transcript
+    return segments_to_text(segments)
 
 # Example usage
 if __name__ == "__main__":
@@ -142,6 +142,15 @@ User Query: {query}\n\nContext: {context}"""
             "body": f"I apologize, but I encountered an error processing your request: {str(e)}"
         }
 
+def format_video_citation(metadata):
+    """Link a YouTube chunk to the moment it starts, e.g. (Source: https://youtu.be/...&t=754s)"""
+    url = metadata.get("url")
+    start_seconds = metadata.get("start_seconds")
+    if not url or start_seconds is None:
+        return ""
+    separator = "&" if "?" in url else "?"
+    return f"(Source: {url}{separator}t={int(start_seconds)}s)"
+
 async def getContext(query_vector, user_id, session_id, index_name="chatbot-index"):
     try:
         print(f"🔍 Getting context for user {user_id}, session {session_id}")
@@ -206,8 +215,10 @@ async def getContext(query_vector, user_id, session_id, index_name="chatbot-inde
         # Extract relevant embeddings context
         relevant_embeddings_context = []
         for match in embedding_results.get("matches", []):
-            if "text" in match.get("metadata", {}):
-                relevant_embeddings_context.append(match["metadata"]["text"])
+            metadata = match.get("metadata", {})
+            if "text" in metadata:
+                citation = format_video_citation(metadata)
+                relevant_embeddings_context.append(f"{metadata['text']} {citation}" if citation else metadata["text"])
 
         # Extract relevant messages context
         relevant_messages_context = []
@@ -255,6 +266,7 @@ async def store_message_async(query, user_type, session_id, user_id, index_name=
                     "INSERT INTO messages (session_id, role, content, timestamp) VALUES ($1, $2, $3, $4)",
                     session_id, user_type, query, datetime.now()
                 )
+                await db.record_write(conn, session_id)
             db_success = True
             print(f"✅ Database storage successful ({user_type})")
         except Exception as db_error:
@@ -0,0 +1,145 @@
+"""
+Adaptive batch size and concurrency for embedding requests.
+
+The tuner hill-climbs on observed chunks/second: after every window of
+completed batches it compares throughput with the previous window, keeps
+moving the last knob (batch size or concurrency) while that helps and
+reverses it when it does not, alternating between the two knobs. Errors
+(rate limits, timeouts, 5xx) back off multiplicatively. Both knobs stay
+within the provider's limits (Cohere embed accepts at most 96 texts per call).
+
+What a run settled on is remembered in-process and used as the starting
+point of the next run.
+"""
+import threading
+import time
+from config import settings
+
+WINDOW_BATCHES = 3  # Completed batches per throughput measurement
+BATCH_STEP = 1.5  # Multiplicative batch size step
+MIN_IMPROVEMENT = 0.97  # Throughput below this fraction of the previous window counts as worse
+
+_lock = threading.Lock()
+_last_tuned = {}  # batch_size / concurrency reached by the most recent run
+_last_run = {}  # Snapshot of the most recent run, for /health/embedding
+
+class EmbeddingAutotuner:
+    def __init__(self, batch_size=None, concurrency=None,
+                 min_batch_size=None, max_batch_size=None, max_concurrency=None):
+        self.min_batch_size = min_batch_size or settings.EMBED_MIN_BATCH_SIZE
+        self.max_batch_size = max_batch_size or settings.EMBED_MAX_BATCH_SIZE
+        self.max_concurrency = max(1, max_concurrency or settings.EMBED_MAX_CONCURRENCY)
+
+        with _lock:
+            batch_size = batch_size or _last_tuned.get("batch_size", 64)
+            concurrency = concurrency or _last_tuned.get("concurrency", settings.EMBED_CONCURRENCY)
+        self.batch_size = self._clamp_batch(batch_size)
+        self.concurrency = min(max(1, concurrency), self.max_concurrency)
+
+        self._condition = threading.Condition()
+        self._active = 0
+
+        self._knob = "batch_size"
+        self._directions = {"batch_size": 1, "concurrency": 1}
+        self._window_started = None
+        self._window_chunks = 0
+        self._window_batches = 0
+        self._previous_throughput = None
+
+        self.started_at = time.monotonic()
+        self.chunks = 0
+        self.batches = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+    def _clamp_batch(self, value):
+        return int(min(max(value, self.min_batch_size), self.max_batch_size))
+
+    def next_batch_size(self):
+        with self._condition:
+            return self.batch_size
+
+    def acquire(self):
+        """Block until fewer than `concurrency` embedding calls are in flight"""
+        with self._condition:
+            while self._active >= self.concurrency:
+                self._condition.wait()
+            self._active += 1
+            if self._window_started is None:
+                self._window_started = time.monotonic()
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def record_success(self, num_chunks, latency):
+        with self._condition:
+            self.chunks += num_chunks
+            self.batches += 1
+            self.total_latency += latency
+            self._window_chunks += num_chunks
+            self._window_batches += 1
+            if self._window_batches >= WINDOW_BATCHES:
+                self._adjust()
+            self._condition.notify_all()
+
+    def record_error(self):
+        """Back off after a failed call: halve the batch size and drop one concurrent call"""
+        with self._condition:
+            self.errors += 1
+            self.batch_size = self._clamp_batch(self.batch_size // 2)
+            self.concurrency = max(1, self.concurrency - 1)
+            self._directions = {"batch_size": -1, "concurrency": -1}
+            self._previous_throughput = None
+            self._reset_window()
+
+    def _reset_window(self):
+        self._window_started = time.monotonic() if self._active else None
+        self._window_chunks = 0
+        self._window_batches = 0
+
+    def _adjust(self):
+        throughput = self._window_chunks / max(time.monotonic() - self._window_started, 1e-6)
+        if self._previous_throughput is not None and throughput < self._previous_throughput * MIN_IMPROVEMENT:
+            # The last move hurt: step back and try the other direction next time
+            self._directions[self._knob] *= -1
+            self._step(self._knob)
+        self._previous_throughput = throughput
+
+        self._knob = "concurrency" if self._knob == "batch_size" else "batch_size"
+        self._step(self._knob)
+        self._reset_window()
+
+    def _step(self, knob):
+        if knob == "batch_size":
+            factor = BATCH_STEP if self._directions[knob] > 0 else 1 / BATCH_STEP
+            self.batch_size = self._clamp_batch(round(self.batch_size * factor))
+        else:
+            self.concurrency = min(max(1, self.concurrency + self._directions[knob]), self.max_concurrency)
+
+    def snapshot(self):
+        with self._condition:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                "batch_size": self.batch_size,
+                "concurrency": self.concurrency,
+                "chunks_per_second": round(self.chunks / elapsed, 2) if elapsed > 0 else 0.0,
+                "batches": self.batches,
+                "errors": self.errors,
+                "avg_batch_latency_seconds": round(self.total_latency / self.batches, 3) if self.batches else None,
+            }
+
+    def finish(self):
+        """Remember the settings this run reached and return its snapshot"""
+        snapshot = self.snapshot()
+        with _lock:
+            _last_tuned.update(batch_size=snapshot["batch_size"], concurrency=snapshot["concurrency"])
+            _last_run.clear()
+            _last_run.update(snapshot)
+        return snapshot
+
+def last_run_metrics():
+    """Settings and throughput of the most recent embedding run in this process"""
+    with _lock:
+        return dict(_last_run)
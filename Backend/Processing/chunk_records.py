@@ -0,0 +1,78 @@
+"""
+Compact chunk records used from chunking through embedding to storage.
+
+A document's source metadata is held once, in a DocumentMetadata shared by
+reference from every one of its chunks; a Chunk only carries what differs
+per chunk. Both use __slots__, so a chunk costs one small object plus its
+text instead of a dict holding a copy of the document metadata. Pinecone
+metadata dicts are only built at the vector-store boundary.
+"""
+import sys
+
+def _intern(value):
+    return sys.intern(value) if value else ""
+
+class DocumentMetadata:
+    """Source metadata of one document, shared by all of its chunks"""
+    __slots__ = ("source", "filename", "user_id", "url", "original_filename", "original_path", "content_key")
+
+    def __init__(self, source="unknown", filename="", user_id="", url="", original_filename="", original_path="",
+                 content_key=None):
+        self.source = _intern(source) or "unknown"
+        self.filename = filename or ""
+        self.user_id = _intern(user_id)
+        self.url = url or ""
+        self.original_filename = original_filename or ""
+        self.original_path = original_path or ""
+        self.content_key = content_key  # Content registry key; chunk vectors are also cached under it
+
+    @classmethod
+    def from_dict(cls, metadata):
+        return cls(**{key: metadata[key] for key in cls.__slots__ if metadata.get(key) is not None})
+
+    def to_dict(self):
+        """Metadata as chunk dicts used to carry it: only the keys that apply to the source"""
+        metadata = {"filename": self.filename, "source": self.source, "user_id": self.user_id}
+        if self.source == "youtube":
+            metadata["url"] = self.url
+        elif self.source == "pdf":
+            metadata["original_filename"] = self.original_filename
+            metadata["original_path"] = self.original_path
+        return metadata
+
+class Chunk:
+    """One chunk of a document: its text plus position, and the shared document metadata"""
+    __slots__ = ("document", "chunk_id", "text", "start_seconds", "vector_id")
+
+    def __init__(self, document, chunk_id, text, start_seconds=None, vector_id=None):
+        self.document = document
+        self.chunk_id = chunk_id
+        self.text = text
+        self.start_seconds = start_seconds  # Position in the video (timed transcripts only)
+        self.vector_id = vector_id  # Stable Pinecone id, if the chunk belongs to a stored document
+
+    def to_dict(self):
+        chunk = {**self.document.to_dict(), "chunk_id": self.chunk_id, "text": self.text, "type": "data"}
+        if self.start_seconds is not None:
+            chunk["start_seconds"] = self.start_seconds
+        return chunk
+
+    def vector_metadata(self, user_id, session_id):
+        """Pinecone metadata for this chunk's vector"""
+        document = self.document
+        metadata = {
+            "text": self.text,
+            "url": document.url,
+            "filename": document.filename,
+            "chunk_id": self.chunk_id,
+            "source": document.source,
+            "original_filename": document.original_filename,
+            "original_path": document.original_path,
+            "user_id": user_id,
+            "session_id": session_id,
+            "type": "embedding"
+        }
+        # Position in the video, so answers can cite the exact moment
+        if self.start_seconds is not None:
+            metadata["start_seconds"] = self.start_seconds
+        return metadata
@@ -0,0 +1,217 @@
+"""
+Token-aware, sentence-boundary chunking.
+
+Text arrives as a stream of pieces (pages, file lines or timed transcript
+segments) and is cut into sentence units first; a unit only ends mid-sentence
+when a sentence alone is longer than a chunk. Units are then packed into
+chunks in one linear pass over prefix sums of their token and character
+lengths: a chunk grows as long as it fits both limits, prefers to end on a
+paragraph boundary, and the next chunk starts far enough back to repeat
+`overlap` tokens of context.
+
+Lengths are measured with count_word_tokens, an estimate of the embedding
+model's subword tokenizer (Cohere embed-english-v3.0 accepts 512 tokens).
+Because it is an estimate, chunk sizes are capped at MAX_CHUNK_TOKENS.
+"""
+import re
+
+# Cohere embed-english-v3.0 embeds the first 512 tokens of a text and drops
+# the rest. count_word_tokens underestimates text that splits into many
+# subwords (numbers, identifiers, URLs, non-English words), so chunks keep a
+# safety margin of about 20% below the limit: larger requested sizes are
+# capped rather than risking silently truncated chunks.
+MODEL_MAX_TOKENS = 512
+MAX_CHUNK_TOKENS = 400
+
+# Marker yielded between paragraphs by iter_sentence_units
+PARAGRAPH_BREAK = None
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*$")
+_WORD_PART_RE = re.compile(r"\w+|[^\w\s]")
+
+def count_word_tokens(word):
+    """
+    Estimate the number of model tokens in one whitespace-separated word:
+    one per punctuation mark, and about one per five characters of letters
+    or digits (common English words are a single token).
+    """
+    return sum(-(-len(part) // 5) if part[0].isalnum() else 1 for part in _WORD_PART_RE.findall(word)) or 1
+
+def count_tokens(text):
+    return sum(count_word_tokens(word) for word in text.split())
+
+def effective_chunk_size(chunk_size):
+    """A requested chunk size (estimated tokens) capped at MAX_CHUNK_TOKENS"""
+    return max(1, min(chunk_size, MAX_CHUNK_TOKENS))
+
+class SentenceUnit:
+    """A sentence (or a slice of an over-long sentence) with its measured length"""
+    __slots__ = ("text", "tokens", "chars", "start", "paragraph_end")
+
+    def __init__(self, words, tokens, start):
+        self.text = " ".join(words)
+        self.tokens = tokens
+        self.chars = len(self.text) + 1  # Plus the separator that joins it to the next unit
+        self.start = start
+        self.paragraph_end = False
+
+def _split_sentences(paragraph):
+    """Yield (sentence, is_complete) for one paragraph; the last sentence may continue in the next piece"""
+    sentences = _SENTENCE_SPLIT_RE.split(paragraph.strip())
+    for index, sentence in enumerate(sentences):
+        if sentence:
+            complete = index < len(sentences) - 1 or bool(_SENTENCE_END_RE.search(sentence))
+            yield sentence, complete
+
+def iter_sentence_units(pieces, max_tokens, char_limit, slice_tokens=None):
+    """
+    Turn a stream of pieces into SentenceUnits, yielding PARAGRAPH_BREAK
+    between paragraphs. Pieces are strings or {"text", "start"} transcript
+    segments; a sentence may span pieces. Sentences longer than max_tokens
+    or char_limit (e.g. unpunctuated captions) are sliced at word boundaries
+    into units of at most slice_tokens (default max_tokens), so that chunks
+    can still pack and overlap them; the words left over after the last full
+    slice carry on into the rest of the sentence.
+    """
+    slice_tokens = min(slice_tokens or max_tokens, max_tokens)
+    slice_chars = max(1, char_limit * slice_tokens // max_tokens)
+    fragment = []  # (word, tokens, start) of the sentence in progress
+    fragment_tokens = fragment_chars = 0
+    slicing = False  # The sentence in progress is over-long and already partly emitted
+
+    def flush(sentence_end=True):
+        nonlocal fragment, fragment_tokens, fragment_chars, slicing
+        if not slicing and fragment_tokens <= max_tokens and fragment_chars <= char_limit:
+            if fragment:
+                yield SentenceUnit([word for word, _, _ in fragment], fragment_tokens, fragment[0][2])
+            fragment, fragment_tokens, fragment_chars = [], 0, 0
+            return
+
+        # Over-long sentence: emit full slices; unless it ended, keep the rest for its next words
+        sliced, words, tokens, chars = 0, [], 0, 0
+        for index, (word, word_tokens, _) in enumerate(fragment):
+            if words and (tokens + word_tokens > slice_tokens or chars + len(word) + 1 > slice_chars):
+                yield SentenceUnit(words, tokens, fragment[sliced][2])
+                sliced, words, tokens, chars = index, [], 0, 0
+            words.append(word)
+            tokens += word_tokens
+            chars += len(word) + 1
+        if sentence_end:
+            if words:
+                yield SentenceUnit(words, tokens, fragment[sliced][2])
+            fragment, fragment_tokens, fragment_chars, slicing = [], 0, 0, False
+        else:
+            fragment, fragment_tokens, fragment_chars, slicing = fragment[sliced:], tokens, chars, True
+
+    for piece in pieces:
+        if isinstance(piece, dict):
+            text, start = piece["text"], piece.get("start")
+        else:
+            text, start = piece, None
+
+        if not text.strip():
+            # Blank line between paragraphs (files are streamed line by line)
+            yield from flush()
+            yield PARAGRAPH_BREAK
+            continue
+
+        for paragraph_index, paragraph in enumerate(_PARAGRAPH_RE.split(text)):
+            if paragraph_index:
+                yield from flush()
+                yield PARAGRAPH_BREAK
+            for sentence, complete in _split_sentences(paragraph):
+                for word in sentence.split():
+                    word_tokens = count_word_tokens(word)
+                    fragment.append((word, word_tokens, start))
+                    fragment_tokens += word_tokens
+                    fragment_chars += len(word) + 1
+                if complete or fragment_tokens > max_tokens or fragment_chars > char_limit:
+                    yield from flush(sentence_end=complete)
+
+    yield from flush()
+
+def _plan_chunks(units, chunk_size, char_limit, overlap, final):
+    """
+    Choose chunk windows over a buffer of units in one pass.
+    Returns ([(first, end), ...], next_start): windows are half-open unit
+    ranges; next_start is where planning resumes once more units arrive.
+    Unless final, a window that reaches the end of the buffer is left for
+    the next round, since it might still grow.
+    """
+    n = len(units)
+    tokens = [0] * (n + 1)
+    chars = [0] * (n + 1)
+    last_paragraph = [0] * (n + 1)  # Latest paragraph boundary at or before each index
+    for index, unit in enumerate(units):
+        tokens[index + 1] = tokens[index] + unit.tokens
+        chars[index + 1] = chars[index] + unit.chars + unit.paragraph_end  # '\n\n' joins paragraphs
+        last_paragraph[index + 1] = index + 1 if unit.paragraph_end else last_paragraph[index]
+
+    windows = []
+    first = end = overlap_start = 0
+    while first < n:
+        # Extend the window as far as both limits allow (always at least one unit)
+        end = max(end, first + 1)
+        while end < n and tokens[end + 1] - tokens[first] <= chunk_size and chars[end + 1] - chars[first] <= char_limit:
+            end += 1
+        if end == n and not final:
+            break
+
+        # Prefer ending on a paragraph boundary when that keeps the chunk at least half full
+        boundary = last_paragraph[end]
+        cut = boundary if boundary > first and tokens[boundary] - tokens[first] >= chunk_size // 2 else end
+        windows.append((first, cut))
+        if cut == n:
+            first = n
+            break
+
+        # Start the next window `overlap` tokens before the cut
+        overlap_start = max(overlap_start, first + 1)
+        while tokens[cut] - tokens[overlap_start] > overlap:
+            overlap_start += 1
+        first = overlap_start
+
+    return windows, first
+
+def iter_chunk_texts(pieces, chunk_size=400, char_limit=2000, overlap=40):
+    """
+    Yield (chunk_text, start) for a stream of pieces, where start is the
+    start time of the chunk's first unit (None for untimed text).
+    Only a couple of chunks' worth of units is buffered at a time.
+    chunk_size is capped at MAX_CHUNK_TOKENS.
+    """
+    chunk_size = effective_chunk_size(chunk_size)
+    overlap = max(0, min(overlap, chunk_size // 2))
+    # Slices of over-long sentences no longer than the overlap, so that a
+    # chunk of them can still repeat the previous chunk's last slice
+    slice_tokens = overlap or max(1, chunk_size // 4)
+    buffer = []
+    buffered_tokens = buffered_chars = 0
+
+    def emit(final):
+        nonlocal buffer, buffered_tokens, buffered_chars
+        windows, next_start = _plan_chunks(buffer, chunk_size, char_limit, overlap, final)
+        for first, cut in windows:
+            parts = []
+            for unit in buffer[first:cut]:
+                parts.append(unit.text)
+                parts.append("\n\n" if unit.paragraph_end else " ")
+            yield "".join(parts[:-1]), buffer[first].start
+        buffer = buffer[next_start:]
+        buffered_tokens = sum(unit.tokens for unit in buffer)
+        buffered_chars = sum(unit.chars for unit in buffer)
+
+    for unit in iter_sentence_units(pieces, chunk_size, char_limit, slice_tokens):
+        if unit is PARAGRAPH_BREAK:
+            if buffer:
+                buffer[-1].paragraph_end = True
+            continue
+        buffer.append(unit)
+        buffered_tokens += unit.tokens
+        buffered_chars += unit.chars
+        if buffered_tokens >= 2 * chunk_size or buffered_chars >= 2 * char_limit:
+            yield from emit(final=False)
+
+    yield from emit(final=True)
@@ -1,8 +1,10 @@
 import requests
 import os
+import numpy as np
 # import pinecone 
 import uuid
 from dotenv import load_dotenv
+from config import settings
 
 load_dotenv()
 
@@ -28,13 +30,42 @@ def embed_text(texts):
         "input_type": "search_document"
     }
 
-    response = requests.post("https://api.cohere.ai/v1/embed", headers=headers, json=data)
+    response = requests.post("https://api.cohere.ai/v1/embed", headers=headers, json=data,
+                             timeout=settings.EMBED_REQUEST_TIMEOUT_SECONDS)
     response.raise_for_status()
 
     embeddings = response.json()["embeddings"]
     
     # Return list of dicts with text + embedding
     return [{"text": input_texts[i], "embedding": embeddings[i]} for i in range(len(input_texts))]
+
+def embed_batch(texts):
+    """
+    Embed a batch of document texts as one contiguous float32 matrix
+    (one row per text, 1024 columns), about 4 KB per vector instead of
+    a Python list of floats. Rows are converted back to lists only when
+    they are handed to Pinecone.
+    """
+    data = {
+        "texts": list(texts),
+        "model": "embed-english-v3.0",
+        "input_type": "search_document"
+    }
+
+    response = requests.post("https://api.cohere.ai/v1/embed", headers=headers, json=data,
+                             timeout=settings.EMBED_REQUEST_TIMEOUT_SECONDS)
+    response.raise_for_status()
+
+    return np.asarray(response.json()["embeddings"], dtype=np.float32)
+
+def is_retryable_embedding_error(error):
+    """Rate limits, server errors and network failures are worth retrying"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
 def embed_query(text):
     input_texts = [text] if isinstance(text, str) else [t["text"] for t in text]
 
@@ -44,7 +75,8 @@ def embed_query(text):
         "input_type": "search_query"
     }
 
-    response = requests.post("https://api.cohere.ai/v1/embed", headers=headers, json=data)
+    response = requests.post("https://api.cohere.ai/v1/embed", headers=headers, json=data,
+                             timeout=settings.EMBED_REQUEST_TIMEOUT_SECONDS)
     response.raise_for_status()
 
     embeddings = response.json()["embeddings"]
@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+from itertools import islice
+from Processing.autotune import EmbeddingAutotuner
+from Processing.embed import embed_batch, is_retryable_embedding_error
+from Processing.store_embeddings import store_embeddings
+from config import settings
+
+# End-of-stream marker passed down the pipeline queues
+_DONE = object()
+
+def iter_batches(items, batch_size):
+    """
+    Group any iterable into lists of at most batch_size items, lazily.
+    batch_size may be a callable, asked again before every batch.
+    """
+    iterator = iter(items)
+    next_size = batch_size if callable(batch_size) else lambda: batch_size
+    while batch := list(islice(iterator, next_size())):
+        yield batch
+
+def embed_with_retries(texts, tuner):
+    """
+    Embed one batch under the tuner's concurrency limit, reporting latency
+    and errors to it. Retryable failures back off and retry.
+    """
+    for attempt in range(settings.EMBED_MAX_RETRIES + 1):
+        tuner.acquire()
+        started = time.monotonic()
+        try:
+            vectors = embed_batch(texts)
+        except Exception as e:
+            if attempt == settings.EMBED_MAX_RETRIES or not is_retryable_embedding_error(e):
+                raise
+            tuner.record_error()
+            print(f"⚠️ Embedding batch of {len(texts)} failed ({e}), retrying")
+        else:
+            tuner.record_success(len(texts), time.monotonic() - started)
+            return vectors
+        finally:
+            tuner.release()
+        time.sleep(0.5 * 2 ** attempt)
+
+def sample_chunk_summary(chunk, user_id, session_id):
+    """JSON-friendly view of a stored chunk for API responses"""
+    return {**chunk.to_dict(), "user_id": user_id, "session_id": session_id}
+
+def embed_and_store_chunks(chunks, user_id, session_id, batch_size=None, progress_callback=None, content_key=None,
+                           embed_workers=None, store_workers=None, queue_depth=None):
+    """
+    Embed and store chunks as a pipeline of three stages connected by
+    bounded queues:
+
+        chunking (caller thread) -> embed workers -> upsert workers
+
+    While batch N is being upserted, batch N+1 is already being embedded,
+    so throughput approaches the slower stage's rate rather than the sum of
+    both. Full queues block the stage feeding them (backpressure), which
+    keeps memory bounded by a few batches. `chunks` may be a list or a
+    generator (e.g. pages -> iter_document_chunks).
+
+    Embedding batch size and the number of concurrent embedding calls are
+    autotuned for throughput (Processing.autotune); batch_size and
+    embed_workers only set the starting point.
+
+    Args:
+        chunks: Iterable of Chunk records as produced by read_and_chunk
+        user_id, session_id: Owner of the resulting vectors
+        batch_size: Initial number of texts per embedding request (default: last tuned value)
+        progress_callback: Optional callable(chunks_stored) invoked after each stored batch
+        content_key: Optional content registry key; vectors are also cached under it
+        embed_workers: Initial concurrent embedding calls (default: last tuned value or EMBED_CONCURRENCY)
+        store_workers: Upsert threads (default: UPSERT_CONCURRENCY)
+        queue_depth: Batches buffered between stages (default: EMBED_PIPELINE_QUEUE_DEPTH)
+
+    Returns:
+        Summary dict with num_chunks, sources_processed, sample_chunk and
+        embedding (tuned batch_size / concurrency and observed chunks_per_second)
+    """
+    tuner = EmbeddingAutotuner(batch_size=batch_size, concurrency=embed_workers)
+    store_workers = max(1, store_workers or settings.UPSERT_CONCURRENCY)
+    queue_depth = max(1, queue_depth or settings.EMBED_PIPELINE_QUEUE_DEPTH)
+
+    to_embed = queue.Queue(maxsize=queue_depth)
+    to_store = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+    errors = []
+    lock = threading.Lock()
+
+    num_chunks = 0
+    sources = set()
+    sample_chunk = None
+
+    def fail(error):
+        with lock:
+            errors.append(error)
+        stop.set()
+
+    def put(target, item):
+        """Blocking put that gives up once the pipeline is stopping"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def embed_stage():
+        try:
+            while (item := get(to_embed)) is not _DONE:
+                batch_number, batch = item
+                print(f"Embedding batch {batch_number} of size {len(batch)}")
+                vectors = embed_with_retries([chunk.text for chunk in batch], tuner)  # float32 matrix, one row per chunk
+                if not put(to_store, (batch_number, batch, vectors)):
+                    return
+        except Exception as e:
+            fail(e)
+
+    def store_stage():
+        nonlocal num_chunks, sample_chunk
+        try:
+            while (item := get(to_store)) is not _DONE:
+                batch_number, batch, vectors = item
+                store_embeddings(batch, vectors, user_id=user_id, session_id=session_id, content_key=content_key)
+                with lock:
+                    if batch_number == 1:
+                        sample_chunk = sample_chunk_summary(batch[0], user_id, session_id)
+                    sources.update(chunk.document.source for chunk in batch)
+                    num_chunks += len(batch)
+                    if progress_callback:
+                        progress_callback(num_chunks)
+        except Exception as e:
+            fail(e)
+
+    # One thread per possible concurrent call; the tuner decides how many are active
+    embedders = [threading.Thread(target=embed_stage, daemon=True) for _ in range(tuner.max_concurrency)]
+    storers = [threading.Thread(target=store_stage, daemon=True) for _ in range(store_workers)]
+    for thread in embedders + storers:
+        thread.start()
+
+    try:
+        # Stage 1: chunking runs in the caller's thread and feeds the embedders
+        for batch_number, batch in enumerate(iter_batches(chunks, tuner.next_batch_size), start=1):
+            if not put(to_embed, (batch_number, batch)):
+                break
+    except Exception as e:
+        fail(e)
+    finally:
+        # Shut the stages down in order: all embedders finish before the storers are told to stop
+        for _ in embedders:
+            put(to_embed, _DONE)
+        for thread in embedders:
+            thread.join()
+        for _ in storers:
+            put(to_store, _DONE)
+        for thread in storers:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return {
+        "num_chunks": num_chunks,
+        "sources_processed": list(sources),
+        "sample_chunk": sample_chunk,
+        "embedding": tuner.finish(),
+    }
@@ -1,78 +1,155 @@
 import os
+from Ingestion.transcript_parser import parse_segment_line
+from Processing.chunker import iter_chunk_texts, effective_chunk_size
+from Processing.chunk_records import Chunk, DocumentMetadata
 
-def read_and_chunk_files(folder_path="./parsed_files", chunk_size=500, char_limit=2000):
+# Bump whenever chunking output changes; cached vectors from other versions are not reused
+CHUNKER_VERSION = "sentences-tokens-400-2000-40-v4"
+
+def chunker_key(chunk_size=400, char_limit=2000, overlap=40):
+    """Identifies chunking output: the chunker version plus the parameters it ran with"""
+    return f"{CHUNKER_VERSION}:{effective_chunk_size(chunk_size)}:{char_limit}:{overlap}"
+
+def document_vector_id(document_id, chunk_id):
+    """Stable vector id of a stored document's chunk, so re-chunking overwrites in place"""
+    return f"{document_id}#{chunk_id}"
+
+def iter_document_chunks(pieces, metadata, chunk_size=400, char_limit=2000, overlap=40):
     """
-    Reads .txt files, splits into chunks with metadata,
-    including source and URL/filename parsed from file header.
-    Supports both YouTube and PDF metadata formats.
+    Incrementally chunk a document that arrives in pieces (pages, lines, ...).
+    Chunks hold at most chunk_size model tokens and char_limit characters,
+    end on sentence (preferably paragraph) boundaries and repeat about
+    `overlap` tokens of the previous chunk; see Processing.chunker.
+    Pieces are strings, or {"text", "start"} transcript segments; for the
+    latter each chunk also gets the start_seconds of its first sentence.
+    `metadata` is a DocumentMetadata or a dict of its fields.
+    Yields Chunk records that all share one DocumentMetadata.
+    """
+    if not isinstance(metadata, DocumentMetadata):
+        metadata = DocumentMetadata.from_dict(metadata)
+    chunks = iter_chunk_texts(pieces, chunk_size=chunk_size, char_limit=char_limit, overlap=overlap)
+    for chunk_id, (chunk_text, start) in enumerate(chunks):
+        yield Chunk(metadata, chunk_id, chunk_text, start)
+
+def chunk_document(text, metadata, chunk_size=400, char_limit=2000, overlap=40):
+    """
+    Split a single document's text into sentence-aligned chunks.
+    Every chunk shares the document metadata and carries its own chunk_id and text.
     """
-    all_chunks = []
+    return list(iter_document_chunks([text], metadata, chunk_size=chunk_size, char_limit=char_limit, overlap=overlap))
 
+def _parse_header(lines):
+    """
+    Read the '### KEY: value' metadata header of a parsed file.
+    Stops at the first content line, which is returned alongside the metadata.
+    """
+    source = url = original_filename = original_path = user_id = ""
+    first_content_line = None
+
+    for line in lines:
+        if line.startswith("### SOURCE:"):
+            source = line.split(":", 1)[1].strip()
+        elif line.startswith("### URL:"):
+            url = line.split(":", 1)[1].strip()
+        elif line.startswith("### FILENAME:"):
+            original_filename = line.split(":", 1)[1].strip()
+        elif line.startswith("### ORIGINAL_PATH:"):
+            original_path = line.split(":", 1)[1].strip()
+        elif line.startswith("### USER_ID:"):
+            user_id = line.split(":", 1)[1].strip()
+        elif line.strip() and not line.startswith("###"):
+            first_content_line = line
+            break
+
+    metadata = {"source": source, "user_id": user_id}
+
+    # Add source-specific metadata
+    if source == "youtube":
+        metadata["url"] = url
+    elif source == "pdf":
+        metadata["original_filename"] = original_filename
+        metadata["original_path"] = original_path
+
+    return metadata, first_content_line
+
+def _file_metadata(file_path, header_metadata, metadata_overrides=None):
+    return DocumentMetadata.from_dict(
+        {"filename": os.path.basename(file_path), **header_metadata, **(metadata_overrides or {})}
+    )
+
+def iter_file_chunks(file_path, chunk_size=400, char_limit=2000, metadata_overrides=None, overlap=40):
+    """
+    Stream chunks out of one parsed .txt file, reading it line by line.
+    metadata_overrides (e.g. the indexed filename) replace header values.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        metadata, first_content_line = _parse_header(f)
+        metadata = _file_metadata(file_path, metadata, metadata_overrides)
+
+        def content_lines():
+            if first_content_line is not None:
+                yield first_content_line
+            for line in f:
+                if not line.startswith("###"):
+                    yield line
+
+        def transcript_segments():
+            # YouTube transcripts are stored as "[t=<seconds>] text" lines
+            for line in content_lines():
+                yield parse_segment_line(line)
+
+        pieces = transcript_segments() if metadata.source == "youtube" else content_lines()
+        yield from iter_document_chunks(pieces, metadata, chunk_size=chunk_size, char_limit=char_limit, overlap=overlap)
+
+def _stored_document_overrides(document):
+    overrides = {"content_key": document.get("content_key")}
+    if document.get("source_name"):
+        overrides["filename"] = f"{document['source_name']}.txt"
+    return overrides
+
+def stored_document_metadata(document):
+    """The DocumentMetadata the chunks of a stored document carry (only its header is read)"""
+    with open(document["file_path"], "r", encoding="utf-8") as f:
+        metadata, _ = _parse_header(f)
+    return _file_metadata(document["file_path"], metadata, _stored_document_overrides(document))
+
+def iter_stored_document_chunks(documents, chunk_size=400, char_limit=2000, vector_ids=None, overlap=40):
+    """
+    Stream chunks for parsed documents from the document store index
+    (rows of parsed_documents), one document at a time. Every chunk gets
+    a stable vector_id derived from its document id and chunk_id, and the
+    document's content registry key so its vectors are cached under it.
+    If vector_ids is given, it is filled with document id -> vector ids produced.
+    """
+    for document in documents:
+        overrides = _stored_document_overrides(document)
+        document_ids = vector_ids.setdefault(document["id"], []) if vector_ids is not None else None
+        for chunk in iter_file_chunks(document["file_path"], chunk_size, char_limit, overrides, overlap):
+            chunk.vector_id = document_vector_id(document["id"], chunk.chunk_id)
+            if document_ids is not None:
+                document_ids.append(chunk.vector_id)
+            yield chunk
+
+def iter_folder_chunks(folder_path="./parsed_files", chunk_size=400, char_limit=2000, overlap=40):
+    """
+    Stream chunks for every .txt file in the folder, one file at a time.
+    """
     for filename in os.listdir(folder_path):
         if filename.endswith(".txt"):
-            file_path = os.path.join(folder_path, filename)
-            with open(file_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            # Extract metadata from the top of the file
-            source = url = original_filename = original_path = ""
-            content_lines = []
-
-            for line in lines:
-                if line.startswith("### SOURCE:"):
-                    source = line.split(":", 1)[1].strip()
-                elif line.startswith("### URL:"):
-                    url = line.split(":", 1)[1].strip()
-                elif line.startswith("### FILENAME:"):
-                    original_filename = line.split(":", 1)[1].strip()
-                elif line.startswith("### ORIGINAL_PATH:"):
-                    original_path = line.split(":", 1)[1].strip()
-                elif line.startswith("### USER_ID:"):
-                    user_id = line.split(":", 1)[1].strip()
-                elif line.strip() and not line.startswith("###"):
-                    content_lines.append(line.strip())
-
-            text = " ".join(" ".join(content_lines).split())  # normalize whitespace
-            words = text.split()
-
-            i = 0
-            chunk_id = 0
-            while i < len(words):
-                chunk_words = words[i:i + chunk_size]
-                chunk_text = " ".join(chunk_words)
-
-                # Ensure under character limit
-                while len(chunk_text) > char_limit and len(chunk_words) > 10:
-                    chunk_words = chunk_words[:-10]
-                    chunk_text = " ".join(chunk_words)
-
-                if chunk_text.strip():
-                    chunk_metadata = {
-                        "filename": filename,
-                        "chunk_id": chunk_id,
-                        "text": chunk_text,
-                        "source": source,
-                        "type": "data",
-                        "user_id": user_id
-                    }
-                    
-                    # Add source-specific metadata
-                    if source == "youtube":
-                        chunk_metadata["url"] = url
-                    elif source == "pdf":
-                        chunk_metadata["original_filename"] = original_filename
-                        chunk_metadata["original_path"] = original_path
-                    
-                    all_chunks.append(chunk_metadata)
-
-                i += len(chunk_words)
-                chunk_id += 1
+            yield from iter_file_chunks(os.path.join(folder_path, filename), chunk_size=chunk_size, char_limit=char_limit, overlap=overlap)
 
+def read_and_chunk_files(folder_path="./parsed_files", chunk_size=400, char_limit=2000, overlap=40):
+    """
+    Reads .txt files, splits into chunks with metadata,
+    including source and URL/filename parsed from file header.
+    Supports both YouTube and PDF metadata formats.
+    """
+    all_chunks = list(iter_folder_chunks(folder_path, chunk_size=chunk_size, char_limit=char_limit, overlap=overlap))
     print(f"Total chunks: {len(all_chunks)}")
     return all_chunks
 
 if __name__ == "__main__":
     folder = "./parsed_files"
     chunks = read_and_chunk_files(folder)
-    print("Sample chunk text:\n", chunks[0]['text'][:500])
-    print("Sample chunk metadata:", {k: v for k, v in chunks[0].items() if k != 'text'})
+    print("Sample chunk text:\n", chunks[0].text[:500])
+    print("Sample chunk metadata:", {k: v for k, v in chunks[0].to_dict().items() if k != 'text'})
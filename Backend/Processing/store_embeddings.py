@@ -11,37 +11,110 @@ pinecone_api_key = os.getenv("PINECONE_API_KEY")
 # Initialize Pinecone client
 pinecone.init(api_key=pinecone_api_key, environment="gcp-starter")
 
-def store_embeddings(embeddings, user_id, session_id, index_name="chatbot-index"):
+# Shared namespace holding one copy of the vectors for every registered document/video
+CONTENT_CACHE_NAMESPACE = "__content_cache__"
+
+def cache_vector_id(content_key, chunk_id):
+    return f"{content_key}#{chunk_id}"
+
+def content_vector_id(content_key, chunk_id, user_id, session_id):
+    """
+    Vector id of a content chunk in a user's session, derived from the content
+    key, chunk index and namespace so that re-running an ingestion (a retried
+    job, a repeated upload) overwrites the same vectors instead of adding copies
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}/{session_id}/{cache_vector_id(content_key, chunk_id)}"))
+
+def store_embeddings(chunks, embeddings, user_id, session_id, index_name="chatbot-index", content_key=None):
     """
     Store embeddings in Pinecone index.
+    `chunks` are Chunk records and `embeddings` a float32 matrix with one row
+    per chunk; vectors and Pinecone metadata are converted to the client's
+    list/dict format only here.
+    Vectors are also written to the shared content cache namespace, under
+    their document's content_key (or the content_key argument), so duplicate
+    uploads can reuse them.
     """
     index = pinecone.Index(index_name)
     
     # Prepare vectors for upsert
     items = [
         {
-            "id": str(uuid.uuid4()), 
-            "values": emb["embedding"], 
-            "metadata": {
-                "text": emb["text"],
-                "url": emb.get("url", ""),
-                "filename": emb.get("filename", ""),
-                "chunk_id": emb.get("chunk_id", -1),
-                "source": emb.get("source", "unknown"),
-                "original_filename": emb.get("original_filename", ""),
-                "original_path": emb.get("original_path", ""),
-                "user_id": user_id,
-                "session_id": session_id,
-                "type": "embedding"
-            }
+            "id": chunk.vector_id or str(uuid.uuid4()),
+            "values": embedding.tolist(),
+            "metadata": chunk.vector_metadata(user_id, session_id)
         }
-        for emb in embeddings
+        for chunk, embedding in zip(chunks, embeddings)
     ]
 
     # Upsert vectors to user's namespace (namespace is created automatically)
     index.upsert(vectors=items, namespace=user_id)
     print(f"✅ Stored {len(items)} embeddings in index '{index_name}' namespace '{user_id}'")
 
+    cache_keys = [chunk.document.content_key or content_key for chunk in chunks]
+    cache_items = [
+        {
+            "id": cache_vector_id(cache_key, item["metadata"]["chunk_id"]),
+            "values": item["values"],
+            "metadata": {k: v for k, v in item["metadata"].items() if k not in ("user_id", "session_id")}
+        }
+        for cache_key, item in zip(cache_keys, items) if cache_key
+    ]
+    if cache_items:
+        index.upsert(vectors=cache_items, namespace=CONTENT_CACHE_NAMESPACE)
+
+def copy_cached_embeddings(content_key, num_chunks, user_id, session_id, metadata_overrides=None,
+                           index_name="chatbot-index", batch_size=100, vector_id=None):
+    """
+    Copy the cached vectors of already-ingested content into a user's namespace
+    instead of re-embedding it. Copies get deterministic ids (content_vector_id,
+    or vector_id(chunk_id) if given), so copying again overwrites them.
+
+    Returns:
+        Number of vectors copied (less than num_chunks if the cache is incomplete)
+    """
+    index = pinecone.Index(index_name)
+    metadata_overrides = metadata_overrides or {}
+    vector_id = vector_id or (lambda chunk_id: content_vector_id(content_key, chunk_id, user_id, session_id))
+    copied = 0
+
+    for start in range(0, num_chunks, batch_size):
+        chunk_ids = range(start, min(start + batch_size, num_chunks))
+        fetched = index.fetch(ids=[cache_vector_id(content_key, chunk_id) for chunk_id in chunk_ids],
+                              namespace=CONTENT_CACHE_NAMESPACE)
+        vectors = fetched.get("vectors", {})
+        cached = [(chunk_id, vectors.get(cache_vector_id(content_key, chunk_id))) for chunk_id in chunk_ids]
+
+        items = [
+            {
+                "id": vector_id(chunk_id),
+                "values": vector["values"],
+                "metadata": {
+                    **vector["metadata"],
+                    **metadata_overrides,
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "type": "embedding"
+                }
+            }
+            for chunk_id, vector in cached if vector is not None
+        ]
+        if items:
+            index.upsert(vectors=items, namespace=user_id)
+        copied += len(items)
+
+    print(f"♻️ Copied {copied}/{num_chunks} cached embeddings for '{content_key}' into namespace '{user_id}'")
+    return copied
+
+def delete_embeddings(vector_ids, user_id, index_name="chatbot-index", batch_size=1000):
+    """Delete vectors by id from a user's namespace"""
+    if not vector_ids:
+        return
+    index = pinecone.Index(index_name)
+    for start in range(0, len(vector_ids), batch_size):
+        index.delete(ids=vector_ids[start:start + batch_size], namespace=user_id)
+    print(f"🗑️ Deleted {len(vector_ids)} stale embeddings from namespace '{user_id}'")
+
 def create_index_if_not_exists(index_name="chatbot-index", dimension=1024):
     """
     Create Pinecone index if it doesn't exist.
@@ -11,14 +11,75 @@ class Settings:
     PGUSER: str = os.getenv("PGUSER")
     PGPASSWORD: str = os.getenv("PGPASSWORD")
     PGPORT: int = int(os.getenv("PGPORT", "5432"))
+
+    # Connection pool settings
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_MAX_QUERIES: int = int(os.getenv("DB_POOL_MAX_QUERIES", "50000"))  # Queries before a connection is replaced
+    DB_POOL_MAX_INACTIVE_SECONDS: float = float(os.getenv("DB_POOL_MAX_INACTIVE_SECONDS", "300"))
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # 0 disables (e.g. behind pgbouncer)
+    DB_COMMAND_TIMEOUT_SECONDS: float = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "30"))
+    DB_ACQUIRE_TIMEOUT_SECONDS: float = float(os.getenv("DB_ACQUIRE_TIMEOUT_SECONDS", "10"))
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+    # Read replicas: "host[:port],host[:port]" with the primary's database and credentials
+    DB_REPLICA_HOSTS: str = os.getenv("DB_REPLICA_HOSTS", "")
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))  # Laggier replicas get no reads
+    DB_REPLICA_LAG_CHECK_SECONDS: float = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "2"))
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))  # Reads stay on the primary after a write
     
+    # Render responses with orjson; list routes return database rows without re-validation
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
     # JWT settings
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-    
+
+    # Ingestion job queue settings
+    INGESTION_MAX_ATTEMPTS: int = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+    INGESTION_RETRY_BACKOFF_SECONDS: int = int(os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "10"))
+    INGESTION_LEASE_SECONDS: int = int(os.getenv("INGESTION_LEASE_SECONDS", "300"))
+    INGESTION_POLL_INTERVAL_SECONDS: float = float(os.getenv("INGESTION_POLL_INTERVAL_SECONDS", "2"))
+    INGESTION_WORKER_PROCESSES: int = int(os.getenv("INGESTION_WORKER_PROCESSES", "2"))
+
+    # PDF extraction settings
+    PDF_EXTRACTION_PROCESSES: int = int(os.getenv("PDF_EXTRACTION_PROCESSES", str(os.cpu_count() or 1)))
+    PDF_PARALLEL_PAGE_THRESHOLD: int = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "32"))
+
+    # YouTube transcript settings
+    TRANSCRIPT_CACHE_DIR: str = os.getenv("TRANSCRIPT_CACHE_DIR", "transcript_cache")
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    TRANSCRIPT_FETCH_TIMEOUT_SECONDS: float = float(os.getenv("TRANSCRIPT_FETCH_TIMEOUT_SECONDS", "30"))
+    # Per-request connect/read timeout of the transcript API and yt_dlp, so a
+    # stalled connection cannot hold a fetch thread long after the race gives up
+    TRANSCRIPT_SOCKET_TIMEOUT_SECONDS: float = float(os.getenv("TRANSCRIPT_SOCKET_TIMEOUT_SECONDS", "10"))
+    YOUTUBE_BULK_CONCURRENCY: int = int(os.getenv("YOUTUBE_BULK_CONCURRENCY", "8"))
+
+    # Embedding pipeline settings (threads per stage, batches buffered between stages)
+    EMBED_CONCURRENCY: int = int(os.getenv("EMBED_CONCURRENCY", "2"))  # Starting point; autotuned
+    EMBED_MAX_CONCURRENCY: int = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+    EMBED_MIN_BATCH_SIZE: int = int(os.getenv("EMBED_MIN_BATCH_SIZE", "8"))
+    EMBED_MAX_BATCH_SIZE: int = int(os.getenv("EMBED_MAX_BATCH_SIZE", "96"))  # Cohere's per-call text limit
+    EMBED_MAX_RETRIES: int = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+    # A hung Cohere call raises requests.Timeout (retried) instead of blocking an embed thread
+    EMBED_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("EMBED_REQUEST_TIMEOUT_SECONDS", "30"))
+    UPSERT_CONCURRENCY: int = int(os.getenv("UPSERT_CONCURRENCY", "2"))
+    EMBED_PIPELINE_QUEUE_DEPTH: int = int(os.getenv("EMBED_PIPELINE_QUEUE_DEPTH", "4"))
+
     @property
     def database_url(self) -> str:
         return f"postgresql://{self.PGUSER}:{self.PGPASSWORD}@{self.PGHOST}:{self.PGPORT}/{self.PGDATABASE}"
 
+    @property
+    def replica_hosts(self) -> list:
+        """[(host, port)] parsed from DB_REPLICA_HOSTS"""
+        hosts = []
+        for entry in self.DB_REPLICA_HOSTS.split(","):
+            entry = entry.strip()
+            if entry:
+                host, _, port = entry.partition(":")
+                hosts.append((host, int(port or self.PGPORT)))
+        return hosts
+
 settings = Settings() 
\ No newline at end of file
@@ -1,11 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from auth.routes import router as auth_router
 from routes.health import router as health_router
 from routes.ingestion import router as ingestion_router
+from routes.ingestion_jobs import router as ingestion_jobs_router
 from routes.processing import router as processing_router
 from routes.llm import router as llm_router
 from Database.connection import db
+from config import settings
+from routes.responses import FastJSONResponse
 from routes.handle_session import router as handle_session_router
 from routes.study_sessions import router as study_sessions_router
 from routes.session_results import router as session_results_router
@@ -14,7 +18,8 @@ from routes.user_profile import router as user_profile_router
 app = FastAPI(
     title="PDF & YouTube Knowledge Base API",
     description="API for processing PDFs, YouTube videos, and querying with LLM",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
 )
 
 app.add_middleware(
@@ -23,6 +28,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor of list endpoints
 )
 
 # Database lifecycle events
@@ -48,6 +54,7 @@ async def shutdown_event():
 app.include_router(health_router, tags=["Health"])
 app.include_router(auth_router, tags=["Authentication"])
 app.include_router(ingestion_router, tags=["Content Ingestion"])
+app.include_router(ingestion_jobs_router, tags=["Ingestion Jobs"])
 app.include_router(processing_router, tags=["Text Processing"])
 app.include_router(llm_router, tags=["LLM Queries"])
 app.include_router(handle_session_router, tags=["Session Management"])
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from Database.connection import db
+from routes.pagination import page_size, keyset_filter, paginate
+from routes.responses import trusted_response
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import uuid
@@ -46,6 +48,7 @@ async def create_session(request: CreateSessionRequest):
                 "INSERT INTO sessions (session_id, user_id, created_at, title, topic, is_active) VALUES ($1, $2, $3, $4, $5, $6)",
                 session_id, request.user_id, datetime.now(), request.title, request.topic, True
             )
+            await db.record_write(conn, request.user_id)
         
         return {"session_id": session_id, "success": True}
     except Exception as e:
@@ -59,10 +62,11 @@ async def update_session_topic(request: UpdateSessionTopicRequest):
     try:
         # Use async database connection
         async with db.get_connection() as conn:
-            await conn.execute(
-                "UPDATE sessions SET topic = $1 WHERE session_id = $2", 
+            user_id = await conn.fetchval(
+                "UPDATE sessions SET topic = $1 WHERE session_id = $2 RETURNING user_id", 
                 request.topic, request.session_id
             )
+            await db.record_write(conn, user_id)
         
         return {"success": True, "message": "Session topic updated"}
     except Exception as e:
@@ -76,12 +80,13 @@ async def delete_session(request: DeleteSessionRequest):
     try:
         # Use async database connection
         async with db.get_connection() as conn:
-            result = await conn.execute(
-                "UPDATE sessions SET is_active = false WHERE session_id = $1",
+            user_id = await conn.fetchval(
+                "UPDATE sessions SET is_active = false WHERE session_id = $1 RETURNING user_id",
                 request.session_id
             )
+            await db.record_write(conn, user_id)
         
-        if result == "UPDATE 0":
+        if user_id is None:
             raise HTTPException(status_code=404, detail="Session not found")
         
         return {"success": True, "message": "Session deleted successfully"}
@@ -92,60 +97,45 @@ async def delete_session(request: DeleteSessionRequest):
         raise HTTPException(status_code=500, detail=f"Error deleting session: {str(e)}")
 
 @router.get("/user/{user_id}/sessions", response_model=List[SessionResponse])
-async def get_user_sessions(user_id: str):
+async def get_user_sessions(user_id: str, response: Response, limit: int = None, cursor: str = None):
     """
-    Get all active chat sessions for a specific user.
+    Get active chat sessions for a specific user, newest first, one page at a time.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
     """
     try:
         print(f"🔍 Fetching sessions for user: {user_id}")
+        limit = page_size(limit)
+        keyset, keyset_args = keyset_filter(cursor, "created_at", "id", 2)
         
-        async with db.get_connection() as conn:
-            # First check if user exists and count total sessions
-            total_sessions = await conn.fetchval(
-                "SELECT COUNT(*) FROM sessions WHERE user_id = $1",
-                user_id
-            )
-            print(f"📊 Total sessions for user {user_id}: {total_sessions}")
-            
-            active_sessions = await conn.fetchval(
-                "SELECT COUNT(*) FROM sessions WHERE user_id = $1 AND is_active = true",
-                user_id
-            )
-            print(f"📊 Active sessions for user {user_id}: {active_sessions}")
-            
+        async with db.get_read_connection(user_id) as conn:
             sessions = await conn.fetch(
-                """
-                SELECT session_id, user_id, title, topic, created_at, is_active
+                f"""
+                SELECT id, session_id, user_id, title, topic, created_at, is_active
                 FROM sessions 
-                WHERE user_id = $1 AND is_active = true
-                ORDER BY created_at DESC
+                WHERE user_id = $1 AND is_active = true {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ${len(keyset_args) + 2}
                 """,
-                user_id
+                user_id, *keyset_args, limit + 1
             )
-            
-            print(f"📋 Raw sessions from database: {len(sessions)} sessions")
-            for i, session in enumerate(sessions):
-                print(f"  Session {i+1}:")
-                print(f"    ID: {session['session_id']}")
-                print(f"    User: {session['user_id']}")
-                print(f"    Title: {session['title']}")
-                print(f"    Topic: {session['topic']}")
-                print(f"    Created: {session['created_at']}")
-                print(f"    Active: {session['is_active']}")
         
         result = []
-        for session in sessions:
-            session_dict = dict(session)
-            # Convert UUID objects to strings
-            session_dict['session_id'] = str(session_dict['session_id'])
-            session_dict['user_id'] = str(session_dict['user_id'])
-            # Handle None values for title and topic
-            session_dict['title'] = session_dict['title'] or session_dict['topic'] or 'New Chat'
-            session_dict['topic'] = session_dict['topic'] or 'New Chat'
-            result.append(session_dict)
+        for session in paginate(sessions, limit, response, "created_at"):
+            result.append({
+                # Convert UUID objects to strings
+                "session_id": str(session['session_id']),
+                "user_id": str(session['user_id']),
+                # Handle None values for title and topic
+                "title": session['title'] or session['topic'] or 'New Chat',
+                "topic": session['topic'] or 'New Chat',
+                "created_at": session['created_at'],
+                "is_active": session['is_active'],
+            })
             
         print(f"✅ Returning {len(result)} sessions to frontend")
-        return result
+        return trusted_response(result, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching user sessions: {e}")
         import traceback
@@ -153,27 +143,36 @@ async def get_user_sessions(user_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching sessions: {str(e)}")
 
 @router.get("/session/{session_id}/messages", response_model=List[MessageResponse])
-async def get_session_messages(session_id: str):
+async def get_session_messages(session_id: str, response: Response, limit: int = None, cursor: str = None):
     """
-    Get all messages for a specific session.
+    Get the messages of a specific session in chronological order.
+    Pages run backwards from the newest message: the first page holds the
+    latest messages and the X-Next-Cursor header (passed back as `cursor`)
+    fetches the ones before them.
     """
     try:
-        async with db.get_connection() as conn:
+        limit = page_size(limit)
+        keyset, keyset_args = keyset_filter(cursor, "timestamp", "id", 2)
+
+        async with db.get_read_connection(session_id) as conn:
             messages = await conn.fetch(
-                """
-                SELECT role, content, timestamp
+                f"""
+                SELECT id, role, content, timestamp
                 FROM messages 
-                WHERE session_id = $1
-                ORDER BY timestamp ASC
+                WHERE session_id = $1 {keyset}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ${len(keyset_args) + 2}
                 """,
-                session_id
+                session_id, *keyset_args, limit + 1
             )
         
-        result = []
-        for message in messages:
-            message_dict = dict(message)
-            result.append(message_dict)
-        return result
+        page = paginate(messages, limit, response, "timestamp")
+        return trusted_response(
+            [{"role": m['role'], "content": m['content'], "timestamp": m['timestamp']} for m in reversed(page)],
+            response
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching session messages: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching messages: {str(e)}")
@@ -1,4 +1,6 @@
 from fastapi import APIRouter
+from Processing.autotune import last_run_metrics
+from Database.connection import db
 
 router = APIRouter()
 
@@ -14,9 +16,10 @@ async def root():
         "version": "1.0.0",
         "status": "healthy",
         "endpoints": {
-            "health": "/health",
+            "health": ["/health", "/health/embedding", "/health/database"],
             "llm": "/query-llm",
-            "ingestion": ["/process_youtube_video/", "/process_pdf/", "/validate_pdf/"],
+            "ingestion": ["/process_youtube_video/", "/process_youtube_videos/", "/process_pdf/", "/validate_pdf/"],
+            "ingestion_jobs": ["/ingestion-jobs/pdf", "/ingestion-jobs/youtube", "/ingestion-jobs/{job_id}"],
             "processing": ["/content_to_embeddings/", "/youtube_to_embeddings_legacy/"],
             "sessions": ["/create_session", "/update_session_topic"]
         }
@@ -28,4 +31,21 @@ async def health_check():
     """
     Health check endpoint for monitoring and load balancers.
     """
-    return {"status": "healthy", "message": "API is operational"} 
\ No newline at end of file
+    return {"status": "healthy", "message": "API is operational"}
+
+@router.get("/health/embedding")
+async def embedding_metrics():
+    """
+    Batch size, concurrency and throughput the embedding autotuner used in
+    its most recent run.
+    """
+    return {"last_run": last_run_metrics() or None}
+
+@router.get("/health/database")
+async def database_metrics():
+    """
+    Connection pool gauges (size, in use, idle, waiting), acquisition-wait and
+    query-duration histograms, timeouts and slow-query counts, reads served by
+    the primary / replicas, and each read replica's lag and availability.
+    """
+    return db.pool_metrics()
@@ -1,114 +1,188 @@
 from fastapi import APIRouter, UploadFile, File, Body
-from Ingestion.yt_handler import process_youtube_video
-from Ingestion.pdf_handler import process_pdf_file, validate_pdf_file
-import os
-import tempfile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+from Ingestion.yt_handler import process_youtube_video, resolve_video_urls, fetch_video_id
+from config import settings
+from Ingestion.pdf_handler import process_pdf_bytes, validate_pdf_bytes
+from Ingestion.document_store import ParsedDocumentDB, new_document_path
+from Ingestion.content_registry import content_key_for_bytes, content_key_for_video
+from pathlib import Path
+import asyncio
+import json
 
 router = APIRouter()
 
+MAX_PDF_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_READ_SIZE = 1024 * 1024  # 1MB reads
+
+class BulkYouTubeRequest(BaseModel):
+    urls: List[str]  # Video and/or playlist URLs
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    max_concurrency: int = settings.YOUTUBE_BULK_CONCURRENCY
+
+async def store_youtube_transcript(url: str, user_id: Optional[str], session_id: Optional[str]):
+    """
+    Fetch a transcript into the user's session partition of the parsed-content
+    store and index it as pending. Returns (transcript, document).
+    """
+    video_id = fetch_video_id(url)
+    document_id, output_path = new_document_path(user_id, session_id)
+    transcript = await asyncio.to_thread(process_youtube_video, url, output_path)
+    document = await ParsedDocumentDB.register(
+        document_id, user_id, session_id, "youtube", output_path, source_name=video_id, source_url=url,
+        content_key=content_key_for_video(video_id)
+    )
+    return transcript, document
+
 @router.get("/process_youtube_video/")
-async def process_youtube_video_endpoint(url: str):
+async def process_youtube_video_endpoint(url: str, user_id: str = None, session_id: str = None):
     """
-    Endpoint to process a YouTube video URL and save the transcript to parsed_files.
+    Endpoint to process a YouTube video URL and save the transcript to the
+    user's session partition of parsed_files.
     """
     try:
-        transcript = process_youtube_video(url) 
+        transcript, document = await store_youtube_transcript(url, user_id, session_id)
         return {
             "success": True,
             "message": "YouTube video processed and saved to parsed_files",
+            "document_id": str(document['id']),
             "transcript_length": len(transcript)
         }
     except Exception as e:
         return {"error": str(e)}
 
+@router.post("/process_youtube_videos/")
+async def process_youtube_videos_endpoint(request: BulkYouTubeRequest):
+    """
+    Bulk version of /process_youtube_video/ for course onboarding.
+    Accepts video and playlist URLs, fetches transcripts with bounded concurrency
+    and streams one NDJSON line per video as it finishes, followed by a summary line.
+    """
+    try:
+        videos = await asyncio.to_thread(resolve_video_urls, request.urls)
+    except Exception as e:
+        return {"error": f"Could not resolve videos: {str(e)}"}
+
+    concurrency = max(1, min(request.max_concurrency, settings.YOUTUBE_BULK_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process_one(video_id, url):
+        async with semaphore:
+            try:
+                transcript, document = await store_youtube_transcript(url, request.user_id, request.session_id)
+                return {"video_id": video_id, "url": url, "success": True, "document_id": str(document['id']),
+                        "transcript_length": len(transcript)}
+            except Exception as e:
+                return {"video_id": video_id, "url": url, "success": False, "error": str(e)}
+
+    async def stream_progress():
+        yield json.dumps({"type": "resolved", "total": len(videos), "concurrency": concurrency}) + "\n"
+        succeeded = 0
+        tasks = [asyncio.create_task(process_one(video_id, url)) for video_id, url in videos]
+        try:
+            for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+                result = await task
+                succeeded += result["success"]
+                yield json.dumps({"type": "video", "completed": done, "total": len(videos), **result}) + "\n"
+        finally:
+            # Client disconnected: stop videos that have not started yet
+            for task in tasks:
+                task.cancel()
+        yield json.dumps({"type": "summary", "total": len(videos), "succeeded": succeeded,
+                          "failed": len(videos) - succeeded}) + "\n"
+
+    return StreamingResponse(stream_progress(), media_type="application/x-ndjson")
+
+async def read_upload(file: UploadFile, max_size: int):
+    """
+    Read an upload into memory using large buffered reads.
+    Returns None if the upload exceeds max_size.
+    """
+    buffer = bytearray()
+    while chunk := await file.read(UPLOAD_READ_SIZE):
+        buffer += chunk
+        if len(buffer) > max_size:
+            return None
+    return bytes(buffer)
+
 @router.post("/process_pdf/")
 async def process_pdf_endpoint(
     file: UploadFile = File(...),
     source_name: str = Body(None),
-    user_id: str = Body(None)
+    user_id: str = Body(None),
+    session_id: str = Body(None)
 ):
     """
-    Endpoint to process an uploaded PDF file and save the text to parsed_files.
+    Endpoint to process an uploaded PDF file and save the text to the user's
+    session partition of parsed_files, indexed as a pending document.
+    The upload is kept in memory and parsed once for validation and extraction.
     """
-    temp_path = None
     try:
         # Validate file type
         if not file.filename.lower().endswith('.pdf'):
             return {"error": "File must be a PDF (filename must end with .pdf)"}
         
-        # Check file size (limit to 10MB for safety)
-        file_size = 0
-        
-        # Create temporary file to save uploaded PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_path = temp_file.name
-            
-            # Stream file content and count bytes
-            while chunk := await file.read(1024):  # Read in 1KB chunks
-                file_size += len(chunk)
-                
-                # Check size limit (10MB = 10 * 1024 * 1024 bytes)
-                if file_size > 10 * 1024 * 1024:
-                    temp_file.close()
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                    return {"error": "File too large. Maximum size is 10MB."}
-                
-                temp_file.write(chunk)
-        
-        try:
-            # Process the PDF
-            text = process_pdf_file(temp_path, source_name,user_id)
-            
-            return {
-                "success": True,
-                "message": "PDF processed and saved to parsed_files",
-                "filename": file.filename,
-                "file_size_mb": round(file_size / (1024 * 1024), 2),
-                "text_length": len(text),
-                "preview": text[:200] + "..." if len(text) > 200 else text
-            }
-        except ValueError as ve:
-            # PDF-specific validation errors
-            return {"error": f"PDF processing error: {str(ve)}"}
-        except Exception as e:
-            # Other unexpected errors
-            return {"error": f"Unexpected error during PDF processing: {str(e)}"}
-        finally:
-            # Always clean up temporary file
-            if temp_path and os.path.exists(temp_path):
-                os.unlink(temp_path)
-            
+        # Read upload into memory, enforcing the size limit as we go
+        pdf_bytes = await read_upload(file, MAX_PDF_SIZE)
+        if pdf_bytes is None:
+            return {"error": "File too large. Maximum size is 10MB."}
+        file_size = len(pdf_bytes)
     except Exception as e:
         # Handle file upload errors
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path)
         return {"error": f"File upload error: {str(e)}"}
+    
+    try:
+        # Process the PDF off the event loop (extraction fans out to a process pool)
+        source_name = source_name or Path(file.filename).stem
+        document_id, output_path = new_document_path(user_id, session_id)
+        text = await asyncio.to_thread(
+            process_pdf_bytes, pdf_bytes, output_path, source_name, user_id, file.filename
+        )
+        document = await ParsedDocumentDB.register(
+            document_id, user_id, session_id, "pdf", output_path, source_name=source_name,
+            content_key=content_key_for_bytes(pdf_bytes)
+        )
+        
+        return {
+            "success": True,
+            "message": "PDF processed and saved to parsed_files",
+            "document_id": str(document['id']),
+            "filename": file.filename,
+            "file_size_mb": round(file_size / (1024 * 1024), 2),
+            "text_length": len(text),
+            "preview": text[:200] + "..." if len(text) > 200 else text
+        }
+    except ValueError as ve:
+        # PDF-specific validation errors
+        return {"error": f"PDF processing error: {str(ve)}"}
+    except Exception as e:
+        # Other unexpected errors
+        return {"error": f"Unexpected error during PDF processing: {str(e)}"}
 
 @router.post("/validate_pdf/")
 async def validate_pdf_endpoint(file: UploadFile = File(...)):
     """
     Endpoint to validate if an uploaded file is a readable PDF without processing it.
     """
-    temp_path = None
     try:
         # Basic validation
         if not file.filename.lower().endswith('.pdf'):
             return {"valid": False, "error": "File must be a PDF"}
         
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_path = temp_file.name
-            while chunk := await file.read(1024):
-                temp_file.write(chunk)
+        pdf_bytes = await read_upload(file, MAX_PDF_SIZE)
+        if pdf_bytes is None:
+            return {"valid": False, "error": "File too large. Maximum size is 10MB.", "filename": file.filename}
         
-        # Validate PDF structure
-        validate_pdf_file(temp_path)
+        # Validate PDF structure from memory
+        page_count = validate_pdf_bytes(pdf_bytes)
         
         return {
             "valid": True, 
             "message": "PDF is valid and readable",
-            "filename": file.filename
+            "filename": file.filename,
+            "page_count": page_count
         }
         
     except Exception as e:
@@ -117,6 +191,3 @@ async def validate_pdf_endpoint(file: UploadFile = File(...)):
             "error": str(e),
             "filename": file.filename
         }
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path) 
\ No newline at end of file
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, UploadFile, File, Body, HTTPException
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+from Ingestion.job_queue import IngestionJobDB
+from Ingestion.yt_handler import fetch_video_id
+from routes.ingestion import read_upload, MAX_PDF_SIZE
+
+router = APIRouter(prefix="/ingestion-jobs", tags=["ingestion-jobs"])
+
+class YouTubeJobRequest(BaseModel):
+    url: str
+    user_id: str
+    session_id: str
+
+class IngestionJobResponse(BaseModel):
+    id: int
+    job_type: str
+    user_id: str
+    session_id: str
+    source_name: Optional[str] = None
+    source_url: Optional[str] = None
+    status: str
+    stage: str
+    progress: float
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    run_after: datetime
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+@router.post("/pdf", response_model=Dict[str, Any])
+async def enqueue_pdf_job(
+    file: UploadFile = File(...),
+    user_id: str = Body(...),
+    session_id: str = Body(...),
+    source_name: str = Body(None)
+):
+    """
+    Queue an uploaded PDF for extraction, chunking, embedding and storage.
+    Returns a job id immediately; poll /ingestion-jobs/{job_id} for progress.
+    """
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF (filename must end with .pdf)")
+
+    payload = await read_upload(file, MAX_PDF_SIZE)
+    if payload is None:
+        raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB.")
+    if not payload.startswith(b'%PDF'):
+        raise HTTPException(status_code=400, detail="File is not a valid PDF (missing PDF header)")
+
+    try:
+        job_id = await IngestionJobDB.enqueue(
+            "pdf", user_id, session_id, source_name=source_name or file.filename, payload=payload
+        )
+        return {"success": True, "job_id": job_id, "status": "pending"}
+    except Exception as e:
+        print(f"❌ Error enqueuing PDF job: {e}")
+        raise HTTPException(status_code=500, detail=f"Error enqueuing PDF job: {str(e)}")
+
+@router.post("/youtube", response_model=Dict[str, Any])
+async def enqueue_youtube_job(request: YouTubeJobRequest):
+    """
+    Queue a YouTube video for transcript fetching, chunking, embedding and storage.
+    Returns a job id immediately; poll /ingestion-jobs/{job_id} for progress.
+    """
+    try:
+        video_id = fetch_video_id(request.url)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    try:
+        job_id = await IngestionJobDB.enqueue(
+            "youtube", request.user_id, request.session_id, source_name=video_id, source_url=request.url
+        )
+        return {"success": True, "job_id": job_id, "status": "pending"}
+    except Exception as e:
+        print(f"❌ Error enqueuing YouTube job: {e}")
+        raise HTTPException(status_code=500, detail=f"Error enqueuing YouTube job: {str(e)}")
+
+@router.get("/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: int):
+    """
+    Get status, stage, progress and result of an ingestion job.
+    """
+    try:
+        job = await IngestionJobDB.get_job(job_id)
+    except Exception as e:
+        print(f"❌ Error fetching ingestion job: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching ingestion job: {str(e)}")
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
@@ -0,0 +1,65 @@
+"""
+Keyset pagination helpers for list endpoints.
+
+Pages are ordered by (timestamp, id) and continue from the last row of the
+previous page (WHERE (ts, id) < (cursor_ts, cursor_id)), so every page is an
+index range scan of the same cost no matter how deep the client has paged.
+Cursors are opaque to clients: base64url-encoded JSON of the last row's key.
+
+List bodies are unchanged (a JSON array); the cursor of the next page, if
+there is one, is returned in the X-Next-Cursor response header.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def page_size(limit: Optional[int], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    return max(1, min(limit or default, MAX_PAGE_SIZE))
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    payload = json.dumps({"t": timestamp.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[datetime], Optional[int]]:
+    """Return the (timestamp, id) key a page continues after, or (None, None) for the first page"""
+    if not cursor:
+        return None, None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def paginate(rows, limit: int, response: Response, timestamp_key: str, id_key: str = "id"):
+    """
+    Trim rows fetched with LIMIT limit + 1 to one page and set the next-page
+    cursor header when more rows exist.
+    """
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last[timestamp_key], last[id_key])
+    return rows
+
+def keyset_filter(cursor: Optional[str], timestamp_column: str, id_column: str, first_param: int,
+                  descending: bool = True):
+    """
+    SQL condition continuing after `cursor`, as (fragment, args).
+    The fragment starts with AND and uses placeholders $first_param and
+    $first_param+1; both are empty for the first page.
+    """
+    cursor_timestamp, cursor_id = decode_cursor(cursor)
+    if cursor_timestamp is None:
+        return "", []
+    operator = "<" if descending else ">"
+    fragment = f"AND ({timestamp_column}, {id_column}) {operator} (${first_param}, ${first_param + 1})"
+    return fragment, [cursor_timestamp, cursor_id]
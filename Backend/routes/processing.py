@@ -1,76 +1,118 @@
+import asyncio
+import os
 from fastapi import APIRouter, Body
 from pydantic import BaseModel
-from Processing.read_and_chunk import read_and_chunk_files
-from Processing.embed import embed_text
-from Processing.store_embeddings import store_embeddings
+from typing import Optional
+from Processing.read_and_chunk import (
+    iter_stored_document_chunks, stored_document_metadata, document_vector_id, chunker_key
+)
+from Processing.ingest_pipeline import embed_and_store_chunks
+from Processing.store_embeddings import delete_embeddings
+from Ingestion.document_store import ParsedDocumentDB
+from Ingestion.content_registry import ContentRegistryDB, reuse_registered_content
 from Ingestion.yt_handler import process_youtube_video
 
 router = APIRouter()
 
+CHAR_LIMIT = 2000  # Hard cap on chunk length in characters
+
 class ContentToEmbeddingsRequest(BaseModel):
-    chunk_size: int = 500
-    batch_size: int = 64
+    chunk_size: int = 400  # Model tokens per chunk, capped at Processing.chunker.MAX_CHUNK_TOKENS
+    chunk_overlap: int = 40  # Tokens repeated from the previous chunk
+    batch_size: Optional[int] = None  # Initial embedding batch size; tuned during the run
     user_id: str
     session_id: str
 
 @router.post("/content_to_embeddings/")
 async def content_to_embeddings(request: ContentToEmbeddingsRequest):
     """
-    Process all content in parsed_files folder:
-    - Read and chunk all files in parsed_files
-    - Embed chunks in batches
-    - Store embeddings to Pinecone
+    Embed the session's new or changed parsed documents:
+    - Look up the session's documents and their chunk manifests in the parsed-content store index
+    - Skip documents already chunked from the same content with the same chunker settings
+    - Copy cached vectors for documents whose source was already embedded elsewhere
+      with the same chunker settings (content registry)
+    - Stream chunks out of the remaining files only
+    - Embed chunks in batches and store each batch to Pinecone as soon as it is embedded
+    - Record the new manifests and delete vectors the re-chunked documents no longer have
     
     This route assumes content has already been ingested via 
     /process_youtube_video/ or /process_pdf/ routes.
     """
     try:
         print("recieved req",request)
-        # Step 1: Chunk all files in parsed_files
-        chunks = read_and_chunk_files(folder_path="./parsed_files", chunk_size=request.chunk_size)
-        print(f"Chunks created: {len(chunks)}")
-        
-        if not chunks:
-            return {"error": "No content found in parsed_files. Please ingest content first."}
+        key = chunker_key(request.chunk_size, CHAR_LIMIT, request.chunk_overlap)
+
+        # Step 1: Find this session's documents that need (re-)chunking
+        documents = []
+        up_to_date = 0
+        for document in await ParsedDocumentDB.list_for_chunking(request.user_id, request.session_id, key):
+            if not document['needs_chunking']:
+                up_to_date += 1
+            elif os.path.exists(document['file_path']):
+                documents.append(document)
+            else:
+                await ParsedDocumentDB.mark_failed(document['id'], "Parsed file is missing")
+
+        if not documents:
+            if up_to_date:
+                return {"success": True, "num_chunks": 0, "documents_processed": 0,
+                        "documents_up_to_date": up_to_date, "sources_processed": [], "sample_chunk": None}
+            return {"error": "No content found for this session. Please ingest content first."}
 
-        # Step 2: Embed in batches
-        embeddings_with_metadata = []
-        for i in range(0, len(chunks), request.batch_size):
-            batch = chunks[i:i + request.batch_size]
-            texts = [chunk["text"] for chunk in batch]
-            print(f"Embedding batch {i//request.batch_size+1} of size {len(texts)}")
-            batch_embeddings = embed_text(texts)
+        # Step 2: Reuse the cached vectors of content that was already embedded
+        vector_ids = {}
+        reused, to_embed = [], []
+        for document in documents:
+            copied = None
+            if document['content_key']:
+                metadata = await asyncio.to_thread(stored_document_metadata, document)
+                copied = await reuse_registered_content(
+                    document['content_key'], key, request.user_id, request.session_id, metadata.to_dict(),
+                    vector_id=lambda chunk_id, document_id=document['id']: document_vector_id(document_id, chunk_id)
+                )
+            if copied is None:
+                to_embed.append(document)
+            else:
+                reused.append(document)
+                vector_ids[document['id']] = [document_vector_id(document['id'], chunk_id) for chunk_id in range(copied)]
 
-            for chunk, embedding in zip(batch, batch_embeddings):
-                embedding_entry = {
-                    "chunk_id": chunk["chunk_id"],
-                    "filename": chunk.get("filename"),
-                    "source": chunk.get("source"),
-                    "text": chunk["text"],
-                    "user_id": request.user_id,
-                    "session_id": request.session_id,
-                    "embedding": embedding["embedding"],
-                }
-                
-                # Add source-specific metadata
-                if chunk.get("source") == "youtube":
-                    embedding_entry["url"] = chunk.get("url", "")
-                elif chunk.get("source") == "pdf":
-                    embedding_entry["original_filename"] = chunk.get("original_filename", "")
-                    embedding_entry["original_path"] = chunk.get("original_path", "")
-                
-                embeddings_with_metadata.append(embedding_entry)
+        # Step 3: Stream chunks and embed/store each batch as soon as it fills (off the event loop)
+        summary = {"num_chunks": 0, "sources_processed": [], "sample_chunk": None}
+        if to_embed:
+            chunks = iter_stored_document_chunks(
+                to_embed, chunk_size=request.chunk_size, char_limit=CHAR_LIMIT,
+                vector_ids=vector_ids, overlap=request.chunk_overlap
+            )
+            summary = await asyncio.to_thread(
+                embed_and_store_chunks, chunks, request.user_id, request.session_id, request.batch_size
+            )
+            for document in to_embed:
+                if document['content_key'] and vector_ids.get(document['id']):
+                    await ContentRegistryDB.register(
+                        document['content_key'], document['source'], document['source_name'], key,
+                        len(vector_ids[document['id']])
+                    )
+        num_copied = sum(len(vector_ids[document['id']]) for document in reused)
+        summary["num_chunks"] += num_copied
+        summary["sources_processed"] = sorted(
+            set(summary["sources_processed"]) | {document['source'] for document in reused}
+        )
+        print(f"Chunks embedded and stored: {summary['num_chunks'] - num_copied}, copied from cache: {num_copied}")
 
-        # Step 3: Store to Pinecone
-        store_embeddings(embeddings_with_metadata, user_id=request.user_id,session_id=request.session_id)
+        # Step 4: Record manifests, then drop vectors of chunks that no longer exist
+        await ParsedDocumentDB.mark_embedded(documents, key, vector_ids)
+        stale_ids = [
+            vector_id
+            for document in documents
+            for vector_id in set(document['previous_vector_ids']) - set(vector_ids.get(document['id'], []))
+        ]
+        await asyncio.to_thread(delete_embeddings, stale_ids, request.user_id)
 
-        return {
-            "success": True,
-            "num_chunks": len(embeddings_with_metadata),
-            "sources_processed": list(set(chunk.get("source", "unknown") for chunk in chunks)),
-            "sample_chunk": {k: v for k, v in embeddings_with_metadata[0].items() if k != "embedding"} if embeddings_with_metadata else None
-        }
+        if not summary["num_chunks"]:
+            return {"error": "No content found in the session's documents. Please ingest content first."}
+
+        return {"success": True, "documents_processed": len(documents), "documents_deduplicated": len(reused),
+                "documents_up_to_date": up_to_date, **summary}
 
     except Exception as e:
         return {"error": str(e)}
-
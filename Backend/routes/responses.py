@@ -0,0 +1,36 @@
+"""
+Fast JSON responses.
+
+FastJSONResponse renders with orjson instead of the stdlib encoder and is the
+app's default response class while settings.FAST_JSON_RESPONSES is on.
+
+Routes whose output comes straight from database rows already shaped like
+their response_model can opt in to skipping FastAPI's response handling
+(model validation plus jsonable_encoder) by returning trusted_response(...).
+The response_model stays on the route for the OpenAPI schema.
+"""
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from config import settings
+
+def _default(value):
+    # NUMERIC columns arrive as Decimal; response models expose them as floats
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def trusted_response(content: Any, response: Response):
+    """
+    Return content as-is, without re-validating it against the response_model.
+    Headers set on the injected `response` (e.g. X-Next-Cursor) are kept.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    return FastJSONResponse(content, status_code=response.status_code or 200, headers=dict(response.headers))
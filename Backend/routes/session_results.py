@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from Database.connection import db
+from routes.pagination import page_size, keyset_filter, paginate
+from routes.responses import trusted_response
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-import json
 
 router = APIRouter(prefix="/session-results", tags=["session-results"])
 
+# Columns of SessionResultResponse (study_session_id is exposed as a string)
+RESULT_COLUMNS = """
+    id, study_session_id::text AS study_session_id, user_id, session_type, session_name,
+    total_questions, correct_answers, incorrect_answers, skipped_answers,
+    accuracy_percentage, time_spent_seconds, difficulty_breakdown, detailed_results,
+    completed_at, created_at
+"""
+
 class CreateSessionResultRequest(BaseModel):
     study_session_id: str  # Changed to str to support both numeric IDs and AI-generated hashes
     user_id: str
@@ -71,11 +80,12 @@ async def create_session_result(request: CreateSessionResultRequest):
                 request.skipped_answers,
                 request.accuracy_percentage,
                 request.time_spent_seconds,
-                json.dumps(request.difficulty_breakdown) if request.difficulty_breakdown else None,
-                json.dumps(request.detailed_results) if request.detailed_results else None,
+                request.difficulty_breakdown or None,
+                request.detailed_results or None,
                 datetime.now(),
                 datetime.now()
             )
+            await db.record_write(conn, request.user_id)
         
         return {
             "success": True,
@@ -92,11 +102,11 @@ async def get_session_comparison(user_id: str, study_session_id: str):
     Get the latest result for a session along with previous results for comparison.
     """
     try:
-        async with db.get_connection() as conn:
+        async with db.get_read_connection(user_id) as conn:
             # Get the latest result for this specific session
             current_result = await conn.fetchrow(
-                """
-                SELECT * FROM session_results 
+                f"""
+                SELECT {RESULT_COLUMNS} FROM session_results 
                 WHERE user_id = $1 AND study_session_id = $2
                 ORDER BY completed_at DESC 
                 LIMIT 1
@@ -109,8 +119,8 @@ async def get_session_comparison(user_id: str, study_session_id: str):
             
             # Get previous results for the same specific study session and user
             previous_results = await conn.fetch(
-                """
-                SELECT * FROM session_results 
+                f"""
+                SELECT {RESULT_COLUMNS} FROM session_results 
                 WHERE user_id = $1 AND study_session_id = $2 AND id != $3
                 ORDER BY completed_at DESC 
                 LIMIT 5
@@ -120,19 +130,7 @@ async def get_session_comparison(user_id: str, study_session_id: str):
             
             # Convert to response format
             current_result_dict = dict(current_result)
-            if current_result_dict.get('difficulty_breakdown'):
-                current_result_dict['difficulty_breakdown'] = json.loads(current_result_dict['difficulty_breakdown'])
-            if current_result_dict.get('detailed_results'):
-                current_result_dict['detailed_results'] = json.loads(current_result_dict['detailed_results'])
-            
-            previous_results_list = []
-            for result in previous_results:
-                result_dict = dict(result)
-                if result_dict.get('difficulty_breakdown'):
-                    result_dict['difficulty_breakdown'] = json.loads(result_dict['difficulty_breakdown'])
-                if result_dict.get('detailed_results'):
-                    result_dict['detailed_results'] = json.loads(result_dict['detailed_results'])
-                previous_results_list.append(result_dict)
+            previous_results_list = [dict(result) for result in previous_results]
             
             # Calculate improvement stats
             improvement_stats = calculate_improvement_stats(current_result_dict, previous_results_list)
@@ -150,33 +148,33 @@ async def get_session_comparison(user_id: str, study_session_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching session comparison: {str(e)}")
 
 @router.get("/user/{user_id}/history/{session_type}", response_model=List[SessionResultResponse])
-async def get_user_session_history(user_id: str, session_type: str, limit: int = 10):
+async def get_user_session_history(user_id: str, session_type: str, response: Response,
+                                   limit: int = 10, cursor: str = None):
     """
-    Get session history for a user by session type.
+    Get session history for a user by session type, newest first, one page at a time.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
     """
     try:
-        async with db.get_connection() as conn:
+        limit = page_size(limit, default=10)
+        keyset, keyset_args = keyset_filter(cursor, "completed_at", "id", 3)
+
+        async with db.get_read_connection(user_id) as conn:
             results = await conn.fetch(
-                """
-                SELECT * FROM session_results 
-                WHERE user_id = $1 AND session_type = $2
-                ORDER BY completed_at DESC 
-                LIMIT $3
+                f"""
+                SELECT {RESULT_COLUMNS} FROM session_results 
+                WHERE user_id = $1 AND session_type = $2 {keyset}
+                ORDER BY completed_at DESC, id DESC
+                LIMIT ${len(keyset_args) + 3}
                 """,
-                user_id, session_type, limit
+                user_id, session_type, *keyset_args, limit + 1
             )
             
-            results_list = []
-            for result in results:
-                result_dict = dict(result)
-                if result_dict.get('difficulty_breakdown'):
-                    result_dict['difficulty_breakdown'] = json.loads(result_dict['difficulty_breakdown'])
-                if result_dict.get('detailed_results'):
-                    result_dict['detailed_results'] = json.loads(result_dict['detailed_results'])
-                results_list.append(result_dict)
-            
-            return results_list
+            return trusted_response(
+                [dict(result) for result in paginate(results, limit, response, "completed_at")], response
+            )
             
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching user session history: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching session history: {str(e)}")
@@ -187,7 +185,7 @@ async def get_user_stats(user_id: str):
     Get overall statistics for a user across all sessions.
     """
     try:
-        async with db.get_connection() as conn:
+        async with db.get_read_connection(user_id) as conn:
             # Get overall stats
             stats = await conn.fetchrow(
                 """
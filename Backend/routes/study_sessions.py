@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from Database.connection import db
+from routes.pagination import page_size, keyset_filter, paginate
+from routes.responses import trusted_response
 from datetime import datetime
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Union
 import uuid
 
 router = APIRouter(prefix="/study-sessions", tags=["study-sessions"])
@@ -24,6 +26,38 @@ class StudySessionResponse(BaseModel):
     created_at: datetime
     is_active: bool
 
+class StudySessionSummary(BaseModel):
+    id: int
+    type: str
+    name: str
+    created_at: datetime
+    question_count: int
+    # Only present when requested with ?fields=
+    session_id: Optional[str] = None
+    user_id: Optional[str] = None
+    content: Optional[Union[Dict[Any, Any], List[Any]]] = None
+    is_active: Optional[bool] = None
+
+# Columns of a list item; question_count is computed on write (generated column)
+SUMMARY_COLUMNS = ("id", "type", "name", "created_at", "question_count")
+# Further columns a list request may select with ?fields=a,b
+OPTIONAL_COLUMNS = ("session_id", "user_id", "content", "is_active")
+
+def selected_columns(fields: Optional[str]) -> List[str]:
+    """Summary columns plus the optional ones named in a comma-separated `fields` parameter"""
+    columns = list(SUMMARY_COLUMNS)
+    for field in (fields or "").split(","):
+        field = field.strip()
+        if not field or field in columns:
+            continue
+        if field not in OPTIONAL_COLUMNS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field '{field}'; choose from: {', '.join(OPTIONAL_COLUMNS)}"
+            )
+        columns.append(field)
+    return columns
+
 @router.post("/create", response_model=Dict[str, Any])
 async def create_study_session(request: CreateStudySessionRequest):
     """
@@ -31,7 +65,6 @@ async def create_study_session(request: CreateStudySessionRequest):
     """
     try:
         async with db.get_connection() as conn:
-            import json
             study_session_id = await conn.fetchval(
                 """
                 INSERT INTO study_sessions (session_id, user_id, type, name, content, created_at, is_active) 
@@ -42,10 +75,11 @@ async def create_study_session(request: CreateStudySessionRequest):
                 request.user_id,
                 request.type,
                 request.name,
-                json.dumps(request.content),  # Convert to JSON string
+                request.content,
                 datetime.now(),
                 True
             )
+            await db.record_write(conn, request.user_id)
         
         return {
             "success": True,
@@ -56,98 +90,93 @@ async def create_study_session(request: CreateStudySessionRequest):
         print(f"❌ Error creating study session: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating study session: {str(e)}")
 
-@router.get("/user/{user_id}/quiz", response_model=List[StudySessionResponse])
-async def get_user_quizzes(user_id: str):
+async def fetch_study_sessions_page(user_id: str, session_type: Optional[str], limit: Optional[int],
+                                    cursor: Optional[str], response: Response, fields: Optional[str] = None):
+    """
+    One page of a user's active study sessions (optionally of one type), newest first,
+    as summaries (plus any columns selected with `fields`).
+    Sets the X-Next-Cursor header when more pages exist.
+    """
+    columns = selected_columns(fields)
+    limit = page_size(limit)
+    args = [user_id]
+    type_filter = ""
+    if session_type:
+        args.append(session_type)
+        type_filter = "AND type = $2"
+    keyset, keyset_args = keyset_filter(cursor, "created_at", "id", len(args) + 1)
+    args.extend(keyset_args)
+
+    async with db.get_read_connection(user_id) as conn:
+        sessions = await conn.fetch(
+            f"""
+            SELECT {", ".join(columns)}
+            FROM study_sessions 
+            WHERE user_id = $1 {type_filter} AND is_active = true {keyset}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ${len(args) + 1}
+            """,
+            *args, limit + 1
+        )
+    
+    return [dict(session) for session in paginate(sessions, limit, response, "created_at")]
+
+@router.get("/user/{user_id}/quiz", response_model=List[StudySessionSummary], response_model_exclude_unset=True)
+async def get_user_quizzes(user_id: str, response: Response, limit: int = None, cursor: str = None,
+                           fields: str = None):
     """
-    Get all quiz study sessions for a specific user.
+    Get quiz study sessions for a specific user, one page at a time.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    Items are summaries; add e.g. `fields=content` to include more columns, or
+    fetch one session's content from /study-sessions/{study_session_id}.
     """
     try:
-        async with db.get_connection() as conn:
-            quizzes = await conn.fetch(
-                """
-                SELECT id, session_id, user_id, type, name, content, created_at, is_active
-                FROM study_sessions 
-                WHERE user_id = $1 AND type = 'quiz' AND is_active = true
-                ORDER BY created_at DESC
-                """,
-                user_id
-            )
-        
-        import json
-        result = []
-        for quiz in quizzes:
-            quiz_dict = dict(quiz)
-            # Parse JSON content back to Python object
-            if isinstance(quiz_dict['content'], str):
-                quiz_dict['content'] = json.loads(quiz_dict['content'])
-            result.append(quiz_dict)
-        return result
+        page = await fetch_study_sessions_page(user_id, "quiz", limit, cursor, response, fields)
+        return trusted_response(page, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching user quizzes: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching quizzes: {str(e)}")
 
-@router.get("/user/{user_id}/flashnotes", response_model=List[StudySessionResponse])
-async def get_user_flashnotes(user_id: str):
+@router.get("/user/{user_id}/flashnotes", response_model=List[StudySessionSummary], response_model_exclude_unset=True)
+async def get_user_flashnotes(user_id: str, response: Response, limit: int = None, cursor: str = None,
+                              fields: str = None):
     """
-    Get all flashnotes study sessions for a specific user.
+    Get flashnotes study sessions for a specific user, one page at a time.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    Items are summaries; add e.g. `fields=content` to include more columns, or
+    fetch one session's content from /study-sessions/{study_session_id}.
     """
     try:
-        async with db.get_connection() as conn:
-            flashnotes = await conn.fetch(
-                """
-                SELECT id, session_id, user_id, type, name, content, created_at, is_active
-                FROM study_sessions 
-                WHERE user_id = $1 AND type = 'flashnotes' AND is_active = true
-                ORDER BY created_at DESC
-                """,
-                user_id
-            )
-        
-        import json
-        result = []
-        for flashnote in flashnotes:
-            flashnote_dict = dict(flashnote)
-            # Parse JSON content back to Python object
-            if isinstance(flashnote_dict['content'], str):
-                flashnote_dict['content'] = json.loads(flashnote_dict['content'])
-            result.append(flashnote_dict)
-        return result
+        page = await fetch_study_sessions_page(user_id, "flashnotes", limit, cursor, response, fields)
+        return trusted_response(page, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching user flashnotes: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching flashnotes: {str(e)}")
 
-@router.get("/user/{user_id}/all", response_model=List[StudySessionResponse])
-async def get_all_user_study_sessions(user_id: str):
+@router.get("/user/{user_id}/all", response_model=List[StudySessionSummary], response_model_exclude_unset=True)
+async def get_all_user_study_sessions(user_id: str, response: Response, limit: int = None, cursor: str = None,
+                                      fields: str = None):
     """
-    Get all study sessions (quiz and flashnotes) for a specific user.
+    Get study sessions (quiz and flashnotes) for a specific user, one page at a time.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    Items are summaries; add e.g. `fields=content` to include more columns, or
+    fetch one session's content from /study-sessions/{study_session_id}.
     """
     try:
-        async with db.get_connection() as conn:
-            sessions = await conn.fetch(
-                """
-                SELECT id, session_id, user_id, type, name, content, created_at, is_active
-                FROM study_sessions 
-                WHERE user_id = $1 AND is_active = true
-                ORDER BY created_at DESC
-                """,
-                user_id
-            )
-        
-        import json
-        result = []
-        for session in sessions:
-            session_dict = dict(session)
-            # Parse JSON content back to Python object
-            if isinstance(session_dict['content'], str):
-                session_dict['content'] = json.loads(session_dict['content'])
-            result.append(session_dict)
-        return result
+        page = await fetch_study_sessions_page(user_id, None, limit, cursor, response, fields)
+        return trusted_response(page, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching user study sessions: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching study sessions: {str(e)}")
 
 @router.get("/{study_session_id}", response_model=StudySessionResponse)
-async def get_study_session(study_session_id: int):
+async def get_study_session(study_session_id: int, response: Response):
     """
     Get a specific study session by ID.
     """
@@ -165,12 +194,7 @@ async def get_study_session(study_session_id: int):
         if not session:
             raise HTTPException(status_code=404, detail="Study session not found")
         
-        import json
-        session_dict = dict(session)
-        # Parse JSON content back to Python object
-        if isinstance(session_dict['content'], str):
-            session_dict['content'] = json.loads(session_dict['content'])
-        return session_dict
+        return trusted_response(dict(session), response)
     except HTTPException:
         raise
     except Exception as e:
@@ -184,12 +208,13 @@ async def delete_study_session(study_session_id: int):
     """
     try:
         async with db.get_connection() as conn:
-            result = await conn.execute(
-                "UPDATE study_sessions SET is_active = false WHERE id = $1",
+            user_id = await conn.fetchval(
+                "UPDATE study_sessions SET is_active = false WHERE id = $1 RETURNING user_id",
                 study_session_id
             )
+            await db.record_write(conn, user_id)
         
-        if result == "UPDATE 0":
+        if user_id is None:
             raise HTTPException(status_code=404, detail="Study session not found")
         
         return {"success": True, "message": "Study session deleted successfully"}
@@ -50,71 +50,113 @@ def normalize_datetime(dt):
         return dt.astimezone(timezone.utc).replace(tzinfo=None)
     return dt
 
+# Rollup maintained by triggers (Database/migrations/0004_user_stats_rollup.sql)
+USER_STATS_QUERY = """
+    SELECT
+        chats_started,
+        quiz_sessions,
+        study_sessions AS total_study_sessions,
+        results_count AS total_sessions,
+        quiz_results AS quiz_sessions_completed,
+        flashnote_results AS flashnote_sessions,
+        excellent_results AS excellent_sessions,
+        accuracy_sum / NULLIF(results_count, 0) AS avg_accuracy,
+        best_accuracy,
+        total_time_seconds AS total_time,
+        total_questions AS total_questions_answered,
+        achievements_count
+    FROM user_stats
+    WHERE user_id = $1
+"""
+
+# Stats of a user with no activity yet (no user_stats row)
+EMPTY_USER_STATS = {
+    "chats_started": 0, "quiz_sessions": 0, "total_study_sessions": 0,
+    "total_sessions": 0, "quiz_sessions_completed": 0, "flashnote_sessions": 0,
+    "excellent_sessions": 0, "avg_accuracy": None, "best_accuracy": None,
+    "total_time": 0, "total_questions_answered": 0, "achievements_count": 0,
+}
+
+async def fetch_user_stats(conn, user_id: str) -> Dict[str, Any]:
+    """The user's stats row as a dict"""
+    row = await conn.fetchrow(USER_STATS_QUERY, user_id)
+    return dict(row) if row else dict(EMPTY_USER_STATS)
+
+def build_stats_response(stats: Dict[str, Any]) -> UserStatsResponse:
+    return UserStatsResponse(
+        chats_started=stats['chats_started'],
+        quizzes_taken=stats['quiz_sessions'],
+        study_sessions=stats['total_study_sessions'],
+        achievements=stats['achievements_count'],
+        overall_progress=calculate_overall_progress(stats),
+        total_study_time=stats['total_time'],
+        avg_quiz_accuracy=float(stats['avg_accuracy'] or 0),
+        best_quiz_score=float(stats['best_accuracy'] or 0),
+        total_flashcards_studied=stats['total_questions_answered']
+    )
+
 @router.get("/stats/{user_id}", response_model=UserStatsResponse)
 async def get_user_stats(user_id: str):
     """
     Get comprehensive user statistics for the profile page.
+    A single primary-key lookup on the user_stats rollup.
     """
     try:
-        async with db.get_connection() as conn:
-            # Get session counts
-            session_counts = await conn.fetchrow("""
-                SELECT 
-                    COUNT(DISTINCT CASE WHEN type = 'quiz' THEN session_id END) as quiz_sessions,
-                    COUNT(DISTINCT CASE WHEN type = 'flashnotes' THEN session_id END) as flashnote_sessions,
-                    COUNT(DISTINCT session_id) as total_study_sessions
-                FROM study_sessions 
-                WHERE user_id = $1 AND is_active = true
-            """, user_id)
-
-            # Get session results stats
-            results_stats = await conn.fetchrow("""
-                SELECT 
-                    COUNT(*) as total_completed_sessions,
-                    AVG(accuracy_percentage) as avg_accuracy,
-                    MAX(accuracy_percentage) as best_accuracy,
-                    SUM(time_spent_seconds) as total_time,
-                    SUM(total_questions) as total_questions_answered
-                FROM session_results 
-                WHERE user_id = $1
-            """, user_id)
-
-            # Get chat sessions count (assuming we have a sessions table for chats)
-            chat_count = await conn.fetchval("""
-                SELECT COUNT(DISTINCT session_id) 
-                FROM sessions 
-                WHERE user_id = $1 AND is_active = true
-            """, user_id) or 0
-
-            # Calculate achievements count (we'll implement achievement logic)
-            achievements_count = await calculate_achievements_count(conn, user_id, results_stats)
-
-            # Calculate overall progress (based on activity and performance)
-            overall_progress = calculate_overall_progress(session_counts, results_stats, chat_count)
-
-            return UserStatsResponse(
-                chats_started=chat_count,
-                quizzes_taken=session_counts['quiz_sessions'] or 0,
-                study_sessions=session_counts['total_study_sessions'] or 0,
-                achievements=achievements_count,
-                overall_progress=overall_progress,
-                total_study_time=results_stats['total_time'] or 0,
-                avg_quiz_accuracy=float(results_stats['avg_accuracy'] or 0),
-                best_quiz_score=float(results_stats['best_accuracy'] or 0),
-                total_flashcards_studied=results_stats['total_questions_answered'] or 0
-            )
+        async with db.get_read_connection(user_id) as conn:
+            return build_stats_response(await fetch_user_stats(conn, user_id))
 
     except Exception as e:
         print(f"❌ Error fetching user stats: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching user stats: {str(e)}")
 
+def build_recent_activity(recent_sessions, recent_chats, limit: int) -> List[RecentActivityItem]:
+    """Merge recent session results and chat sessions into one activity feed, newest first"""
+    activity_items = []
+
+    # Process session results
+    for session in recent_sessions:
+        activity_type = session['session_type']
+        if activity_type == 'quiz':
+            description = f"Scored {session['accuracy_percentage']:.0f}% accuracy"
+            title = session['session_name'] or session['study_session_name'] or "Quiz Session"
+        elif activity_type == 'flashnotes':
+            description = f"Studied {session['accuracy_percentage']:.0f}% mastery rate"
+            title = session['session_name'] or session['study_session_name'] or "Flashcard Session"
+        else:
+            description = "Completed study session"
+            title = session['session_name'] or "Study Session"
+
+        activity_items.append(RecentActivityItem(
+            id=session['id'],
+            activity_type=activity_type,
+            title=title,
+            description=description,
+            timestamp=normalize_datetime(session['completed_at']),
+            score=float(session['accuracy_percentage']),
+            duration=session['time_spent_seconds']
+        ))
+
+    # Process chat sessions
+    for chat in recent_chats:
+        activity_items.append(RecentActivityItem(
+            id=hash(chat['session_id']) % 1000000,  # Generate a simple ID
+            activity_type='chat',
+            title=chat['topic'] or "Chat Session",
+            description="Started new conversation",
+            timestamp=normalize_datetime(chat['created_at'])
+        ))
+
+    # Sort by timestamp and limit (now safe since all timestamps are normalized)
+    activity_items.sort(key=lambda x: x.timestamp or datetime.min, reverse=True)
+    return activity_items[:limit]
+
 @router.get("/recent-activity/{user_id}", response_model=List[RecentActivityItem])
 async def get_recent_activity(user_id: str, limit: int = 10):
     """
     Get recent user activity for the profile page.
     """
     try:
-        async with db.get_connection() as conn:
+        async with db.get_read_connection(user_id) as conn:
             # Get recent session results
             recent_sessions = await conn.fetch("""
                 SELECT 
@@ -144,160 +186,125 @@ async def get_recent_activity(user_id: str, limit: int = 10):
                 LIMIT $2
             """, user_id, limit // 2)
 
-            activity_items = []
-
-            # Process session results
-            for session in recent_sessions:
-                activity_type = session['session_type']
-                if activity_type == 'quiz':
-                    description = f"Scored {session['accuracy_percentage']:.0f}% accuracy"
-                    title = session['session_name'] or session['study_session_name'] or "Quiz Session"
-                elif activity_type == 'flashnotes':
-                    description = f"Studied {session['accuracy_percentage']:.0f}% mastery rate"
-                    title = session['session_name'] or session['study_session_name'] or "Flashcard Session"
-                else:
-                    description = "Completed study session"
-                    title = session['session_name'] or "Study Session"
-
-                activity_items.append(RecentActivityItem(
-                    id=session['id'],
-                    activity_type=activity_type,
-                    title=title,
-                    description=description,
-                    timestamp=normalize_datetime(session['completed_at']),
-                    score=float(session['accuracy_percentage']),
-                    duration=session['time_spent_seconds']
-                ))
-
-            # Process chat sessions
-            for chat in recent_chats:
-                activity_items.append(RecentActivityItem(
-                    id=hash(chat['session_id']) % 1000000,  # Generate a simple ID
-                    activity_type='chat',
-                    title=chat['topic'] or "Chat Session",
-                    description="Started new conversation",
-                    timestamp=normalize_datetime(chat['created_at'])
-                ))
-
-            # Sort by timestamp and limit (now safe since all timestamps are normalized)
-            activity_items.sort(key=lambda x: x.timestamp or datetime.min, reverse=True)
-            return activity_items[:limit]
+            return build_recent_activity(recent_sessions, recent_chats, limit)
 
     except Exception as e:
         print(f"❌ Error fetching recent activity: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching recent activity: {str(e)}")
 
+# Earned achievements, maintained by the rule trigger on user_stats
+# (Database/migrations/0005_achievements.sql)
+ACHIEVEMENTS_QUERY = """
+    SELECT a.id AS achievement_id, a.name, a.description, a.icon, a.color, a.category, ua.earned_at, a.sort_order
+    FROM user_achievements ua
+    JOIN achievements a ON a.id = ua.achievement_id
+    WHERE ua.user_id = $1
+    ORDER BY a.sort_order
+"""
+
+def build_achievement(row) -> Achievement:
+    return Achievement(
+        id=row['achievement_id'],
+        name=row['name'],
+        description=row['description'],
+        icon=row['icon'],
+        color=row['color'],
+        earned_at=row['earned_at'],
+        category=row['category']
+    )
+
 @router.get("/achievements/{user_id}", response_model=List[Achievement])
 async def get_user_achievements(user_id: str):
     """
-    Get user achievements based on their activity and performance.
+    Get the achievements a user has earned, with the time each was earned.
     """
     try:
-        async with db.get_connection() as conn:
-            # Get user stats for achievement calculation
-            results_stats = await conn.fetchrow("""
-                SELECT 
-                    COUNT(*) as total_sessions,
-                    AVG(accuracy_percentage) as avg_accuracy,
-                    MAX(accuracy_percentage) as best_accuracy,
-                    COUNT(CASE WHEN accuracy_percentage >= 90 THEN 1 END) as excellent_sessions,
-                    COUNT(CASE WHEN session_type = 'quiz' THEN 1 END) as quiz_sessions,
-                    COUNT(CASE WHEN session_type = 'flashnotes' THEN 1 END) as flashnote_sessions
-                FROM session_results 
-                WHERE user_id = $1
-            """, user_id)
-
-            session_counts = await conn.fetchrow("""
-                SELECT COUNT(DISTINCT session_id) as total_study_sessions
-                FROM study_sessions 
-                WHERE user_id = $1 AND is_active = true
-            """, user_id)
-
-            chat_count = await conn.fetchval("""
-                SELECT COUNT(DISTINCT session_id) 
-                FROM sessions 
-                WHERE user_id = $1 AND is_active = true
-            """, user_id) or 0
-
-            achievements = []
-            now = datetime.now()
-
-            # Define achievements based on user activity
-            if results_stats and results_stats.get('quiz_sessions', 0) >= 1:
-                achievements.append(Achievement(
-                    id="first_quiz",
-                    name="First Quiz Master",
-                    description="Completed your first quiz",
-                    icon="Target",
-                    color="text-green-500",
-                    earned_at=now,
-                    category="quiz"
-                ))
-
-            if chat_count >= 5:
-                achievements.append(Achievement(
-                    id="chat_enthusiast",
-                    name="Chat Enthusiast",
-                    description="Started 5 chat sessions",
-                    icon="Zap",
-                    color="text-blue-500",
-                    earned_at=now,
-                    category="chat"
-                ))
-
-            if results_stats and results_stats.get('total_sessions', 0) >= 3:
-                achievements.append(Achievement(
-                    id="study_streak",
-                    name="Study Streak",
-                    description="Completed 3 study sessions",
-                    icon="BookOpen",
-                    color="text-purple-500",
-                    earned_at=now,
-                    category="study"
-                ))
-
-            if results_stats and results_stats.get('excellent_sessions', 0) >= 1:
-                achievements.append(Achievement(
-                    id="perfectionist",
-                    name="Perfectionist",
-                    description="Achieved 90%+ accuracy",
-                    icon="Award",
-                    color="text-yellow-500",
-                    earned_at=now,
-                    category="performance"
-                ))
-
-            if results_stats and results_stats.get('flashnote_sessions', 0) >= 1:
-                achievements.append(Achievement(
-                    id="flashcard_master",
-                    name="Flashcard Master",
-                    description="Completed flashcard session",
-                    icon="Brain",
-                    color="text-pink-500",
-                    earned_at=now,
-                    category="flashcards"
-                ))
-
-            return achievements
+        async with db.get_read_connection(user_id) as conn:
+            rows = await conn.fetch(ACHIEVEMENTS_QUERY, user_id)
+            return [build_achievement(row) for row in rows]
 
     except Exception as e:
         print(f"❌ Error fetching achievements: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching achievements: {str(e)}")
 
+# Stats, recent results, recent chats and earned achievements in one
+# statement. Every row carries the stats columns plus at most one result,
+# chat or achievement; each kind fills only its own columns. The order of
+# the CTEs is not kept through UNION ALL, so achievements are put back in
+# catalog order by the outer ORDER BY (activity is sorted in Python).
+PROFILE_QUERY = f"""
+    WITH stats AS ({USER_STATS_QUERY}),
+    recent_results AS (
+        SELECT
+            sr.id,
+            sr.session_type,
+            sr.session_name,
+            sr.accuracy_percentage,
+            sr.time_spent_seconds,
+            sr.completed_at,
+            ss.name AS study_session_name
+        FROM session_results sr
+        LEFT JOIN study_sessions ss ON sr.study_session_id = ss.id
+        WHERE sr.user_id = $1
+        ORDER BY sr.completed_at DESC
+        LIMIT $2
+    ),
+    recent_chats AS (
+        SELECT session_id, topic, created_at
+        FROM sessions
+        WHERE user_id = $1 AND is_active = true
+        ORDER BY created_at DESC
+        LIMIT $3
+    ),
+    earned AS ({ACHIEVEMENTS_QUERY}),
+    items AS (
+        SELECT r.*,
+               NULL::varchar AS session_id, NULL::varchar AS topic, NULL::timestamp AS created_at,
+               NULL::varchar AS achievement_id, NULL::varchar AS name, NULL::varchar AS description,
+               NULL::varchar AS icon, NULL::varchar AS color, NULL::varchar AS category,
+               NULL::timestamp AS earned_at, NULL::integer AS sort_order
+        FROM recent_results r
+        UNION ALL
+        SELECT NULL::integer, NULL::varchar, NULL::varchar, NULL::numeric, NULL::integer,
+               NULL::timestamp, NULL::varchar,
+               c.session_id, c.topic, c.created_at,
+               NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+        FROM recent_chats c
+        UNION ALL
+        SELECT NULL::integer, NULL::varchar, NULL::varchar, NULL::numeric, NULL::integer,
+               NULL::timestamp, NULL::varchar, NULL, NULL, NULL,
+               e.achievement_id, e.name, e.description, e.icon, e.color, e.category, e.earned_at, e.sort_order
+        FROM earned e
+    )
+    SELECT stats.*, items.*
+    FROM (SELECT 1) AS one
+    LEFT JOIN stats ON true
+    LEFT JOIN items ON true
+    ORDER BY items.sort_order
+"""
+
 @router.get("/profile/{user_id}", response_model=UserProfileResponse)
-async def get_user_profile(user_id: str):
+async def get_user_profile(user_id: str, limit: int = 10):
     """
     Get complete user profile data including stats, recent activity, and achievements.
+    One connection and one round trip: PROFILE_QUERY feeds all three sections.
     """
     try:
-        # Fetch all profile data in parallel
-        stats = await get_user_stats(user_id)
-        recent_activity = await get_recent_activity(user_id, 10)
-        achievements = await get_user_achievements(user_id)
+        async with db.get_read_connection(user_id) as conn:
+            rows = await conn.fetch(PROFILE_QUERY, user_id, limit, limit // 2)
+
+        first = rows[0]
+        if first['chats_started'] is None:
+            stats = dict(EMPTY_USER_STATS)
+        else:
+            stats = {key: first[key] for key in EMPTY_USER_STATS}
+        recent_sessions = [row for row in rows if row['id'] is not None]
+        recent_chats = [row for row in rows if row['session_id'] is not None]
+        achievements = [build_achievement(row) for row in rows if row['achievement_id'] is not None]
 
         return UserProfileResponse(
-            stats=stats,
-            recent_activity=recent_activity,
+            stats=build_stats_response(stats),
+            recent_activity=build_recent_activity(recent_sessions, recent_chats, limit),
             achievements=achievements
         )
 
@@ -305,71 +312,22 @@ async def get_user_profile(user_id: str):
         print(f"❌ Error fetching user profile: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching user profile: {str(e)}")
 
-async def calculate_achievements_count(conn, user_id: str, results_stats) -> int:
-    """
-    Calculate the number of achievements a user has earned.
-    This should match exactly with the logic in get_user_achievements.
-    """
-    count = 0
-    
-    # Get the same data that get_user_achievements uses
-    try:
-        # Get user stats for achievement calculation (same query as in get_user_achievements)
-        achievement_stats = await conn.fetchrow("""
-            SELECT 
-                COUNT(*) as total_sessions,
-                AVG(accuracy_percentage) as avg_accuracy,
-                MAX(accuracy_percentage) as best_accuracy,
-                COUNT(CASE WHEN accuracy_percentage >= 90 THEN 1 END) as excellent_sessions,
-                COUNT(CASE WHEN session_type = 'quiz' THEN 1 END) as quiz_sessions,
-                COUNT(CASE WHEN session_type = 'flashnotes' THEN 1 END) as flashnote_sessions
-            FROM session_results 
-            WHERE user_id = $1
-        """, user_id)
-
-        chat_count = await conn.fetchval("""
-            SELECT COUNT(DISTINCT session_id) 
-            FROM sessions 
-            WHERE user_id = $1 AND is_active = true
-        """, user_id) or 0
-
-        # Use the exact same logic as get_user_achievements
-        if achievement_stats and achievement_stats.get('quiz_sessions', 0) >= 1:
-            count += 1  # First Quiz Master
-
-        if chat_count >= 5:
-            count += 1  # Chat Enthusiast
-
-        if achievement_stats and achievement_stats.get('total_sessions', 0) >= 3:
-            count += 1  # Study Streak
-
-        if achievement_stats and achievement_stats.get('excellent_sessions', 0) >= 1:
-            count += 1  # Perfectionist
-
-        if achievement_stats and achievement_stats.get('flashnote_sessions', 0) >= 1:
-            count += 1  # Flashcard Master
-
-    except Exception as e:
-        print(f"Warning: Could not calculate achievements count: {e}")
-        
-    return count
-
-def calculate_overall_progress(session_counts, results_stats, chat_count) -> float:
+def calculate_overall_progress(stats: Dict[str, Any]) -> float:
     """
     Calculate overall learning progress based on user activity and performance.
     """
     progress = 0.0
     
     # Base progress from activity
-    if chat_count > 0:
-        progress += min(float(chat_count) * 5, 25)  # Up to 25% for chats
+    if stats['chats_started'] > 0:
+        progress += min(float(stats['chats_started']) * 5, 25)  # Up to 25% for chats
         
-    if session_counts and session_counts.get('total_study_sessions'):
-        progress += min(float(session_counts['total_study_sessions']) * 10, 40)  # Up to 40% for sessions
+    if stats['total_study_sessions']:
+        progress += min(float(stats['total_study_sessions']) * 10, 40)  # Up to 40% for sessions
         
     # Performance bonus
-    if results_stats and results_stats.get('avg_accuracy'):
-        accuracy_bonus = (float(results_stats['avg_accuracy']) / 100) * 35  # Up to 35% for performance
+    if stats['avg_accuracy']:
+        accuracy_bonus = (float(stats['avg_accuracy']) / 100) * 35  # Up to 35% for performance
         progress += accuracy_bonus
         
-    return min(progress, 100.0)  # Cap at 100% 
\ No newline at end of file
+    return min(progress, 100.0)  # Cap at 100%
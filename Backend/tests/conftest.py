@@ -0,0 +1,84 @@
+"""
+Database tests run against a disposable Postgres database.
+
+The server comes from the usual PG* settings (see config.Settings). A fresh
+database is created for the test run, every migration is applied to it,
+and it is dropped afterwards. Without a reachable server the database tests
+are skipped, unless TEST_DATABASE_REQUIRED is set (as in CI).
+"""
+import asyncio
+import os
+import uuid
+import asyncpg
+import pytest
+from config import settings
+from Database.connection import db
+from Database.migrate import migrate
+
+async def _admin_connection():
+    return await asyncpg.connect(
+        host=settings.PGHOST, port=settings.PGPORT, user=settings.PGUSER,
+        password=settings.PGPASSWORD, database=settings.PGDATABASE, timeout=5
+    )
+
+def run_db(coroutine_function, *args):
+    """Run a coroutine function in a fresh event loop with the global pool open"""
+    async def main():
+        await db.create_pool()
+        try:
+            return await coroutine_function(*args)
+        finally:
+            await db.close_pool()
+    return asyncio.run(main())
+
+async def _create_database(name):
+    """Create the test database; returns the connection error if there is no server"""
+    try:
+        connection = await _admin_connection()
+    except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as e:
+        return e
+    try:
+        await connection.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        await connection.close()
+    return None
+
+async def _drop_database(name):
+    connection = await _admin_connection()
+    try:
+        await connection.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    finally:
+        await connection.close()
+
+@pytest.fixture(scope="session")
+def database():
+    """Name of a freshly migrated, throwaway database; the global pool points at it"""
+    name = f"distill_test_{uuid.uuid4().hex[:12]}"
+    error = asyncio.run(_create_database(name))
+    if error is not None:
+        if os.getenv("TEST_DATABASE_REQUIRED"):
+            raise error
+        pytest.skip(f"No Postgres server available for database tests: {error}")
+
+    maintenance_database = settings.PGDATABASE
+    settings.PGDATABASE = name
+    try:
+        run_db(migrate)
+        yield name
+    finally:
+        settings.PGDATABASE = maintenance_database
+        asyncio.run(_drop_database(name))
+
+@pytest.fixture
+def user_id(database):
+    """A new user row; every test works on its own user"""
+    user_id = f"test-user-{uuid.uuid4().hex[:12]}"
+
+    async def create():
+        async with db.get_connection() as conn:
+            await conn.execute(
+                "INSERT INTO users (user_id, email, username) VALUES ($1, $2, $3)",
+                user_id, f"{user_id}@example.com", user_id
+            )
+    run_db(create)
+    return user_id
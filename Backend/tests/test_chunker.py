@@ -0,0 +1,48 @@
+import itertools
+from Processing.chunker import iter_chunk_texts, count_tokens
+
+WORDS = "so the next thing we want to look at is how the model handles really long inputs".split()
+
+def caption_segments(count, words_per_segment=8):
+    """Auto-caption style transcript: short timed segments of distinct words without any punctuation"""
+    words = (f"word{number}" for number in itertools.count())
+    return [
+        {"text": " ".join(next(words) for _ in range(words_per_segment)), "start": index * 2.0}
+        for index in range(count)
+    ]
+
+def repeated_words(previous, chunk):
+    """The words at the end of previous that chunk starts with again"""
+    previous, chunk = previous.split(), chunk.split()
+    if chunk[0] not in previous:
+        return []
+    repeated = previous[previous.index(chunk[0]):]
+    assert chunk[:len(repeated)] == repeated
+    return repeated
+
+def test_unpunctuated_segments_are_packed_into_full_overlapping_chunks():
+    chunks = list(iter_chunk_texts(caption_segments(2000), chunk_size=400, overlap=40))
+    sizes = [count_tokens(text) for text, _ in chunks]
+
+    assert max(sizes) <= 400
+    assert min(sizes[:-1]) >= 400 - 40  # No scraps between full chunks
+    for (previous, _), (chunk, _) in zip(chunks, chunks[1:]):
+        repeated = repeated_words(previous, chunk)
+        assert 0 < count_tokens(" ".join(repeated)) <= 40
+
+    starts = [start for _, start in chunks]
+    assert starts == sorted(starts) and len(set(starts)) == len(starts)
+
+def test_sentence_continuing_across_segments_keeps_its_words_together():
+    segments = caption_segments(3, words_per_segment=5)
+    segments.append({"text": "and that is the end.", "start": 6.0})
+    chunks = list(iter_chunk_texts(segments, chunk_size=400, overlap=40))
+    assert chunks == [(" ".join(segment["text"] for segment in segments), 0.0)]
+
+def test_punctuated_text_is_cut_on_sentence_boundaries():
+    sentence = " ".join(WORDS) + "."
+    chunks = [text for text, _ in iter_chunk_texts([" ".join([sentence] * 200)], chunk_size=400, overlap=40)]
+    assert len(chunks) > 1
+    for text in chunks:
+        assert count_tokens(text) <= 400
+        assert text.startswith(WORDS[0]) and text.endswith(".")
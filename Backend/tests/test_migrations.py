@@ -0,0 +1,17 @@
+from Database.connection import db
+from Database.migrate import discover_migrations, migrate, check_hot_queries
+from tests.conftest import run_db
+
+def test_every_migration_is_applied_once(database):
+    async def scenario():
+        async with db.get_connection() as conn:
+            applied = await conn.fetch("SELECT version, checksum FROM schema_migrations ORDER BY version")
+        assert [(row['version'], row['checksum']) for row in applied] == [
+            (version, checksum) for version, _, _, checksum in discover_migrations()
+        ]
+        assert await migrate() == []
+
+    run_db(scenario)
+
+def test_hot_queries_are_served_by_indexes(database):
+    assert run_db(check_hot_queries) == []
@@ -0,0 +1,109 @@
+"""
+Read routing (Database/connection.py): which reads a replica may serve, and
+the read-your-writes markers that keep a client's reads on the primary
+after it writes.
+"""
+import asyncio
+import time
+import pytest
+from config import settings
+from Database.connection import db, Database, Replica, pick_read_replica, read_your_writes_window
+from tests.conftest import run_db
+
+def make_replica(host, lag_seconds, checked_seconds_ago=0.0):
+    replica = Replica(host, 5432, pool=None)
+    replica.lag_seconds = lag_seconds
+    replica.checked_at = time.monotonic() - checked_seconds_ago
+    return replica
+
+@pytest.fixture
+def replica_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_HOSTS", "replica-a:5432,replica-b:5432")
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "DB_REPLICA_LAG_CHECK_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 10.0)
+
+def test_without_replicas_reads_use_the_primary(replica_settings):
+    assert pick_read_replica([], recently_written=False, turn=0) is None
+
+def test_available_replicas_serve_reads_in_turn(replica_settings):
+    first, second = make_replica("replica-a", 0.5), make_replica("replica-b", 0.0)
+    assert pick_read_replica([first, second], recently_written=False, turn=0) is first
+    assert pick_read_replica([first, second], recently_written=False, turn=1) is second
+    assert pick_read_replica([first, second], recently_written=False, turn=2) is first
+
+def test_replica_lagging_past_the_threshold_gets_no_reads(replica_settings):
+    lagging, fresh = make_replica("replica-a", 5.5), make_replica("replica-b", 5.0)
+    assert pick_read_replica([lagging], recently_written=False, turn=0) is None
+    assert pick_read_replica([lagging, fresh], recently_written=False, turn=0) is fresh
+    assert pick_read_replica([lagging, fresh], recently_written=False, turn=1) is fresh
+
+def test_replica_with_failed_or_stale_lag_check_gets_no_reads(replica_settings):
+    failed = make_replica("replica-a", None)
+    stale = make_replica("replica-b", 0.0, checked_seconds_ago=3 * 2.0 + 1)
+    assert pick_read_replica([failed, stale], recently_written=False, turn=0) is None
+
+def test_recent_write_keeps_reads_on_the_primary(replica_settings):
+    replica = make_replica("replica-a", 0.0)
+    assert pick_read_replica([replica], recently_written=True, turn=0) is None
+
+def test_window_covers_the_lag_a_readable_replica_may_have(replica_settings, monkeypatch):
+    assert read_your_writes_window() == 10.0
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 1.0)
+    assert read_your_writes_window() == 5.0 + 2.0
+
+def test_own_writes_route_reads_to_the_primary_without_a_query(replica_settings):
+    class RecordingConnection:
+        def __init__(self):
+            self.queries = []
+
+        async def execute(self, query, *args):
+            self.queries.append(args)
+
+    writer = Database()
+    conn = RecordingConnection()
+    asyncio.run(writer.record_write(conn, "user-1", None, "user-1"))
+    assert conn.queries == [(["user-1"], read_your_writes_window())]
+    assert writer._recently_written(["someone-else", "user-1"])
+    assert not writer._recently_written(["someone-else", None])
+
+def test_write_markers_are_shared_and_expire(database, replica_settings, monkeypatch):
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "DB_REPLICA_LAG_CHECK_SECONDS", 0.2)
+    other_process = Database()
+
+    async def scenario():
+        other_process.pool = db.pool
+        async with db.get_connection() as conn:
+            await db.record_write(conn, "user-1", "chat-1")
+        assert db._recently_written(["user-1"])
+
+        # Another process learns of the write when it next syncs its markers
+        assert not other_process._recently_written(["user-1"])
+        await other_process._sync_write_markers()
+        assert other_process._recently_written(["someone-else", "chat-1"])
+        assert not other_process._recently_written(["someone-else"])
+
+        await asyncio.sleep(0.6)
+        assert not db._recently_written(["user-1", "chat-1"])
+        assert not other_process._recently_written(["user-1", "chat-1"])
+
+        # Syncing prunes the expired rows
+        await other_process._sync_write_markers()
+        assert other_process._write_markers == {}
+        async with db.get_connection() as conn:
+            assert await conn.fetchval("SELECT count(*) FROM read_your_writes") == 0
+
+    run_db(scenario)
+
+def test_no_markers_without_replicas(database, monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_HOSTS", "")
+
+    async def scenario():
+        async with db.get_connection() as conn:
+            await db.record_write(conn, "user-2")
+            assert await conn.fetchval("SELECT count(*) FROM read_your_writes") == 0
+        assert not db._recently_written(["user-2"])
+
+    run_db(scenario)
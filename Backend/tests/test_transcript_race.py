@@ -0,0 +1,42 @@
+import threading
+import time
+import pytest
+from Ingestion import yt_handler
+from Ingestion.yt_handler import race_transcript_sources, TranscriptFetchTimeout
+
+SEGMENTS = [{"start": 0.0, "end": 1.0, "text": "hello"}]
+
+def test_first_source_with_segments_wins(monkeypatch):
+    monkeypatch.setattr(yt_handler, "get_transcript_api", lambda video_id, lang: time.sleep(0.5) or None)
+    monkeypatch.setattr(yt_handler, "get_caption_segments", lambda url, lang: SEGMENTS)
+    assert race_transcript_sources("video", "url", timeout=2) == SEGMENTS
+
+def test_times_out_when_no_source_answers(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(yt_handler, "get_transcript_api", lambda video_id, lang: release.wait(5))
+    monkeypatch.setattr(yt_handler, "get_caption_segments", lambda url, lang: release.wait(5))
+    try:
+        started = time.monotonic()
+        with pytest.raises(TranscriptFetchTimeout):
+            race_transcript_sources("video", "url", timeout=0.3)
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+
+def test_time_queued_behind_losing_calls_does_not_count(monkeypatch):
+    # Occupy every caption thread with losers of earlier races
+    release = threading.Event()
+    stragglers = [
+        yt_handler._caption_pool.submit(release.wait, 5)
+        for _ in range(yt_handler._caption_pool._max_workers)
+    ]
+    threading.Timer(0.5, release.set).start()
+
+    monkeypatch.setattr(yt_handler, "get_transcript_api", lambda video_id, lang: None)
+    monkeypatch.setattr(yt_handler, "get_caption_segments", lambda url, lang: time.sleep(0.2) or SEGMENTS)
+    try:
+        assert race_transcript_sources("video", "url", timeout=0.3) == SEGMENTS
+    finally:
+        release.set()
+        for straggler in stragglers:
+            straggler.result()
@@ -0,0 +1,28 @@
+import uuid
+from Database.connection import db
+from routes.user_profile import get_user_profile, get_user_achievements
+from tests.conftest import run_db
+from tests.test_user_stats import create_chat, create_study_session, create_result
+
+CATALOG_ORDER = ["first_quiz", "chat_enthusiast", "study_streak", "perfectionist", "flashcard_master"]
+
+def test_profile_lists_achievements_in_catalog_order(user_id):
+    async def scenario():
+        # Earn them in a different order than the catalog's
+        async with db.get_connection() as conn:
+            chat = str(uuid.uuid4())
+            flashnotes = await create_study_session(conn, user_id, chat, "flashnotes")
+            quiz = await create_study_session(conn, user_id, chat, "quiz")
+            await create_result(conn, user_id, flashnotes, "flashnotes", 50, 10, 60)
+            await create_result(conn, user_id, quiz, "quiz", 95, 10, 60)
+            await create_result(conn, user_id, quiz, "quiz", 70, 10, 60)
+            for _ in range(5):
+                await create_chat(conn, user_id)
+
+        profile = await get_user_profile(user_id, limit=10)
+        achievements = await get_user_achievements(user_id)
+        assert [achievement.id for achievement in profile.achievements] == CATALOG_ORDER
+        assert profile.achievements == achievements
+        assert len(profile.recent_activity) == 8
+
+    run_db(scenario)
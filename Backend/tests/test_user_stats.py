@@ -0,0 +1,124 @@
+"""
+user_stats rollup (migration 0004) and achievements (0005): the triggers must
+keep the totals equal to what the underlying rows say through inserts,
+soft-deletes (is_active = false) and deletes.
+"""
+import uuid
+from Database.connection import db
+from tests.conftest import run_db
+
+async def fetch_stats(conn, user_id):
+    return await conn.fetchrow("SELECT * FROM user_stats WHERE user_id = $1", user_id)
+
+async def create_chat(conn, user_id):
+    session_id = str(uuid.uuid4())
+    await conn.execute("INSERT INTO sessions (session_id, user_id) VALUES ($1, $2)", session_id, user_id)
+    return session_id
+
+async def create_study_session(conn, user_id, session_id, session_type):
+    return await conn.fetchval(
+        "INSERT INTO study_sessions (session_id, user_id, type, name, content) VALUES ($1, $2, $3, $4, $5) RETURNING id",
+        session_id, user_id, session_type, f"{session_type} set", [{"question": "q"}]
+    )
+
+async def create_result(conn, user_id, study_session_id, session_type, accuracy, questions, seconds):
+    return await conn.fetchval(
+        """
+        INSERT INTO session_results (study_session_id, user_id, session_type, session_name, total_questions,
+                                     correct_answers, accuracy_percentage, time_spent_seconds)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        RETURNING id
+        """,
+        study_session_id, user_id, session_type, "results", questions, round(questions * accuracy / 100),
+        accuracy, seconds
+    )
+
+def test_chat_sessions_counted_while_active(user_id):
+    async def scenario():
+        async with db.get_connection() as conn:
+            first = await create_chat(conn, user_id)
+            second = await create_chat(conn, user_id)
+            assert (await fetch_stats(conn, user_id))['chats_started'] == 2
+
+            await conn.execute("UPDATE sessions SET is_active = false WHERE session_id = $1", first)
+            assert (await fetch_stats(conn, user_id))['chats_started'] == 1
+
+            # Deleting an already soft-deleted chat changes nothing
+            await conn.execute("DELETE FROM sessions WHERE session_id = $1", first)
+            assert (await fetch_stats(conn, user_id))['chats_started'] == 1
+
+            await conn.execute("DELETE FROM sessions WHERE session_id = $1", second)
+            assert (await fetch_stats(conn, user_id))['chats_started'] == 0
+
+    run_db(scenario)
+
+def test_study_sessions_counted_per_distinct_chat(user_id):
+    async def scenario():
+        async with db.get_connection() as conn:
+            chat, other_chat = str(uuid.uuid4()), str(uuid.uuid4())
+            first_quiz = await create_study_session(conn, user_id, chat, "quiz")
+            second_quiz = await create_study_session(conn, user_id, chat, "quiz")
+            flashnotes = await create_study_session(conn, user_id, other_chat, "flashnotes")
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['quiz_sessions'], stats['study_sessions']) == (1, 2)
+
+            # The chat still has an active quiz
+            await conn.execute("UPDATE study_sessions SET is_active = false WHERE id = $1", first_quiz)
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['quiz_sessions'], stats['study_sessions']) == (1, 2)
+
+            await conn.execute("UPDATE study_sessions SET is_active = false WHERE id = $1", second_quiz)
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['quiz_sessions'], stats['study_sessions']) == (0, 1)
+
+            # Restoring a soft-deleted quiz counts it again
+            await conn.execute("UPDATE study_sessions SET is_active = true WHERE id = $1", second_quiz)
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['quiz_sessions'], stats['study_sessions']) == (1, 2)
+
+            await conn.execute("DELETE FROM study_sessions WHERE id = ANY($1::int[])", [second_quiz, flashnotes])
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['quiz_sessions'], stats['study_sessions']) == (0, 0)
+
+    run_db(scenario)
+
+def test_result_totals_and_achievements(user_id):
+    async def scenario():
+        async with db.get_connection() as conn:
+            chat = str(uuid.uuid4())
+            quiz = await create_study_session(conn, user_id, chat, "quiz")
+            flashnotes = await create_study_session(conn, user_id, chat, "flashnotes")
+            quiz_result = await create_result(conn, user_id, quiz, "quiz", 95, 10, 120)
+            flashnotes_result = await create_result(conn, user_id, flashnotes, "flashnotes", 60, 20, 60)
+
+            stats = await fetch_stats(conn, user_id)
+            assert stats['results_count'] == 2
+            assert (stats['quiz_results'], stats['flashnote_results'], stats['excellent_results']) == (1, 1, 1)
+            assert stats['accuracy_sum'] == 155
+            assert stats['best_accuracy'] == 95
+            assert (stats['total_time_seconds'], stats['total_questions']) == (180, 30)
+
+            earned = {row['achievement_id'] for row in await conn.fetch(
+                "SELECT achievement_id FROM user_achievements WHERE user_id = $1", user_id
+            )}
+            assert earned == {"first_quiz", "perfectionist", "flashcard_master"}
+            assert stats['achievements_count'] == 3
+
+            # Edits and deletes recompute the totals
+            await conn.execute("UPDATE session_results SET accuracy_percentage = 92 WHERE id = $1", flashnotes_result)
+            await conn.execute("DELETE FROM session_results WHERE id = $1", quiz_result)
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['results_count'], stats['quiz_results'], stats['flashnote_results']) == (1, 0, 1)
+            assert stats['excellent_results'] == 1
+            assert (stats['accuracy_sum'], stats['best_accuracy']) == (92, 92)
+            assert (stats['total_time_seconds'], stats['total_questions']) == (60, 20)
+
+            await conn.execute("DELETE FROM session_results WHERE id = $1", flashnotes_result)
+            stats = await fetch_stats(conn, user_id)
+            assert (stats['results_count'], stats['excellent_results'], stats['accuracy_sum']) == (0, 0, 0)
+            assert stats['best_accuracy'] is None
+
+            # Achievements are never revoked
+            assert stats['achievements_count'] == 3
+
+    run_db(scenario)
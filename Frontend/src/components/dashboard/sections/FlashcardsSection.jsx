@@ -254,15 +254,9 @@ const FlashcardsSection = () => {
       
       console.log('🔍 Fetching flashnotes for user:', userId)
       
-      const response = await fetch(`${import.meta.env.VITE_API_URL}/study-sessions/user/${userId}/flashnotes`)
-      
-      if (response.ok) {
-        const flashnotes = await response.json()
-        console.log('✅ Fetched user flashnotes:', flashnotes)
-        setUserFlashnotes(flashnotes)
-      } else {
-        console.error('❌ Failed to fetch user flashnotes:', response.status)
-      }
+      const flashnotes = await apiService.getUserStudySessions(userId, 'flashnotes')
+      console.log('✅ Fetched user flashnotes:', flashnotes)
+      setUserFlashnotes(flashnotes)
     } catch (error) {
       console.error('❌ Error fetching user flashnotes:', error)
     } finally {
@@ -343,11 +337,19 @@ const FlashcardsSection = () => {
     }
   }
 
-  const startSavedFlashnotes = (savedFlashnotes) => {
+  const startSavedFlashnotes = async (savedFlashnotes) => {
     console.log('🔍 Starting saved flashnotes:', savedFlashnotes)
     
-    // Handle content - it should already be parsed by the backend
+    // The flashnotes list only carries summaries; load the cards on demand
     let flashnotesContent = savedFlashnotes.content
+    if (flashnotesContent === undefined) {
+      try {
+        flashnotesContent = (await apiService.getStudySession(savedFlashnotes.id)).content
+      } catch (error) {
+        console.error('Failed to load flashnotes content:', error)
+        return
+      }
+    }
     
     // If for some reason it's still a string, parse it
     if (typeof flashnotesContent === 'string') {
@@ -1130,7 +1132,7 @@ const FlashcardsSection = () => {
                   </h3>
                   
                   <div className="text-sm text-gray-600 dark:text-gray-300 mb-4">
-                    {flashnote.content?.flashcards?.length || 0} cards • Mixed difficulty
+                    {flashnote.question_count || 0} cards • Mixed difficulty
                   </div>
                   
                   <button 
@@ -42,15 +42,9 @@ const QuizSection = () => {
       
       console.log('🔍 Fetching quizzes for user:', userId)
       
-      const response = await fetch(`${import.meta.env.VITE_API_URL}/study-sessions/user/${userId}/quiz`)
-      
-      if (response.ok) {
-        const quizzes = await response.json()
-        console.log('✅ Fetched user quizzes:', quizzes)
-        setUserQuizzes(quizzes)
-      } else {
-        console.error('❌ Failed to fetch user quizzes:', response.status)
-      }
+      const quizzes = await apiService.getUserStudySessions(userId, 'quiz')
+      console.log('✅ Fetched user quizzes:', quizzes)
+      setUserQuizzes(quizzes)
     } catch (error) {
       console.error('❌ Error fetching user quizzes:', error)
     } finally {
@@ -160,11 +154,19 @@ const QuizSection = () => {
     }
   }
 
-  const startSavedQuiz = (savedQuiz) => {
+  const startSavedQuiz = async (savedQuiz) => {
     console.log('🔍 Starting saved quiz:', savedQuiz)
     
-    // Handle content - it should already be parsed by the backend
+    // The quiz list only carries summaries; load the questions on demand
     let quizContent = savedQuiz.content
+    if (quizContent === undefined) {
+      try {
+        quizContent = (await apiService.getStudySession(savedQuiz.id)).content
+      } catch (error) {
+        console.error('Failed to load quiz content:', error)
+        return
+      }
+    }
     
     // If for some reason it's still a string, parse it
     if (typeof quizContent === 'string') {
@@ -569,7 +571,7 @@ const QuizSection = () => {
                       </h3>
                       
                       <div className="text-sm text-gray-600 dark:text-gray-300 mb-4">
-                        {Array.isArray(quiz.content) ? quiz.content.length : 'Unknown'} questions • Mixed difficulty
+                        {quiz.question_count ?? 'Unknown'} questions • Mixed difficulty
                   </div>
                   
                       <button 
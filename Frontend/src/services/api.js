@@ -1,4 +1,5 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+const PAGE_SIZE = 200; // Largest page the list endpoints serve
 
 class ApiService {
   constructor() {
@@ -61,6 +62,33 @@ class ApiService {
     }
   }
 
+  // Fetch every page of a keyset-paginated list endpoint, following the
+  // X-Next-Cursor header until the server stops sending it.
+  // Pages of `newestLast` lists (messages) run backwards, so older pages go first.
+  async requestAllPages(endpoint, { newestLast = false } = {}) {
+    const separator = endpoint.includes('?') ? '&' : '?';
+    let items = [];
+    let cursor = null;
+
+    do {
+      const url = `${this.baseURL}${endpoint}${separator}limit=${PAGE_SIZE}` +
+        (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+      const response = await fetch(url, { headers: this.getAuthHeaders() });
+      const data = await response.json();
+
+      if (!response.ok) {
+        console.error('❌ API Error:', data);
+        throw new Error(data.detail || 'Request failed');
+      }
+
+      items = newestLast ? data.concat(items) : items.concat(data);
+      cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+
+    console.log(`✅ Fetched ${items.length} items from ${endpoint}`);
+    return items;
+  }
+
   // Authentication methods
   async signup(userData) {
     console.log('👤 Signup request started:', { email: userData.email, username: userData.username });
@@ -199,9 +227,7 @@ class ApiService {
     console.log('🔑 Auth token present:', !!this.getToken());
     
     try {
-      const result = await this.request(`/user/${userId}/sessions`, {
-        method: 'GET'
-      });
+      const result = await this.requestAllPages(`/user/${userId}/sessions`);
       console.log('✅ Sessions fetched successfully. Count:', result?.length || 0);
       console.log('📊 Session data:', result);
       
@@ -224,9 +250,7 @@ class ApiService {
   async getSessionMessages(sessionId) {
     console.log('💬 Fetching messages for session:', sessionId);
     try {
-      const result = await this.request(`/session/${sessionId}/messages`, {
-        method: 'GET'
-      });
+      const result = await this.requestAllPages(`/session/${sessionId}/messages`, { newestLast: true });
       console.log('✅ Messages fetched successfully:', result);
       return result;
     } catch (error) {
@@ -270,6 +294,27 @@ class ApiService {
     }
   }
 
+  // type: 'quiz', 'flashnotes' or 'all'
+  async getUserStudySessions(userId, type) {
+    console.log('📚 Fetching study sessions:', { userId, type });
+    try {
+      return await this.requestAllPages(`/study-sessions/user/${userId}/${type}`);
+    } catch (error) {
+      console.error('❌ Study sessions fetch failed:', error);
+      throw error;
+    }
+  }
+
+  async getStudySession(studySessionId) {
+    console.log('📖 Fetching study session:', studySessionId);
+    try {
+      return await this.request(`/study-sessions/${studySessionId}`);
+    } catch (error) {
+      console.error('❌ Study session fetch failed:', error);
+      throw error;
+    }
+  }
+
   async deleteStudySession(studySessionId) {
     console.log('🗑️ Deleting study session:', studySessionId);
     try {
@@ -341,7 +386,7 @@ class ApiService {
       const requestBody = {
         user_id: userId,
         session_id: sessionId,
-        chunk_size: 500,
+        chunk_size: 400,
         batch_size: 64
       }
       